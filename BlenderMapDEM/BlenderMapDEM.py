@@ -4,62 +4,686 @@ import requests
 import os
 import re
 import subprocess
+import socket
+import secrets
+import threading
+import tempfile
+import time
+import json
+import hashlib
+import itertools
+import sqlite3
+import asyncio
+from contextlib import contextmanager
+from collections import deque
+from urllib.parse import urlparse
+try:
+    import fcntl
+except ImportError:
+    import msvcrt
+    fcntl = None
 import fiona
+from fiona.transform import transform_geom
 import matplotlib.pyplot as plt
 import numpy as np
-from geopy.geocoders import Nominatim
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import rasterio
 from rasterio.plot import show, show_hist
-from rasterio.warp import calculate_default_transform, reproject, Resampling
-from rasterio.mask import mask
+from rasterio.warp import calculate_default_transform, reproject, transform_bounds, Resampling
+from rasterio.mask import mask, raster_geometry_mask
+from rasterio.merge import merge
+from rasterio.io import MemoryFile
+from rasterio.vrt import WarpedVRT
+from rasterio.windows import Window
+from rasterio.transform import array_bounds, Affine
 
 # Ignore a warning that can be safely disregarded which is raised when georeferenceDEM() is run
 import warnings
 warnings.filterwarnings("ignore", category=rasterio.errors.NotGeoreferencedWarning)
 
+# Settings of the HTTP session shared by all functions querying web APIs, changed using configureHTTP()
+_HTTP_SETTINGS = {'pool_size': 10,
+                  'retries': 5,
+                  'backoff_factor': 0.5,
+                  'timeout': (10.0, 300.0)}
+
+# Shared sessions with and without automatic retries, keyed by whether they retry
+_http_sessions = {}
+_http_session_lock = threading.Lock()
+
+# Configure the HTTP session shared by fetchDEM() and locationBounds()
+def configureHTTP(pool_size: int = 10, retries: int = 5, backoff_factor: float = 0.5, connect_timeout: float = 10.0, read_timeout: float = 300.0):
+    """
+    Configures the pooled HTTP session shared by fetchDEM() and locationBounds(), which keeps connections alive between requests and retries failed requests with exponential backoff
+    
+    Parameters:
+        pool_size (int): Maximum number of connections kept open to each host
+        retries (int): Number of times a request is retried on connection errors or 429, 500, and 503 responses
+        backoff_factor (float): Base delay in seconds of the exponential backoff between retries, a random jitter of up to the same amount is added to each delay
+        connect_timeout (float): Seconds to wait for a connection to a server
+        read_timeout (float): Seconds to wait for a server to send data
+    """
+    
+    # Check for invalid input parameter datatypes
+    if type(pool_size) != int:
+        raise TypeError('pool_size is not of type integer, please input an integer.')
+    elif type(retries) != int:
+        raise TypeError('retries is not of type integer, please input an integer.')
+    elif type(backoff_factor) != float:
+        raise TypeError('backoff_factor is not of type float, please input a float.')
+    elif type(connect_timeout) != float:
+        raise TypeError('connect_timeout is not of type float, please input a float.')
+    elif type(read_timeout) != float:
+        raise TypeError('read_timeout is not of type float, please input a float.')
+    
+    # Check for invalid values
+    if pool_size < 1:
+        raise ValueError(f'pool_size "{pool_size}" must be greater than or equal to 1.')
+    elif retries < 0:
+        raise ValueError(f'retries "{retries}" must be greater than or equal to 0.')
+    elif backoff_factor < 0 or connect_timeout <= 0 or read_timeout <= 0:
+        raise ValueError('backoff_factor must not be negative and timeouts must be greater than 0')
+    
+    # Replace the shared session so the new settings apply to following requests
+    with _http_session_lock:
+        _HTTP_SETTINGS.update({'pool_size': pool_size,
+                               'retries': retries,
+                               'backoff_factor': backoff_factor,
+                               'timeout': (connect_timeout, read_timeout)})
+        
+        for session in _http_sessions.values():
+            session.close()
+        _http_sessions.clear()
+
+# Get the shared HTTP session, creating it on first use
+def _httpSession(retry: bool = True) -> requests.Session:
+    """
+    Returns the module-level requests session with a connection pool and retry policy set according to _HTTP_SETTINGS, or without any retries if retry is False for callers retrying requests themselves
+    """
+    
+    with _http_session_lock:
+        if retry not in _http_sessions:
+            # Retry connection errors and throttled or unavailable responses with exponential backoff and jitter
+            retries = Retry(total=_HTTP_SETTINGS['retries'] if retry else 0,
+                            backoff_factor=_HTTP_SETTINGS['backoff_factor'],
+                            backoff_jitter=_HTTP_SETTINGS['backoff_factor'],
+                            status_forcelist=(429, 500, 503),
+                            allowed_methods=('GET',),
+                            respect_retry_after_header=True,
+                            raise_on_status=False)
+            
+            adapter = HTTPAdapter(pool_connections=_HTTP_SETTINGS['pool_size'],
+                                  pool_maxsize=_HTTP_SETTINGS['pool_size'],
+                                  max_retries=retries)
+            
+            session = requests.Session()
+            session.headers['User-Agent'] = 'BlenderMapDEM'
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_sessions[retry] = session
+        
+        return _http_sessions[retry]
+
+# Send a GET request through the shared HTTP session
+def _httpGet(url: str, retry: bool = True, **kwargs) -> requests.Response:
+    """
+    Sends a GET request using the shared HTTP session and its configured timeouts, without automatic retries if retry is False
+    """
+    
+    return _httpSession(retry).get(url, timeout=_HTTP_SETTINGS['timeout'], **kwargs)
+
+# Nominatim search endpoint and minimum seconds between requests allowed by its usage policy
+_NOMINATIM_URL = 'https://nominatim.openstreetmap.org/search'
+_NOMINATIM_INTERVAL = 1.0
+
+# Directory holding persistent caches of this package, under XDG_CACHE_HOME when it is set
+def _cacheDir() -> str:
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'BlenderMapDEM')
+
+# Rate limiter spacing out requests to an API
+class _RateLimiter:
+    """
+    Blocks callers so that consecutive requests, across all threads, are at least interval seconds apart
+    
+    Parameters:
+        interval (float): Minimum number of seconds between requests
+    """
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        """
+        Waits until the next request is allowed
+        """
+        
+        with self.lock:
+            delay = self.next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_time = time.monotonic() + self.interval
+
+_nominatim_limiter = _RateLimiter(_NOMINATIM_INTERVAL)
+
+# Open the persistent geocoding cache
+def _geocodeCache() -> sqlite3.Connection:
+    """
+    Returns a connection to the SQLite database caching location bounds by normalized query, creating it if needed
+    """
+    
+    cache_dir = _cacheDir()
+    os.makedirs(cache_dir, exist_ok=True)
+    
+    connection = sqlite3.connect(os.path.join(cache_dir, 'geocode.sqlite'), timeout=30)
+    connection.execute('CREATE TABLE IF NOT EXISTS geocode (query TEXT PRIMARY KEY, bounds TEXT NOT NULL, created REAL NOT NULL)')
+    
+    return connection
+
 # Get bounds of a location by name
-def locationBounds(location: str):
+def locationBounds(location: str, use_cache: bool = True, cache_ttl: int = 2592000):
     """
     Uses the OpenStreetMap API to return a dictionary of north, south, east, and west latitude and longitude boundaries for a specified location
     
     Parameters:
         location (str): location you wish to get the boundaries of
+        use_cache (bool): If True, returns bounds cached on disk by a previous lookup of the same location and caches new lookups
+        cache_ttl (int): Number of seconds after which cached bounds are looked up again (30 days by default)
     """
     
     # Check for invalid input parameter datatypes
     if type(location) != str:
         raise TypeError('location is not of type string, please input a string.')
+    elif type(use_cache) != bool:
+        raise TypeError('use_cache is not of type boolean, please input a boolean.')
+    elif type(cache_ttl) != int:
+        raise TypeError('cache_ttl is not of type integer, please input an integer.')
     
-    # Try to return valid location bounds
-    try:
-        # Get geocode using geopy.Nominatim module
-        location_query = Nominatim(user_agent = "BlenderMapDEM").geocode(location)
-        lat,lon = location_query.latitude, location_query.longitude
+    # Normalize query so that differences in case and spacing share a cache entry
+    query = ' '.join(location.lower().split())
+    
+    # Return cached bounds if they have not expired
+    if use_cache:
+        connection = _geocodeCache()
+        cached = connection.execute('SELECT bounds, created FROM geocode WHERE query = ?', (query,)).fetchone()
+        connection.close()
+        
+        if cached is not None and time.time() - cached[1] < cache_ttl:
+            return json.loads(cached[0])
+    
+    # Query OpenStreetMap API for boundaries, waiting to respect its limit of one request per second
+    _nominatim_limiter.wait()
+    response = _httpGet(_NOMINATIM_URL, params={'q': query, 'format': 'jsonv2', 'limit': 1})
+    response.raise_for_status()
+    results = response.json()
+    
+    # Raise error if query was invalid
+    if not results:
+        raise AttributeError(f'{location} is not a valid location')
+    
+    # Organize boundary values in a dictionary
+    north = float(results[0]['boundingbox'][1])
+    south = float(results[0]['boundingbox'][0])
+    east = float(results[0]['boundingbox'][3])
+    west = float(results[0]['boundingbox'][2])
+    
+    bounds = {'north': north, 'south': south, 'east': east, 'west': west}
+    
+    # Cache bounds for later lookups
+    if use_cache:
+        connection = _geocodeCache()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO geocode VALUES (?, ?, ?)', (query, json.dumps(bounds), time.time()))
+        connection.close()
+    
+    # Return dictionary of bounds
+    return bounds
 
-        # Query OpenStreetMap API for boundaries
-        url = f'https://nominatim.openstreetmap.org/search?q={location_query}&format=jsonv2'
-        response = requests.get(url).json()
+# OpenTopography global DEM API endpoint
+_OPENTOPOGRAPHY_URL = 'https://portal.opentopography.org/API/globaldem'
 
-        # Organize boundary values in a dictionary
-        north = float(response[0]['boundingbox'][1])
-        south = float(response[0]['boundingbox'][0])
-        east = float(response[0]['boundingbox'][3])
-        west = float(response[0]['boundingbox'][2])
+# Maximum area in km2 that can be requested at once from each DEM dataset offered by OpenTopography
+_DATASET_AREA_LIMITS = {'SRTMGL3': 4050000,
+                        'SRTMGL1': 450000,
+                        'SRTMGL1_E': 450000,
+                        'AW3D30': 450000,
+                        'AW3D30_E': 450000,
+                        'SRTM15Plus': 125000000,
+                        'NASADEM': 450000,
+                        'COP30': 450000,
+                        'COP90': 4050000,
+                        'EU_DTM': 450000,
+                        'GEDI_L3': 500000000}
 
-        bounds = {'north': north, 'south': south, 'east': east, 'west': west}
+# Approximate the area of a latitude and longitude bounding box
+def _bboxArea(north_bound: float, south_bound: float, east_bound: float, west_bound: float) -> float:
+    """
+    Returns the area in km2 of a latitude and longitude bounding box on a spherical Earth
+    """
+    
+    earth_radius = 6371.0088
+    width = np.radians(east_bound - west_bound)
+    height = np.sin(np.radians(north_bound)) - np.sin(np.radians(south_bound))
+    
+    return earth_radius ** 2 * width * height
 
-        # Return dictionary of bounds
-        return bounds
+# Split a bounding box into a grid of tiles that each fall under an area limit
+def _tileGrid(north_bound: float, south_bound: float, east_bound: float, west_bound: float, max_area: float) -> list:
+    """
+    Returns a list of (north, south, east, west) tile bounds covering the bounding box, with no tile larger than max_area km2
+    """
     
-    # Raise error if query was invalid
-    except AttributeError:
-        raise AttributeError(f'{location} is not a valid location')
-    except Exception as error:
+    rows, cols = 1, 1
+    
+    # Add rows or columns along the longest tile side until the largest tile (the row closest to the equator) fits the limit
+    while True:
+        row_edges = np.linspace(south_bound, north_bound, rows + 1)
+        tile_width = (east_bound - west_bound) / cols
+        largest_tile = max(_bboxArea(row_edges[i+1], row_edges[i], west_bound + tile_width, west_bound) for i in range(rows))
+        
+        if largest_tile <= max_area:
+            break
+        
+        if (north_bound - south_bound) / rows > tile_width:
+            rows += 1
+        else:
+            cols += 1
+    
+    col_edges = np.linspace(west_bound, east_bound, cols + 1)
+    tiles = [(float(row_edges[i+1]), float(row_edges[i]), float(col_edges[j+1]), float(col_edges[j])) for i in range(rows) for j in range(cols)]
+    
+    return tiles
+
+# Size of chunks written to disk while downloading and number of attempts made to resume an interrupted download
+_CHUNK_SIZE = 64 * 1024
+_RESUME_ATTEMPTS = 5
+
+# Signatures found in the first bytes of TIFF and BigTIFF files
+_TIFF_SIGNATURES = (b'II*\x00', b'MM\x00*', b'II+\x00', b'MM\x00+')
+
+# Download a single DEM extent from the OpenTopography API
+def _requestDEM(north_bound: float, south_bound: float, east_bound: float, west_bound: float, API_Key: str, output_dir: str, dataset: str, progress = None, retry: bool = True) -> bool:
+    """
+    Queries the OpenTopography API for a DEM extent and streams it to output_dir, returning False without saving if there is no data for the extent
+    
+    The response is written in chunks to a partial file that is renamed into output_dir once complete, interrupted transfers are resumed using HTTP Range requests when the server supports them
+    
+    Parameters:
+        progress: Optional function called as progress(output_dir, bytes_downloaded, total_bytes, bytes_per_second) after each chunk, total_bytes is None if unknown
+        retry (bool): If False, requests are not retried by the HTTP session, for callers retrying failed requests themselves
+    """
+    
+    # Query the OpenTopography API to download .GeoTiff of DEM according to user parameters
+    url = _OPENTOPOGRAPHY_URL+'?demtype='+dataset+'&south='+str(south_bound)+'&north='+str(north_bound)+'&west='+str(west_bound)+'&east='+str(east_bound)+'&outputFormat=GTiff&API_Key='+API_Key+'&nullFill=true'
+    
+    # Name the partial file after the request so an interrupted download is only resumed by an identical request
+    partial_dir = f'{output_dir}.{hashlib.sha256(url.encode()).hexdigest()[:16]}.part'
+    
+    for attempt in range(_RESUME_ATTEMPTS):
+        downloaded = os.path.getsize(partial_dir) if os.path.exists(partial_dir) else 0
+        headers = {'Range': f'bytes={downloaded}-'} if downloaded else {}
+        
+        with _httpGet(url, retry=retry, headers=headers, stream=True) as response:
+            # Start over if the partial file cannot be resumed
+            if response.status_code == 416:
+                os.remove(partial_dir)
+                continue
+            
+            # Raise an exception if the response is not 200 (OK) or 206 (Partial Content)
+            response.raise_for_status()
+            
+            # Server sent the whole file rather than the requested range
+            if response.status_code != 206:
+                downloaded = 0
+            
+            chunks = response.iter_content(chunk_size=_CHUNK_SIZE)
+            content_length = response.headers.get('Content-Length')
+            total = downloaded + int(content_length) if content_length else None
+            
+            # Detect empty results from the headers of a new download, an empty body or a text response instead of a GeoTIFF
+            if downloaded == 0:
+                content_type = response.headers.get('Content-Type', '').lower()
+                if content_length is not None and int(content_length) == 0:
+                    return False
+                if content_type.startswith('text/') or 'json' in content_type or 'html' in content_type:
+                    message = response.content[:1000]
+                    if b'No Data' in message or not message.strip():
+                        return False
+                    raise Exception(f'Unexpected response from OpenTopography: {message[:200]!r}')
+            
+            request_time = time.perf_counter()
+            received = 0
+            try:
+                # Check the first bytes of a new download to detect responses that are not GeoTIFFs despite their headers
+                head = b''
+                if downloaded == 0:
+                    for chunk in chunks:
+                        head += chunk
+                        if len(head) >= 4:
+                            break
+                    
+                    if not head.startswith(_TIFF_SIGNATURES):
+                        if b'No Data' in head or not head:
+                            return False
+                        raise Exception(f'Unexpected response from OpenTopography: {head[:200]!r}')
+                
+                # Write chunks to the partial file while reporting progress, measuring throughput from the bytes streamed after the first bytes
+                with open(partial_dir, 'ab' if downloaded else 'wb') as partial:
+                    partial.write(head)
+                    received += len(head)
+                    start_time = time.perf_counter()
+                    streamed = 0
+                    for chunk in chunks:
+                        partial.write(chunk)
+                        received += len(chunk)
+                        streamed += len(chunk)
+                        if progress is not None:
+                            progress(output_dir, downloaded + received, total, streamed / max(time.perf_counter() - start_time, 1e-9))
+                    
+                    # Downloads that arrived with their first bytes are reported once complete
+                    if progress is not None and streamed == 0:
+                        progress(output_dir, downloaded + received, total, received / max(time.perf_counter() - request_time, 1e-9))
+            
+            # Resume interrupted transfers from the bytes already written if the server supports ranges
+            except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError):
+                if response.headers.get('Accept-Ranges') != 'bytes' and os.path.exists(partial_dir):
+                    os.remove(partial_dir)
+                if attempt == _RESUME_ATTEMPTS - 1:
+                    raise
+                continue
+            
+            # Treat transfers that ended early without an error as interrupted
+            if total is not None and downloaded + received < total:
+                continue
+        
+        # Move completed download into output directory
+        os.replace(partial_dir, output_dir)
+        return True
+    
+    raise Exception(f'Download of "{output_dir}" was interrupted {_RESUME_ATTEMPTS} times, please try again')
+
+# Raise errors depending on OpenTopography server response
+def _raiseResponseError(error: requests.exceptions.HTTPError):
+    """
+    Raises a variety of errors as outlined in the OpenTopography API informing user about possible issues in their query
+    """
+    
+    status_code = error.response.status_code
+    
+    if status_code == 400:
+        raise Exception('Bad Request (Error Code 400): Verify boundaries provided create a valid bounding box and do not exceed the area limitations of the dataset')
+    elif status_code == 401:
+        raise Exception('Unauthorized (Error Code 401): API key provided is invalid')
+    elif status_code == 500:
+        raise Exception('Internal Server Error (Error Code 500): OpenTopography database is currently down')
+    else:
         raise error
 
+# Download a single tile, retrying failed attempts
+def _fetchTile(tile: tuple, API_Key: str, output_dir: str, dataset: str, retries: int, progress = None) -> bool:
+    """
+    Downloads a (north, south, east, west) tile to output_dir, retrying with exponential backoff on errors that are not caused by the request itself
+    
+    This is the only retry layer of tile downloads, the requests are sent through the session without automatic retries so a failing tile makes at most retries + 1 requests
+    """
+    
+    for attempt in range(retries + 1):
+        delay = 2 ** attempt
+        try:
+            return _requestDEM(*tile, API_Key, output_dir, dataset, progress, retry=False)
+        
+        # Invalid bounds or API keys will not succeed on a retry
+        except requests.exceptions.HTTPError as error:
+            if error.response.status_code in (400, 401) or attempt == retries:
+                _raiseResponseError(error)
+            
+            # Wait at least as long as a throttled or unavailable server asks
+            retry_after = error.response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+        except requests.exceptions.RequestException:
+            if attempt == retries:
+                raise
+        
+        time.sleep(delay)
+
+# Download a list of tiles concurrently
+def _fetchTiles(tiles: list, API_Key: str, tile_dir: str, dataset: str, max_workers: int, retries: int, progress = None, completed = None) -> list:
+    """
+    Downloads (north, south, east, west) tiles into tile_dir over a bounded thread pool, returning the path of each tile or None for tiles without data
+    
+    Every tile is attempted even if another fails, the first error is raised once all tiles have finished
+    
+    Parameters:
+        completed: Optional function called as completed(index, path) for every downloaded tile (path is None for tiles without data), returning the path to report for it
+    """
+    
+    tile_paths = [os.path.join(tile_dir, f'tile_{i}.tif') for i in range(len(tiles))]
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_fetchTile, tile, API_Key, path, dataset, retries, progress) for tile, path in zip(tiles, tile_paths)]
+        
+        results = []
+        first_error = None
+        for index, future in enumerate(futures):
+            try:
+                path = tile_paths[index] if future.result() else None
+            except Exception as error:
+                first_error = first_error or error
+                results.append(None)
+                continue
+            
+            results.append(completed(index, path) if completed is not None else path)
+    
+    if first_error is not None:
+        raise first_error
+    
+    return results
+
+# Size in degrees of the snapped grid cells used to cache tiles of each DEM dataset
+_CACHE_TILE_DEGREES = {'SRTMGL3': 5.0,
+                       'SRTMGL1': 1.0,
+                       'SRTMGL1_E': 1.0,
+                       'AW3D30': 1.0,
+                       'AW3D30_E': 1.0,
+                       'SRTM15Plus': 10.0,
+                       'NASADEM': 1.0,
+                       'COP30': 1.0,
+                       'COP90': 5.0,
+                       'EU_DTM': 1.0,
+                       'GEDI_L3': 10.0}
+
+# Snap a bounding box outward to the cache grid of a dataset
+def _snappedTiles(north_bound: float, south_bound: float, east_bound: float, west_bound: float, dataset: str) -> list:
+    """
+    Returns a list of (key, (north, south, east, west)) grid cells of the cache grid of a dataset that cover the bounding box
+    """
+    
+    size = _CACHE_TILE_DEGREES[dataset]
+    
+    # Find the range of grid rows and columns touched by the bounding box
+    first_row, last_row = int(np.floor(south_bound / size)), max(int(np.ceil(north_bound / size)), int(np.floor(south_bound / size)) + 1)
+    first_col, last_col = int(np.floor(west_bound / size)), max(int(np.ceil(east_bound / size)), int(np.floor(west_bound / size)) + 1)
+    
+    tiles = []
+    for row in range(first_row, last_row):
+        for col in range(first_col, last_col):
+            # Key each grid cell by the hash of its dataset and position on the grid
+            key = hashlib.sha256(f'{dataset}:{size}:{row}:{col}'.encode()).hexdigest()
+            bounds = (min((row + 1) * size, 90.0), max(row * size, -90.0), min((col + 1) * size, 180.0), max(col * size, -180.0))
+            tiles.append((key, bounds))
+    
+    return tiles
+
+# Hold an exclusive lock on a file, blocking other processes taking the same lock
+@contextmanager
+def _fileLock(lock_dir: str):
+    with open(lock_dir, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+# Persistent on-disk cache of DEM tiles
+class _TileCache:
+    """
+    Stores downloaded DEM tiles in a directory with a JSON manifest indexing each tile, evicting the least recently used tiles once the cache exceeds its size limit
+    
+    Several caches may share a directory, from threads or other processes, as saving merges the manifest on disk under a file lock
+    
+    Parameters:
+        cache_dir (str): Directory holding cached tiles and the manifest
+        max_size (int): Maximum total size of cached tiles in megabytes
+    """
+    
+    # Serialize manifest access between threads sharing a cache directory
+    _lock = threading.Lock()
+    
+    def __init__(self, cache_dir: str, max_size: int):
+        self.cache_dir = cache_dir
+        self.max_size = max_size * 1024 * 1024
+        self.manifest_dir = os.path.join(cache_dir, 'manifest.json')
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        self.manifest = self._load()
+    
+    def _load(self) -> dict:
+        # Load manifest, starting from an empty cache if it is missing or unreadable
+        try:
+            with open(self.manifest_dir) as manifest:
+                return json.load(manifest)
+        except (OSError, ValueError):
+            return {}
+    
+    def lookup(self, key: str):
+        """
+        Returns (True, path) for a cached tile (path is None for tiles without data), or (False, None) if the tile is not cached
+        """
+        
+        with self._lock:
+            entry = self.manifest.get(key)
+            if entry is None:
+                return False, None
+            
+            path = os.path.join(self.cache_dir, entry['file']) if entry['file'] else None
+            
+            # Forget tiles whose file has been removed from the cache directory
+            if path is not None and not os.path.exists(path):
+                del self.manifest[key]
+                return False, None
+            
+            entry['last_access'] = time.time()
+            return True, path
+    
+    def store(self, key: str, dataset: str, bounds: tuple, tile_dir):
+        """
+        Moves a downloaded tile into the cache (tile_dir is None for tiles without data) and returns its cached path
+        """
+        
+        with self._lock:
+            if tile_dir is None:
+                file, size = None, 0
+            else:
+                file = f'{key}.tif'
+                os.replace(tile_dir, os.path.join(self.cache_dir, file))
+                size = os.path.getsize(os.path.join(self.cache_dir, file))
+            
+            self.manifest[key] = {'dataset': dataset, 'bounds': list(bounds), 'file': file, 'size': size, 'last_access': time.time()}
+            
+            return os.path.join(self.cache_dir, file) if file else None
+    
+    def save(self):
+        """
+        Merges the manifest with the one on disk, evicts least recently used tiles until the cache fits its size limit, and atomically writes the manifest
+        """
+        
+        with self._lock, _fileLock(self.manifest_dir + '.lock'):
+            # Add tiles stored by other caches sharing the directory, keeping the latest access of every tile
+            for key, entry in self._load().items():
+                if key not in self.manifest or entry['last_access'] > self.manifest[key]['last_access']:
+                    self.manifest[key] = entry
+            
+            # Forget tiles whose file has been removed, such as tiles evicted by another cache
+            self.manifest = {key: entry for key, entry in self.manifest.items() if entry['file'] is None or os.path.exists(os.path.join(self.cache_dir, entry['file']))}
+            
+            total_size = sum(entry['size'] for entry in self.manifest.values())
+            
+            for key in sorted(self.manifest, key=lambda key: self.manifest[key]['last_access']):
+                if total_size <= self.max_size:
+                    break
+                
+                entry = self.manifest.pop(key)
+                total_size -= entry['size']
+                if entry['file']:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, entry['file']))
+                    except FileNotFoundError:
+                        pass
+            
+            temporary_dir = self.manifest_dir + '.tmp'
+            with open(temporary_dir, 'w') as manifest:
+                json.dump(self.manifest, manifest)
+            os.replace(temporary_dir, self.manifest_dir)
+
+# Fetch a DEM extent through the persistent tile cache
+def _fetchCachedDEM(north_bound: float, south_bound: float, east_bound: float, west_bound: float, API_Key: str, output_dir: str, dataset: str, max_workers: int, retries: int, cache_dir: str, cache_size: int, progress = None):
+    """
+    Serves the grid cells covering an extent from the tile cache, downloads only the missing cells, and mosaics the extent into output_dir
+    """
+    
+    cache = _TileCache(cache_dir, cache_size)
+    tiles = _snappedTiles(north_bound, south_bound, east_bound, west_bound, dataset)
+    
+    # Split grid cells into cached tiles and tiles that must be downloaded
+    tile_paths = []
+    missing = []
+    for key, bounds in tiles:
+        cached, path = cache.lookup(key)
+        if cached:
+            tile_paths.append(path)
+        else:
+            missing.append((key, bounds))
+    
+    # Download missing tiles, moving each into the cache as it completes so tiles are kept even if another tile fails
+    if missing:
+        def storeTile(index: int, path):
+            key, bounds = missing[index]
+            return cache.store(key, dataset, bounds, path)
+        
+        with tempfile.TemporaryDirectory(dir=cache_dir) as tile_dir:
+            try:
+                tile_paths += _fetchTiles([bounds for _, bounds in missing], API_Key, tile_dir, dataset, max_workers, retries, progress, storeTile)
+            except Exception:
+                cache.save()
+                raise
+    
+    tile_paths = [path for path in tile_paths if path is not None]
+    
+    # Raise error if no tile contains data
+    if not tile_paths:
+        cache.save()
+        raise Exception("Request was OK, however there is no data for specified extent")
+    
+    # Mosaic tiles cropped to the requested extent into output directory specified by user
+    merge(tile_paths, bounds=(west_bound, south_bound, east_bound, north_bound), dst_path=output_dir)
+    
+    # Evict least recently used tiles and save the manifest
+    cache.save()
+
 # Fetch DEM .GeoTIFF image of user specified extent
-def fetchDEM(north_bound: float, south_bound: float, east_bound: float, west_bound: float, API_Key: str, output_dir: str, dataset: str = 'SRTMGL1'):
+def fetchDEM(north_bound: float, south_bound: float, east_bound: float, west_bound: float, API_Key: str, output_dir: str, dataset: str = 'SRTMGL1', tiled: bool = False, max_workers: int = 4, retries: int = 3, cache_dir: str = None, cache_size: int = 2048, progress = None):
     """
     Uses the OpenTopography API in order to fetch a .GeoTIFF raster image containing DEM of chosen extent
     
@@ -70,20 +694,17 @@ def fetchDEM(north_bound: float, south_bound: float, east_bound: float, west_bou
         west_bound (float): Longitude coordinate of the western bound of chosen DEM extent
         API_Key (string): OpenTopography API key that is needed to fetch data
         output_dir (string): The path to the output image file including file extension
+        dataset (string): OpenTopography DEM dataset to fetch data from
+        tiled (bool): If True, splits the extent into tiles sized to the area limit of the dataset, downloads them concurrently, and mosaics them into output_dir
+        max_workers (int): Maximum number of tiles downloaded at once when tiled
+        retries (int): Number of times a failed tile is retried when tiled
+        cache_dir (string): Directory of a persistent tile cache, if given tiles are fetched on a snapped grid and only tiles missing from the cache are downloaded
+        cache_size (int): Maximum size of the tile cache in megabytes before least recently used tiles are evicted
+        progress: Optional function called as progress(output_dir, bytes_downloaded, total_bytes, bytes_per_second) as each file downloads
     """
 
     # Declare possible DEM datasets
-    possible_datasets = ['SRTMGL3',
-                         'SRTMGL1',
-                         'SRTMGL1_E',
-                         'AW3D30',
-                         'AW3D30_E',
-                         'SRTM15Plus',
-                         'NASADEM',
-                         'COP30',
-                         'COP90',
-                         'EU_DTM',
-                         'GEDI_L3']
+    possible_datasets = list(_DATASET_AREA_LIMITS)
     
         ### --- Catch a variety of user-input errors --- ###
     
@@ -102,6 +723,18 @@ def fetchDEM(north_bound: float, south_bound: float, east_bound: float, west_bou
         raise TypeError('output_dir is not of type string, please input a string.')
     elif type(dataset) != str:
         raise TypeError('dataset is not of type string, please input a string.')
+    elif type(tiled) != bool:
+        raise TypeError('tiled is not of type boolean, please input a boolean.')
+    elif type(max_workers) != int:
+        raise TypeError('max_workers is not of type integer, please input an integer.')
+    elif type(retries) != int:
+        raise TypeError('retries is not of type integer, please input an integer.')
+    elif cache_dir is not None and type(cache_dir) != str:
+        raise TypeError('cache_dir is not of type string, please input a string.')
+    elif type(cache_size) != int:
+        raise TypeError('cache_size is not of type integer, please input an integer.')
+    elif progress is not None and not callable(progress):
+        raise TypeError('progress is not a function, please input a function.')
     
     # Check for invalid characters in output directory
     pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
@@ -129,44 +762,211 @@ def fetchDEM(north_bound: float, south_bound: float, east_bound: float, west_bou
     elif (east_bound < west_bound):
         raise ValueError('The east bound must be greater than the west bound')
     
+    # Raise errors if invalid tiling parameters were given by user
+    if max_workers < 1:
+        raise ValueError(f'max_workers "{max_workers}" must be greater than or equal to 1.')
+    elif retries < 0:
+        raise ValueError(f'retries "{retries}" must be greater than or equal to 0.')
+    elif cache_size < 0:
+        raise ValueError(f'cache_size "{cache_size}" must be greater than or equal to 0.')
+    
+    # Check for invalid characters in cache directory
+    if cache_dir is not None and pattern.search(cache_dir):
+        raise ValueError('Cache directory contains invalid characters.')
+    
         ### --- Download DEM data from OpenTopography --- ###
     
-    try:
-        # Query the OpenTopography API to download .GeoTiff of DEM according to user parameters
-        url = 'https://portal.opentopography.org/API/globaldem?demtype='+dataset+'&south='+str(south_bound)+'&north='+str(north_bound)+'&west='+str(west_bound)+'&east='+str(east_bound)+'&outputFormat=GTiff&API_Key='+API_Key+'&nullFill=true'
-        response = requests.get(url)
-        
-        # Raise an exception if the response is not 200 (OK)
-        response.raise_for_status()
+    if cache_dir is not None:
+        _fetchCachedDEM(north_bound, south_bound, east_bound, west_bound, API_Key, output_dir, dataset, max_workers, retries, cache_dir, cache_size, progress)
+        return
+    
+    if not tiled:
+        try:
+            has_data = _requestDEM(north_bound, south_bound, east_bound, west_bound, API_Key, output_dir, dataset, progress)
+        except requests.exceptions.HTTPError as error:
+            _raiseResponseError(error)
         
         # Raise error if no data exists for chosen bounding box in dataset
-        if "No Data" in response.text:
+        if not has_data:
+            raise Exception("Request was OK, however there is no data for specified extent")
+        
+        return
+    
+        ### --- Download tiles concurrently and mosaic them --- ###
+    
+    # Split extent into tiles safely under the area limit of the dataset
+    tiles = _tileGrid(north_bound, south_bound, east_bound, west_bound, 0.9 * _DATASET_AREA_LIMITS[dataset])
+    
+    # Download tiles into a temporary directory next to the output file
+    with tempfile.TemporaryDirectory(dir=output_dir_path) as tile_dir:
+        tile_paths = [path for path in _fetchTiles(tiles, API_Key, tile_dir, dataset, max_workers, retries, progress) if path is not None]
+        
+        # Raise error if no tile contains data
+        if not tile_paths:
             raise Exception("Request was OK, however there is no data for specified extent")
         
-        # Download DEM image into output directory specified by user
-        open(output_dir, 'wb').write(response.content)
+        # Mosaic tiles into output directory specified by user
+        merge(tile_paths, bounds=(west_bound, south_bound, east_bound, north_bound), dst_path=output_dir)
+
+# Fetch DEMs of many regions concurrently using asyncio
+async def fetchDEMBatchAsync(regions: list, API_Key: str, output_dir: str, dataset: str = 'SRTMGL1', max_concurrency: int = 4, tiled: bool = False, cache_dir: str = None) -> list:
+    """
+    Resolves a list of location names or bounding boxes using locationBounds() and downloads their DEMs using fetchDEM() concurrently, returning a result for every region instead of raising on the first failure
+    
+    Parameters:
+        regions (list): Location names (str), dictionaries with 'north', 'south', 'east', and 'west' keys, or (north, south, east, west) tuples
+        API_Key (string): OpenTopography API key that is needed to fetch data
+        output_dir (string): The path to the directory in which to save one .tif file per region
+        dataset (string): OpenTopography DEM dataset to fetch data from
+        max_concurrency (int): Maximum number of requests made to OpenTopography at once, tiled regions download their tiles one at a time
+        tiled (bool): Passed to fetchDEM(), splits large regions into tiles downloaded concurrently
+        cache_dir (string): Passed to fetchDEM(), directory of a persistent tile cache
+    """
+    
+        ### --- Catch a variety of user-input errors --- ###
+    
+    # Check for invalid input parameter datatypes
+    if type(regions) != list:
+        raise TypeError('regions is not of type list, please input a list.')
+    elif type(API_Key) != str:
+        raise TypeError('API_Key is not of type string, please input a string.')
+    elif type(output_dir) != str:
+        raise TypeError('output_dir is not of type string, please input a string.')
+    elif type(max_concurrency) != int:
+        raise TypeError('max_concurrency is not of type integer, please input an integer.')
+    
+    # Check for invalid output directory
+    if not os.path.isdir(output_dir):
+        raise FileNotFoundError(f'Output directory "{output_dir}" does not exist, please create it.')
+    if max_concurrency < 1:
+        raise ValueError(f'max_concurrency "{max_concurrency}" must be greater than or equal to 1.')
+    
+        ### --- Resolve and download regions concurrently --- ###
+    
+    # Bound the number of concurrent requests made to each host, Nominatim is additionally rate limited by locationBounds()
+    host_limits = {urlparse(_NOMINATIM_URL).netloc: asyncio.Semaphore(1),
+                   urlparse(_OPENTOPOGRAPHY_URL).netloc: asyncio.Semaphore(max_concurrency)}
+    
+    # Name output files after location names, or after their position in the list for bounding boxes
+    output_names = []
+    for index, region in enumerate(regions):
+        name = re.sub(r'[^a-zA-Z0-9_\-]+', '_', region).strip('_') if type(region) == str else ''
+        if not name or name in output_names:
+            name = f'{name}_{index}' if name else f'region_{index}'
+        output_names.append(name)
+    
+    async def fetchRegion(region, name: str) -> dict:
+        result = {'region': region, 'bounds': None, 'output_dir': None, 'error': None}
+        
+        try:
+            # Resolve region to a dictionary of bounds
+            if type(region) == str:
+                async with host_limits[urlparse(_NOMINATIM_URL).netloc]:
+                    bounds = await asyncio.to_thread(locationBounds, region)
+            elif type(region) == dict:
+                bounds = {key: float(region[key]) for key in ('north', 'south', 'east', 'west')}
+            elif type(region) in (tuple, list) and len(region) == 4:
+                bounds = dict(zip(('north', 'south', 'east', 'west'), (float(value) for value in region)))
+            else:
+                raise TypeError(f'Region "{region}" is not a location name, dictionary of bounds, or (north, south, east, west) tuple.')
+            
+            result['bounds'] = bounds
+            
+            # Download DEM of region, one tile at a time so each region holds a single connection to OpenTopography
+            region_dir = os.path.join(output_dir, f'{name}.tif')
+            async with host_limits[urlparse(_OPENTOPOGRAPHY_URL).netloc]:
+                await asyncio.to_thread(fetchDEM, bounds['north'], bounds['south'], bounds['east'], bounds['west'], API_Key, region_dir, dataset, tiled=tiled, max_workers=1, cache_dir=cache_dir)
+            
+            result['output_dir'] = region_dir
+        
+        # Record failure of this region and carry on with the others
+        except Exception as error:
+            result['error'] = error
+        
+        return result
+    
+    return await asyncio.gather(*(fetchRegion(region, name) for region, name in zip(regions, output_names)))
+
+# Fetch DEMs of many regions concurrently
+def fetchDEMBatch(regions: list, API_Key: str, output_dir: str, dataset: str = 'SRTMGL1', max_concurrency: int = 4, tiled: bool = False, cache_dir: str = None) -> list:
+    """
+    Runs fetchDEMBatchAsync() to completion and returns its list of results, use fetchDEMBatchAsync() directly where an event loop is already running (such as in Jupyter notebooks)
+    
+    Parameters:
+        regions (list): Location names (str), dictionaries with 'north', 'south', 'east', and 'west' keys, or (north, south, east, west) tuples
+        API_Key (string): OpenTopography API key that is needed to fetch data
+        output_dir (string): The path to the directory in which to save one .tif file per region
+        dataset (string): OpenTopography DEM dataset to fetch data from
+        max_concurrency (int): Maximum number of requests made to OpenTopography at once, tiled regions download their tiles one at a time
+        tiled (bool): Passed to fetchDEM(), splits large regions into tiles downloaded concurrently
+        cache_dir (string): Passed to fetchDEM(), directory of a persistent tile cache
+    """
+    
+    return asyncio.run(fetchDEMBatchAsync(regions, API_Key, output_dir, dataset, max_concurrency, tiled, cache_dir))
 
-        ### --- Raise server response errors --- ###
+# Apply a function to each internal block of an open rasterio dataset
+def _mapBlocks(dataset, block_function, num_threads: int = 1, write: bool = False, indexes = None) -> list:
+    """
+    Reads an open rasterio dataset one internal block at a time and applies a function to each block, optionally spreading blocks over a thread pool
+    
+    Parameters:
+        dataset: Open rasterio dataset to iterate over
+        block_function: Function taking a window and the block data read from it (all bands) and returning a processed block or partial result
+        num_threads (int): Number of threads to spread blocks over
+        write (bool): If True, the array returned by block_function is written back to the dataset at the same window
+        indexes: Band index or list of band indexes to read (all bands are read by default)
+    """
+    
+    # Rasterio dataset handles are not thread-safe, so every read and write of the dataset holds the same lock while processing runs concurrently
+    dataset_lock = threading.Lock()
+    
+    def processBlock(window):
+        with dataset_lock:
+            data = dataset.read(indexes, window=window)
         
-    # Depending on server response, raise a variety of errors as outlined in the API informing user about possible issues in their query
-    except requests.exceptions.HTTPError as error:
-        if response.status_code == 400:
-            raise Exception('Bad Request (Error Code 400): Verify boundaries provided create a valid bounding box and do not exceed the area limitations of the dataset')
-        elif response.status_code == 401:
-            raise Exception('Unauthorized (Error Code 401): API key provided is invalid')
-        elif response.status_code == 500:
-            raise Exception('Internal Server Error (Error Code 500): OpenTopography database is currently down')
-        else:
-            raise error
+        result = block_function(window, data)
+        
+        if write:
+            with dataset_lock:
+                dataset.write(result, window=window)
+            return None
+        
+        return result
+    
+    # Walk the internal block layout of the first band (GeoTIFF bands share their block layout)
+    windows = [window for _, window in dataset.block_windows(1)]
+    
+    if num_threads > 1:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            return list(executor.map(processBlock, windows))
+    
+    return [processBlock(window) for window in windows]
+
+# Replace 'nodata' pixels of an array
+def _replaceNoData(data: np.ndarray, current_nodata, nodata_value: int) -> np.ndarray:
+    """
+    Replaces pixels of an array equal to current_nodata (which may be NaN or None) with nodata_value in place and returns the array
+    """
+    
+    if current_nodata is None:
+        return data
+    elif np.isnan(current_nodata):
+        data[np.isnan(data)] = nodata_value
+    else:
+        data[data == current_nodata] = nodata_value
+    
+    return data
 
 # Fix 'nodata' values of an input .geotiff
-def fixNoData(geotiff_dir: str, nodata_value: int = 0):
+def fixNoData(geotiff_dir: str, nodata_value: int = 0, streaming: bool = False, num_threads: int = 1):
     """
     Fixes the 'nodata' pixel of DEM .geotiff images to a specific value (0 is recommended) so its data is easily interpreted
     
     Paramters:
         geotiff_dir (str): Directory of the .geotiff you wish to set the 'nodata' value for
         nodata_value (int): Value you wish to set as 'nodata' for the input .geotiff (0 is default and recommended)
+        streaming (bool): If True, rewrites the .geotiff one internal block at a time so memory use is bounded by block size rather than raster size
+        num_threads (int): Number of threads to spread blocks over when streaming
     """
     
     # Check for invalid input parameter datatypes
@@ -174,35 +974,65 @@ def fixNoData(geotiff_dir: str, nodata_value: int = 0):
         raise TypeError('geotiff_dir is not of type string, please input a string.')
     elif type(nodata_value) != int:
         raise TypeError('nodata_value is not of type integer, please input an integer.')
+    elif type(streaming) != bool:
+        raise TypeError('streaming is not of type boolean, please input a boolean.')
+    elif type(num_threads) != int:
+        raise TypeError('num_threads is not of type integer, please input an integer.')
+    
+    # Check for invalid number of threads
+    if num_threads < 1:
+        raise ValueError(f'num_threads "{num_threads}" must be greater than or equal to 1.')
     
     # Open .geotiff using rasterio and get metadata
     geotiff = rasterio.open(geotiff_dir, 'r+')
-    data = geotiff.read()
     current_nodata = geotiff.nodata
     
     if current_nodata == nodata_value:
+        geotiff.close()
         return
     
-    data[data == current_nodata] = 0
+    # Replace current 'nodata' pixels of a block with the new 'nodata' value
+    def replaceNoData(window, data):
+        return _replaceNoData(data, current_nodata, nodata_value)
+    
+    if streaming:
+        # Rewrite 'nodata' pixels in place one block at a time
+        _mapBlocks(geotiff, replaceNoData, num_threads=num_threads, write=True)
+    else:
+        # Rewrite 'nodata' pixels of the whole .geotiff at once
+        data = replaceNoData(None, geotiff.read())
+        geotiff.write(data)
     
     geotiff.nodata = nodata_value
     
-    # Save output and overwrite .geotiff
-    geotiff.write(data)
+    # Remove statistics cached by describeDEM() as pixel values have changed
+    geotiff.clear_stats()
     
     # Close .geotiff
     geotiff.close()
 
-# Create 2D plot of DEM .geotiff file
-def plotDEM (geotiff_dir: str, histogram: bool = True, colormap: str = 'Greys_r', plot_title: str = 'DEM Map'):
+# Resampling methods available when warping or downsampling DEMs
+_RESAMPLING_METHODS = {'nearest': Resampling.nearest,
+                       'bilinear': Resampling.bilinear,
+                       'cubic': Resampling.cubic,
+                       'cubic_spline': Resampling.cubic_spline,
+                       'lanczos': Resampling.lanczos,
+                       'average': Resampling.average,
+                       'mode': Resampling.mode,
+                       'min': Resampling.min,
+                       'max': Resampling.max,
+                       'med': Resampling.med}
+
+# Builds overview pyramids of a .geotiff
+def buildOverviews(geotiff_dir: str, factors: list = None, resampling: str = 'average', external: bool = False):
     """
-    Plots the DEM .geotiff file using rasterio and matplotlib
+    Builds overviews (reduced resolution copies) of a .geotiff so previews, statistics, and downsampling with max_size read a small overview instead of the full resolution DEM
     
     Parameters:
-        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
-        histogram (bool): If True, will plot a historgram of elevation values alongside base plot
-        colormap (str): Define matplotlib cmap to use for plotting
-        plot_title (str): Title for plot
+        geotiff_dir (str): Directory of the .geotiff to build overviews of
+        factors (list): Decimation factors of the overviews, such as [2, 4, 8, 16], halving resolution until the DEM is 256 pixels wide or high by default
+        resampling (str): Resampling method used to build the overviews, such as 'average', 'nearest', or 'cubic'
+        external (bool): If True, writes the overviews to a separate .ovr file next to the .geotiff instead of inside it
     """
     
         ### --- Catch a variety of user-input errors --- ###
@@ -210,12 +1040,14 @@ def plotDEM (geotiff_dir: str, histogram: bool = True, colormap: str = 'Greys_r'
     # Check for invalid input parameter datatypes
     if type(geotiff_dir) != str:
         raise TypeError('geotiff_dir is not of type string, please input a string.')
-    elif type(histogram) != bool:
-        raise TypeError('histogram is not of type boolean, please input a boolean.')
-    elif type(colormap) != str:
-        raise TypeError('colormap is not of type string, please input a string.')
-    elif type(plot_title) != str:
-        raise TypeError('plot_title is not of type string, please input a string.')
+    elif factors is not None and type(factors) != list and type(factors) != tuple:
+        raise TypeError('factors is not of type list, please input a list.')
+    elif factors is not None and any(type(factor) != int for factor in factors):
+        raise TypeError('factors contains values not of type integer, please input a list of integers.')
+    elif type(resampling) != str:
+        raise TypeError('resampling is not of type string, please input a string.')
+    elif type(external) != bool:
+        raise TypeError('external is not of type boolean, please input a boolean.')
     
     # Check for invalid characters in input directory
     pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
@@ -228,131 +1060,563 @@ def plotDEM (geotiff_dir: str, histogram: bool = True, colormap: str = 'Greys_r'
     if not geotiff_dir.endswith(('.tif','.tiff')):
         raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
     
-        ### --- Create plot of .geotiff DEM --- ###
-        
-    # Read in DEM from geotiff_dir
-    DEM = rasterio.open(geotiff_dir)
+    # Check for invalid factors or resampling method
+    if factors is not None and (len(factors) == 0 or any(factor < 2 for factor in factors)):
+        raise ValueError('factors must contain at least one factor, and every factor must be greater than or equal to 2.')
+    if resampling not in _RESAMPLING_METHODS:
+        raise ValueError(f'Invalid resampling method "{resampling}", available methods are: {", ".join(_RESAMPLING_METHODS)}')
     
-    # Create plot
-    fig, ax = plt.subplots()
+        ### --- Build overviews --- ###
     
-    # Set colorbar
-    color_data = ax.imshow(DEM.read()[0], cmap = colormap)
-    bar = fig.colorbar(color_data, ax=ax)
-    bar.set_label('Pixel Value')
-
-    # Set axis labels
-    ax.set_xlabel("Longitude")
-    ax.set_ylabel("Latitude")
+    # GDAL writes overviews of a GeoTIFF to an external .ovr file instead of internally when TIFF_USE_OVR is set
+    with rasterio.Env(TIFF_USE_OVR=external):
+        with rasterio.open(geotiff_dir, 'r+') as geotiff:
+            
+            # Halve resolution until the smallest overview is no larger than 256 pixels on its longest side
+            if factors is None:
+                factors = [2]
+                while max(geotiff.width, geotiff.height) / factors[-1] > 256:
+                    factors.append(factors[-1] * 2)
+            
+            geotiff.build_overviews(sorted(factors), _RESAMPLING_METHODS[resampling])
+            geotiff.update_tags(ns='rio_overview', resampling=resampling)
 
-    # Show plot of DEM data
-    rasterio.plot.show(DEM,
-                       ax=ax,
-                       title = plot_title,
-                       cmap = colormap)
-
-        ### --- Plot histogram of elevation values --- ###
+# Open a DEM from a path, or pass through an already open rasterio dataset such as the one returned by reprojectDEM(lazy=True)
+@contextmanager
+def _openDEM(geotiff_dir):
+    """
+    Yields an open rasterio dataset for either a .geotiff path or an open dataset, only closing datasets it opened itself
+    """
     
-    if histogram == True:
-        # Get the elevation values from the DEM .geotiff file
-        elevation_values = DEM.read(1).flatten()
-
-        # Plot a histogram of elevation values
-        fig, ax = plt.subplots()
-        ax.hist(elevation_values, bins=50)
-        ax.set_xlabel("Elevation Pixel Value")
-        ax.set_ylabel("Frequency of Pixels")
-        ax.set_title("Histogram of Elevation Values")
+    if isinstance(geotiff_dir, rasterio.io.DatasetReaderBase):
+        if geotiff_dir.closed:
+            raise ValueError('Input dataset is closed, please input an open dataset.')
+        yield geotiff_dir
+    else:
+        with rasterio.open(geotiff_dir) as DEM:
+            yield DEM
 
-        # Show both plots
-        plt.show(block=True)
+# Shape of a DEM decimated to fit within a maximum size
+def _decimatedShape(height: int, width: int, max_size: int) -> tuple:
+    """
+    Returns the height and width of a DEM scaled down, keeping its aspect ratio, so its longest side is at most max_size pixels
+    """
+    
+    scale = max(height, width) / max_size
+    if scale <= 1:
+        return height, width
+    
+    return max(1, int(height / scale)), max(1, int(width / scale))
 
-# Describe DEM map
-def describeDEM(geotiff_dir: str) -> dict:
+# Read a DEM at a reduced resolution into an in-memory dataset
+@contextmanager
+def _decimatedDEM(DEM, max_size: int = None):
     """
-    Returns a dictionary including important geospatial information about an input .geotiff DEM
+    Yields the open DEM itself if max_size is None or it already fits, otherwise an in-memory copy read at a size fitting max_size, which GDAL reads from the coarsest overview meeting that size if the DEM has overviews
+    """
+    
+    height, width = _decimatedShape(DEM.height, DEM.width, max_size) if max_size is not None else DEM.shape
+    if (height, width) == DEM.shape:
+        yield DEM
+        return
+    
+    # Read the DEM directly at the reduced size
+    data = DEM.read(out_shape=(DEM.count, height, width), resampling=Resampling.nearest)
+    
+    profile = {'driver': 'GTiff',
+               'dtype': data.dtype,
+               'count': DEM.count,
+               'width': width,
+               'height': height,
+               'crs': DEM.crs,
+               'transform': DEM.transform * Affine.scale(DEM.width / width, DEM.height / height),
+               'nodata': DEM.nodata}
+    
+    with MemoryFile() as memfile:
+        with memfile.open(**profile) as dataset:
+            dataset.write(data)
+        with memfile.open() as dataset:
+            yield dataset
 
+# Create 2D plot of DEM .geotiff file
+def plotDEM (geotiff_dir: str, histogram: bool = True, colormap: str = 'Greys_r', plot_title: str = 'DEM Map', max_size: int = 2048, num_threads: int = 1):
+    """
+    Plots the DEM .geotiff file using rasterio and matplotlib
+    
     Parameters:
-        geotiff_dir (str): Input directory of .geotiff DEM file
+        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension, or an open rasterio dataset such as reprojectDEM(lazy=True) returns
+        histogram (bool): If True, will plot a historgram of elevation values alongside base plot
+        colormap (str): Define matplotlib cmap to use for plotting
+        plot_title (str): Title for plot
+        max_size (int): Plots the DEM read once at a reduced size whose longest side is at most max_size pixels, from its overviews if it has any; None plots full resolution
+        num_threads (int): Number of threads to spread blocks over when counting the histogram
     """
     
         ### --- Catch a variety of user-input errors --- ###
-        
-    # Check for invalid input parameter datatypes
-    if type(geotiff_dir) != str:
-        raise TypeError('geotiff_dir is not of type string, please input a string.')
-        
-    # Check for invalid characters in input directory
-    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
-    if pattern.search(geotiff_dir):
-        raise ValueError('Input directory contains invalid characters.')
     
-    # Check for invalid input directory or filetype errors
-    if not os.path.exists(geotiff_dir):
-        raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
-    if not geotiff_dir.endswith(('.tif','.tiff')):
-        raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
+    # Check for invalid input parameter datatypes
+    if type(geotiff_dir) != str and not isinstance(geotiff_dir, rasterio.io.DatasetReaderBase):
+        raise TypeError('geotiff_dir is not of type string or rasterio dataset, please input a string or dataset.')
+    elif type(histogram) != bool:
+        raise TypeError('histogram is not of type boolean, please input a boolean.')
+    elif type(colormap) != str:
+        raise TypeError('colormap is not of type string, please input a string.')
+    elif type(plot_title) != str:
+        raise TypeError('plot_title is not of type string, please input a string.')
+    elif max_size is not None and type(max_size) != int:
+        raise TypeError('max_size is not of type integer, please input an integer.')
+    elif type(num_threads) != int:
+        raise TypeError('num_threads is not of type integer, please input an integer.')
     
-        ### --- Open .geotiff file using rasterio --- ###
+    if type(geotiff_dir) == str:
+        # Check for invalid characters in input directory
+        pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+        if pattern.search(geotiff_dir):
+            raise ValueError('Input directory contains invalid characters.')
         
-    # Open .geotiff file using rasterio
-    DEM = rasterio.open(geotiff_dir)
+        # Check for invalid input directory or filetype errors
+        if not os.path.exists(geotiff_dir):
+            raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
+        if not geotiff_dir.endswith(('.tif','.tiff')):
+            raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
+    
+    # Check for invalid maximum size or number of threads
+    if max_size is not None and max_size < 1:
+        raise ValueError(f'max_size "{max_size}" must be greater than or equal to 1.')
+    if num_threads < 1:
+        raise ValueError(f'num_threads "{num_threads}" must be greater than or equal to 1.')
+    
+        ### --- Create plot of .geotiff DEM --- ###
+        
+    # Open DEM from geotiff_dir
+    with _openDEM(geotiff_dir) as DEM:
+        
+        # Read the DEM once at a reduced size fitting the screen, virtual datasets are only warped at that size
+        with _decimatedDEM(DEM, max_size) as preview:
+            elevation = preview.read(1, masked=True)
+            extent = rasterio.plot.plotting_extent(preview)
+        
+        # Create plot
+        fig, ax = plt.subplots()
+        
+        # Show plot of DEM data over its geographic extent and set colorbar
+        color_data = ax.imshow(elevation, cmap = colormap, extent = extent)
+        bar = fig.colorbar(color_data, ax=ax)
+        bar.set_label('Pixel Value')
+        ax.set_title(plot_title)
+        
+        # Set axis labels
+        ax.set_xlabel("Longitude")
+        ax.set_ylabel("Latitude")
+        
+            ### --- Plot histogram of elevation values --- ###
+        
+        if histogram == True:
+            # Count elevation values of the full resolution DEM into fixed bins block by block, excluding 'nodata' pixels, using the range of stored statistics if available
+            statistics = _readStatistics(DEM, percentiles=()) if type(geotiff_dir) == str else None
+            value_range = (statistics['min'], statistics['max']) if statistics is not None and statistics['min'] is not None else None
+            counts, edges = _blockHistogram(DEM, bins=50, value_range=value_range, num_threads=num_threads)
+            
+            # Plot a histogram of elevation values
+            fig, ax = plt.subplots()
+            ax.hist(edges[:-1], bins=edges, weights=counts)
+            ax.set_xlabel("Elevation Pixel Value")
+            ax.set_ylabel("Frequency of Pixels")
+            ax.set_title("Histogram of Elevation Values")
+            
+            # Show both plots
+            plt.show(block=True)
+
+# Mergeable sketch used to approximate percentiles of elevation values
+class _QuantileSketch:
+    """
+    Approximates quantiles of a stream of values using logarithmically spaced buckets with a bounded relative error (after DDSketch), two sketches can be merged by adding their bucket counts
+    
+    Parameters:
+        relative_accuracy (float): Maximum relative error of returned quantile values
+        zero_threshold (float): Absolute values below this threshold are counted as 0
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.001, zero_threshold: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.zero_threshold = zero_threshold
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+    
+    def add(self, values: np.ndarray):
+        """
+        Adds a 1D array of values to the sketch
+        """
+        
+        values = values.astype('float64', copy=False)
+        positive = values[values >= self.zero_threshold]
+        negative = -values[values <= -self.zero_threshold]
+        
+        self.zero_count += values.size - positive.size - negative.size
+        self.count += values.size
+        
+        # Count values falling into each logarithmic bucket
+        for buckets, magnitudes in ((self.positive, positive), (self.negative, negative)):
+            if magnitudes.size == 0:
+                continue
+            keys = np.ceil(np.log(magnitudes) / self.log_gamma).astype('int64')
+            offset = keys.min()
+            counts = np.bincount(keys - offset)
+            for key in np.flatnonzero(counts):
+                buckets[int(key + offset)] = buckets.get(int(key + offset), 0) + int(counts[key])
+    
+    def merge(self, other: '_QuantileSketch'):
+        """
+        Merges the bucket counts of another sketch into this sketch
+        """
+        
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+        
+        self.zero_count += other.zero_count
+        self.count += other.count
+    
+    def quantile(self, q: float):
+        """
+        Returns the approximate value at quantile q (between 0 and 1), or None if the sketch is empty
+        """
+        
+        if self.count == 0:
+            return None
+        
+        rank = q * (self.count - 1)
+        
+        # Walk buckets in ascending order of value: most negative, zero, then most positive last
+        # Keys are negative for magnitudes below 1, so the sign of a bucket is kept separately from its key
+        ordered = [(-1, key, self.negative[key]) for key in sorted(self.negative, reverse=True)]
+        ordered.append((0, None, self.zero_count))
+        ordered += [(1, key, self.positive[key]) for key in sorted(self.positive)]
+        
+        seen = 0
+        for sign, key, count in ordered:
+            seen += count
+            if seen > rank:
+                if sign == 0:
+                    return 0.0
+                return sign * 2 * self.gamma ** key / (self.gamma + 1)
+        
+        return None
+
+# Values of a block that are not 'nodata'
+def _validValues(data: np.ndarray, nodata) -> np.ndarray:
+    """
+    Returns the values of an array that are not 'nodata' as a flat array, NaN and infinite values of float arrays are never valid whatever the 'nodata' value
+    """
+    
+    if nodata is not None and not np.isnan(nodata):
+        data = data[data != nodata]
+    else:
+        data = data.ravel()
+    
+    if data.dtype.kind == 'f':
+        data = data[np.isfinite(data)]
+    
+    return data
+
+# Compute statistics of an open DEM dataset in a single blockwise pass
+def _computeStatistics(dataset, band: int = 1, num_threads: int = 1, percentiles: tuple = (5, 25, 50, 75, 95)) -> dict:
+    """
+    Computes min, max, mean, standard deviation, valid pixel count, and approximate percentiles of a band in one pass over its internal blocks, excluding 'nodata' pixels
+    
+    Parameters:
+        dataset: Open rasterio dataset
+        band (int): Index of the band to compute statistics for
+        num_threads (int): Number of threads to spread blocks over
+        percentiles (tuple): Percentiles (0-100) to approximate
+    """
+    
+    nodata = dataset.nodata
+    
+    # Reduce a block to a partial result of (count, mean, sum of squared differences, min, max, sketch)
+    def blockPartial(window, data):
+        valid = _validValues(data, nodata)
+        
+        sketch = _QuantileSketch()
+        if valid.size == 0:
+            return (0, 0.0, 0.0, None, None, sketch)
+        
+        valid = valid.astype('float64')
+        mean = valid.mean()
+        sketch.add(valid)
+        return (valid.size, mean, float(((valid - mean) ** 2).sum()), valid.min(), valid.max(), sketch)
+    
+    partials = _mapBlocks(dataset, blockPartial, num_threads=num_threads, indexes=band)
+    
+    # Combine block partials using the parallel variance algorithm of Chan et al.
+    count, mean, m2, minimum, maximum = 0, 0.0, 0.0, None, None
+    sketch = _QuantileSketch()
+    for block_count, block_mean, block_m2, block_min, block_max, block_sketch in partials:
+        if block_count == 0:
+            continue
+        
+        total = count + block_count
+        delta = block_mean - mean
+        mean += delta * block_count / total
+        m2 += block_m2 + delta ** 2 * count * block_count / total
+        count = total
+        
+        minimum = block_min if minimum is None else min(minimum, block_min)
+        maximum = block_max if maximum is None else max(maximum, block_max)
+        sketch.merge(block_sketch)
+    
+    statistics = {'min': None if minimum is None else float(minimum),
+                  'max': None if maximum is None else float(maximum),
+                  'mean': float(mean) if count else None,
+                  'std': float(np.sqrt(m2 / count)) if count else None,
+                  'valid_count': count,
+                  'percentiles': {p: sketch.quantile(p / 100) for p in percentiles}}
+    
+    return statistics
+
+# Compute a histogram of a DEM band one block at a time
+def _blockHistogram(dataset, bins: int = 50, band: int = 1, value_range: tuple = None, num_threads: int = 1) -> tuple:
+    """
+    Counts the values of a band that are not 'nodata' into fixed-width bins, accumulating block by block over the full resolution data so memory use is bounded by block size, and returns the counts and bin edges
+    
+    Parameters:
+        dataset: Open rasterio dataset
+        bins (int): Number of bins
+        band (int): Index of the band to count values of
+        value_range (tuple): (min, max) range of the bins, found from the data if None
+        num_threads (int): Number of threads to spread blocks over
+    """
+    
+    nodata = dataset.nodata
+    dtype = np.dtype(dataset.dtypes[band - 1])
+    
+    # Integer DEMs of up to 16 bits are counted per value in a single pass, then grouped into bins spanning the range of values found
+    if value_range is None and dtype.kind in 'iu' and dtype.itemsize <= 2:
+        info = np.iinfo(dtype)
+        value_counts = np.zeros(info.max - info.min + 1, dtype='int64')
+        counts_lock = threading.Lock()
+        
+        # Add the counts of each block to a single total so memory use does not grow with the number of blocks
+        def blockValueCounts(window, data):
+            block_counts = np.bincount((_validValues(data, nodata).astype('int64') - info.min), minlength=value_counts.size)
+            with counts_lock:
+                np.add(value_counts, block_counts, out=value_counts)
+        
+        _mapBlocks(dataset, blockValueCounts, num_threads=num_threads, indexes=band)
+        present = value_counts > 0
+        values = np.arange(info.min, info.max + 1)[present]
+        value_range = (values.min(), values.max()) if values.size else (0, 1)
+        
+        counts, edges = np.histogram(values, bins=bins, range=value_range, weights=value_counts[present])
+        return counts.astype('int64'), edges
+    
+    # Otherwise find the range of valid values with an extra pass if it is not known
+    if value_range is None:
+        def blockRange(window, data):
+            valid = _validValues(data, nodata)
+            return (valid.min(), valid.max()) if valid.size else None
+        
+        ranges = [block_range for block_range in _mapBlocks(dataset, blockRange, num_threads=num_threads, indexes=band) if block_range is not None]
+        value_range = (min(r[0] for r in ranges), max(r[1] for r in ranges)) if ranges else (0, 1)
+    
+    edges = np.histogram_bin_edges([], bins=bins, range=(float(value_range[0]), float(value_range[1])))
+    
+    # Accumulate the counts of each block into the same bins
+    def blockCounts(window, data):
+        return np.histogram(_validValues(data, nodata), bins=edges)[0]
+    
+    counts = np.sum(_mapBlocks(dataset, blockCounts, num_threads=num_threads, indexes=band), axis=0)
+    
+    return counts, edges
+
+# Tag name of a percentile, so 50 and 50.0 are stored under the same tag
+def _percentileTag(p) -> str:
+    return f'STATISTICS_PERCENTILE_{float(p):g}'
+
+# Read statistics previously stored in a DEM as GDAL statistics tags
+def _readStatistics(dataset, band: int = 1, percentiles: tuple = (5, 25, 50, 75, 95)):
+    """
+    Returns statistics stored as GDAL statistics tags of a band, or None if they are missing or do not include every requested percentile
+    """
+    
+    tags = dataset.tags(band)
+    keys = ['STATISTICS_MINIMUM', 'STATISTICS_MAXIMUM', 'STATISTICS_MEAN', 'STATISTICS_STDDEV', 'STATISTICS_VALID_COUNT']
+    keys += [_percentileTag(p) for p in percentiles]
+    
+    if any(key not in tags for key in keys):
+        return None
+    
+    # Empty DEMs store their undefined statistics as 'None'
+    def parse(value):
+        return None if value == 'None' else float(value)
+    
+    statistics = {'min': parse(tags['STATISTICS_MINIMUM']),
+                  'max': parse(tags['STATISTICS_MAXIMUM']),
+                  'mean': parse(tags['STATISTICS_MEAN']),
+                  'std': parse(tags['STATISTICS_STDDEV']),
+                  'valid_count': int(tags['STATISTICS_VALID_COUNT']),
+                  'percentiles': {p: parse(tags[_percentileTag(p)]) for p in percentiles}}
+    
+    return statistics
+
+# Store statistics in a DEM as GDAL statistics tags
+def _writeStatistics(geotiff_dir: str, statistics: dict, band: int = 1):
+    """
+    Writes statistics into a .geotiff as GDAL statistics tags so they can be read back without touching pixel data, failing silently if the file is not writable
+    """
+    
+    tags = {'STATISTICS_MINIMUM': statistics['min'],
+            'STATISTICS_MAXIMUM': statistics['max'],
+            'STATISTICS_MEAN': statistics['mean'],
+            'STATISTICS_STDDEV': statistics['std'],
+            'STATISTICS_VALID_COUNT': statistics['valid_count']}
     
-    # Read the data from DEM into numpy array
-    data = DEM.read()
+    for p, value in statistics['percentiles'].items():
+        tags[_percentileTag(p)] = value
     
-        ### --- Add information to dictionary --- ###
+    try:
+        with rasterio.open(geotiff_dir, 'r+') as geotiff:
+            tags['STATISTICS_VALID_PERCENT'] = 100 * statistics['valid_count'] / (geotiff.width * geotiff.height)
+            geotiff.update_tags(band, **tags)
+    except (rasterio.errors.RasterioIOError, PermissionError):
+        pass
+
+# Describe DEM map
+def describeDEM(geotiff_dir: str, num_threads: int = 1, percentiles: tuple = (5, 25, 50, 75, 95), refresh: bool = False, max_size: int = None, store: bool = True) -> dict:
+    """
+    Returns a dictionary including important geospatial information about an input .geotiff DEM
+    
+    Parameters:
+        geotiff_dir (str): Input directory of .geotiff DEM file, or an open rasterio dataset such as reprojectDEM(lazy=True) returns
+        num_threads (int): Number of threads to spread blocks over when computing statistics
+        percentiles (tuple): Percentiles (0-100) of elevation values to approximate
+        refresh (bool): If True, recomputes statistics even if they are already stored in the .geotiff
+        max_size (int): If given and no statistics are stored, approximates statistics from the DEM read at a reduced size whose longest side is at most max_size pixels (these are not stored)
+        store (bool): If True, statistics computed from the full DEM are written into the .geotiff as GDAL statistics tags so later calls read them back instantly, if False the .geotiff is left untouched
+    """
+    
+        ### --- Catch a variety of user-input errors --- ###
+        
+    # Check for invalid input parameter datatypes
+    if type(geotiff_dir) != str and not isinstance(geotiff_dir, rasterio.io.DatasetReaderBase):
+        raise TypeError('geotiff_dir is not of type string or rasterio dataset, please input a string or dataset.')
+    elif type(num_threads) != int:
+        raise TypeError('num_threads is not of type integer, please input an integer.')
+    elif type(percentiles) != tuple and type(percentiles) != list:
+        raise TypeError('percentiles is not of type tuple or list, please input a tuple or list.')
+    elif type(refresh) != bool:
+        raise TypeError('refresh is not of type boolean, please input a boolean.')
+    elif max_size is not None and type(max_size) != int:
+        raise TypeError('max_size is not of type integer, please input an integer.')
+    elif type(store) != bool:
+        raise TypeError('store is not of type boolean, please input a boolean.')
+    
+    if type(geotiff_dir) == str:
+        # Check for invalid characters in input directory
+        pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+        if pattern.search(geotiff_dir):
+            raise ValueError('Input directory contains invalid characters.')
+        
+        # Check for invalid input directory or filetype errors
+        if not os.path.exists(geotiff_dir):
+            raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
+        if not geotiff_dir.endswith(('.tif','.tiff')):
+            raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
+    
+    # Check for invalid number of threads or percentiles
+    if num_threads < 1:
+        raise ValueError(f'num_threads "{num_threads}" must be greater than or equal to 1.')
+    if any(p < 0 or p > 100 for p in percentiles):
+        raise ValueError('percentiles must fall between 0 and 100')
+    if max_size is not None and max_size < 1:
+        raise ValueError(f'max_size "{max_size}" must be greater than or equal to 1.')
+    
+        ### --- Open .geotiff file using rasterio --- ###
+        
+    # Open .geotiff file using rasterio, or use the open dataset directly
+    with _openDEM(geotiff_dir) as DEM:
         
-    # Declare dictionary to hold DEM information
-    information = {}
+        # Use statistics stored in the .geotiff by a previous call if available, otherwise compute and store them (open datasets are always computed as they may be virtual)
+        cached = type(geotiff_dir) == str
+        statistics = _readStatistics(DEM, percentiles=tuple(percentiles)) if cached and not refresh else None
+        if statistics is None:
+            # Approximate statistics from a reduced size read if max_size is given, these are not stored as they are not exact
+            with _decimatedDEM(DEM, max_size) as decimated:
+                statistics = _computeStatistics(decimated, num_threads=num_threads, percentiles=tuple(percentiles))
+                if cached and store and decimated is DEM:
+                    _writeStatistics(geotiff_dir, statistics)
     
-    # Get min and max elevation pixel values
-    minimum_elevation = data.min()
-    information['min_elevation'] = minimum_elevation
+            ### --- Add information to dictionary --- ###
+        
+        # Declare dictionary to hold DEM information
+        information = {}
     
-    maximum_elevation = data.max()
-    information['max_elevation'] = maximum_elevation
+        # Get elevation statistics of valid (not 'nodata') pixels
+        information['min_elevation'] = statistics['min']
+        information['max_elevation'] = statistics['max']
+        information['mean_elevation'] = statistics['mean']
+        information['std_elevation'] = statistics['std']
+        information['valid_pixels'] = statistics['valid_count']
+        information['percentiles'] = statistics['percentiles']
     
-    # Get width and height
-    width, height =  DEM.shape
-    information['width'], information['height'] = width,height
+        # Get width and height
+        width, height =  DEM.shape
+        information['width'], information['height'] = width,height
     
-    # Get number of bands
-    bands = DEM.count
-    information['bands'] = bands
+        # Get number of bands
+        bands = DEM.count
+        information['bands'] = bands
     
-    # Get origin
-    origin = []
-    origin = DEM.bounds[3], DEM.bounds[0]
-    information['origin'] = origin
+        # Get origin
+        origin = []
+        origin = DEM.bounds[3], DEM.bounds[0]
+        information['origin'] = origin
     
-    # Get bounds of dem
-    bounds = {}
-    bounds['top'] = DEM.bounds[3]
-    bounds['bottom'] = DEM.bounds[1]
-    bounds['left'] = DEM.bounds[0]
-    bounds['right'] = DEM.bounds[2]
-    information['bounds'] = bounds
+        # Get bounds of dem
+        bounds = {}
+        bounds['top'] = DEM.bounds[3]
+        bounds['bottom'] = DEM.bounds[1]
+        bounds['left'] = DEM.bounds[0]
+        bounds['right'] = DEM.bounds[2]
+        information['bounds'] = bounds
     
-    # Get nodata value
-    nodata = DEM.nodata
-    information['nodata'] = nodata
+        # Get nodata value
+        nodata = DEM.nodata
+        information['nodata'] = nodata
     
-    # Get CRS
-    crs = DEM.crs
-    information['crs'] = crs
+        # Get CRS
+        crs = DEM.crs
+        information['crs'] = crs
     
     return information
 
+# Virtual reprojected dataset returned by reprojectDEM(lazy=True)
+class _LazyWarpedVRT(WarpedVRT):
+    """
+    WarpedVRT that owns its source dataset and closes it when closed
+    """
+    
+    def close(self):
+        super().close()
+        self.src_dataset.close()
+
 # Reprojects an input .GeotTiff file to a target EPSG crs code
-def reprojectDEM(geotiff_dir: str, epsg_num: str, output_dir: str):
+def reprojectDEM(geotiff_dir: str, epsg_num: str, output_dir: str = None, resampling: str = 'nearest', num_threads: int = None, warp_mem_limit: int = 256, lazy: bool = False):
     """
-    Reprojects an input .geotiff file to a specified EPSG crs code and outputs a new reprojected .geotiff
+    Reprojects an input .geotiff file to a specified EPSG crs code and outputs a new reprojected .geotiff, or returns a virtual reprojected dataset if lazy is True
     
     Parameters:
         geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
         epsg_num (str): The specific EPSG code with which to reproject the input .geotiff to; int is also accepted
-        output_dir (str): The path to the output reprojected image file including file extension
+        output_dir (str): The path to the output reprojected image file including file extension, not used if lazy is True
+        resampling (str): Resampling method used to warp the DEM, such as 'nearest', 'bilinear', 'cubic', or 'average'
+        num_threads (int): Number of threads used by the warper (all cores by default)
+        warp_mem_limit (int): Memory limit of the warper in megabytes, the output is written in windows fitting this limit
+        lazy (bool): If True, nothing is written and a WarpedVRT dataset is returned that only warps the windows read from it
     """
 
         ### --- Catch a variety of user-input errors --- ###
@@ -362,14 +1626,26 @@ def reprojectDEM(geotiff_dir: str, epsg_num: str, output_dir: str):
         raise TypeError('geotiff_dir is not of type string, please input a string.')
     elif type(epsg_num) != str and type(epsg_num) != int:
         raise TypeError('epsg_num is not of type string or integer, please input a string or integer.')
-    elif type(output_dir) != str:
+    elif output_dir is not None and type(output_dir) != str:
         raise TypeError('output_dir is not of type string, please input a string.')
+    elif type(lazy) != bool:
+        raise TypeError('lazy is not of type bool, please input a bool.')
+    elif type(resampling) != str:
+        raise TypeError('resampling is not of type string, please input a string.')
+    elif num_threads is not None and type(num_threads) != int:
+        raise TypeError('num_threads is not of type integer, please input an integer.')
+    elif type(warp_mem_limit) != int:
+        raise TypeError('warp_mem_limit is not of type integer, please input an integer.')
    
+    # Check for a missing output directory when writing the reprojected DEM
+    if output_dir is None and not lazy:
+        raise ValueError('output_dir must be specified unless lazy is True.')
+    
     # Check for invalid characters in input and output directories
     pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
     if pattern.search(geotiff_dir):
         raise ValueError('Input directory contains invalid characters.')
-    elif pattern.search(output_dir):
+    elif not lazy and pattern.search(output_dir):
         raise ValueError('Output directory contains invalid characters.')
     
     # Check for invalid input directory or filetype errors
@@ -378,12 +1654,21 @@ def reprojectDEM(geotiff_dir: str, epsg_num: str, output_dir: str):
     if not geotiff_dir.endswith(('.tif','.tiff')):
         raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff DEM file.')
     
+    # Check for invalid warp parameters
+    if resampling not in _RESAMPLING_METHODS:
+        raise ValueError(f'Invalid resampling method "{resampling}", available methods are: {", ".join(_RESAMPLING_METHODS)}')
+    if num_threads is not None and num_threads < 1:
+        raise ValueError(f'num_threads "{num_threads}" must be greater than or equal to 1.')
+    if warp_mem_limit < 1:
+        raise ValueError(f'warp_mem_limit "{warp_mem_limit}" must be greater than or equal to 1.')
+    
     # Check for invalid output directory or filetype errors
-    output_dir_path = os.path.dirname(output_dir)
-    if not os.path.exists(output_dir_path):
-        raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
-    if not output_dir.endswith(('.tif','.tiff')):
-        raise ValueError(f'Invalid output filetype "{output_dir}", make sure output_dir argument ends with ".tif"') 
+    if not lazy:
+        output_dir_path = os.path.dirname(output_dir)
+        if not os.path.exists(output_dir_path):
+            raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
+        if not output_dir.endswith(('.tif','.tiff')):
+            raise ValueError(f'Invalid output filetype "{output_dir}", make sure output_dir argument ends with ".tif"') 
        
         ### --- Open .geotiff image and prepare crs data --- ###
     
@@ -406,39 +1691,99 @@ def reprojectDEM(geotiff_dir: str, epsg_num: str, output_dir: str):
     except:
         raise ValueError(f'Input EPSG code "{epsg_num}" is not a valid EPSG crs code.')
     
-    # Define the output metadata
+    # Define the warp parameters shared by lazy and written outputs
+    warp_options = {'crs': output_crs,
+                    'transform': transform,
+                    'width': width,
+                    'height': height,
+                    'nodata': 0,
+                    'resampling': _RESAMPLING_METHODS[resampling],
+                    'warp_mem_limit': warp_mem_limit,
+                    'warp_extras': {'NUM_THREADS': num_threads or 'ALL_CPUS'}}
+    
+    # Return a virtual dataset that warps windows as they are read, closing the input .geotiff along with it
+    if lazy:
+        return _LazyWarpedVRT(geotiff, **warp_options)
+    
+    # Define the output metadata, tiling the output so windows are written in whole blocks
     output_profile = geotiff.profile.copy()
-    output_profile.update({'crs': output_crs,
+    output_profile.update({'driver': 'GTiff',
+                           'crs': output_crs,
                            'transform': transform,
                            'width': width,
                            'height': height,
-                           'nodata': 0})
+                           'nodata': 0,
+                           'tiled': True,
+                           'blockxsize': 512,
+                           'blockysize': 512,
+                           'num_threads': num_threads or 'ALL_CPUS'})
     
         ### --- Reproject .geotiff and save as new file --- ###
     
-    # Reproject the DEM to the target CRS and save to the output directory
+    # Warp the DEM to the target CRS on demand using all cores
+    vrt = WarpedVRT(geotiff, **warp_options)
+    
+    # Write output in strips of full rows, as many as fit the warp memory limit, so the reprojected DEM is never held in memory at once
+    # Strips are whole rows of output blocks when at least one fits the limit, and as many rows as fit (at least 1) otherwise
+    row_size = width * output_profile['count'] * np.dtype(output_profile['dtype']).itemsize
+    strip_height = warp_mem_limit * 1024 * 1024 // row_size
+    strip_height = strip_height // 512 * 512 if strip_height >= 512 else max(1, strip_height)
+    
     with rasterio.open(output_dir, 'w', **output_profile) as output:
-        for i in range(1, output.count+1):
-            reproject(
-                source=rasterio.band(geotiff, i),
-                destination=rasterio.band(output, i),
-                src_transform=geotiff.transform,
-                src_crs=geotiff_crs,
-                dst_transform=transform,
-                dst_crs=output_crs,
-                resampling=Resampling.nearest)
+        for row in range(0, height, strip_height):
+            window = Window(0, row, width, min(strip_height, height - row))
+            output.write(vrt.read(window=window), window=window)
     
     # Close input and output files
+    vrt.close()
     geotiff.close()
     output.close()
 
+# Load the geometries of a geometry file that may overlap a raster
+def _loadShapes(geometry_dir: str, bounds, crs = None) -> list:
+    """
+    Returns the geometries of a geometry file whose bounding boxes intersect the raster bounds, filtered by the driver's spatial index (such as a shapefile's .qix) where one exists, and reprojected from the crs of the geometry file to crs if given
+    """
+    
+    with fiona.open(geometry_dir) as geometry:
+        if crs is None:
+            return [feature["geometry"] for feature in geometry.filter(bbox=tuple(bounds))]
+        
+        if not geometry.crs:
+            raise ValueError(f'Geometry file "{geometry_dir}" has no crs, please define one (such as a .prj file for shapefiles).')
+        
+        # Filter by the raster bounds in the crs of the geometry file, then reproject the remaining geometries
+        bounds = transform_bounds(crs, geometry.crs, *bounds)
+        return [transform_geom(geometry.crs, crs, feature["geometry"]) for feature in geometry.filter(bbox=bounds)]
+
+# Clip an open dataset according to a list of geometries
+def _clipDataset(geotiff, shapes: list) -> tuple:
+    """
+    Masks an open rasterio dataset with a list of GeoJSON-like geometries, reading only the window covering them, and returns the clipped image (with negative values set to 0), its transform and its window in the dataset
+    """
+    
+    if not shapes:
+        raise ValueError('Input shapes do not overlap raster.')
+    
+    # Rasterize the geometries over the window covering them only
+    outside, output_transform, output_window = raster_geometry_mask(geotiff, shapes, crop=True)
+    
+    # Read the window and set pixels outside the geometries to 0
+    output_image = geotiff.read(window=output_window)
+    output_image[:, outside] = 0
+    
+    # Set values below 0 to 0 in place to avoid overflow errors when using geotifftoImage() on the output
+    np.maximum(output_image, 0, out=output_image)
+    
+    return output_image, output_transform, output_window
+
 # Clips an input .geotiff file according to a geometry file 
 def clipDEM(geotiff_dir: str, geometry_dir: str, output_dir: str, crop: bool = True):
     """
     Clips an input .geotiff file according to a geometry file and outputs a new clipped .geotiff
     
     Parameters:
-        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
+        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension, or an open rasterio dataset such as reprojectDEM(lazy=True) returns
         geometry_dir (str): The path to the geometry file with which to clip .geotiff by
         output_dir (str): The path to the output clipped image file including file extension
         crop (bool): Choose if to crop the image to clipped extent (True), or leave original extent creating an "island" effect (False)
@@ -447,8 +1792,8 @@ def clipDEM(geotiff_dir: str, geometry_dir: str, output_dir: str, crop: bool = T
         ### --- Catch a variety of user-input errors --- ###
     
     # Check for invalid input parameter datatypes
-    if type(geotiff_dir) != str:
-        raise TypeError('geotiff_dir is not of type string, please input a string.')
+    if type(geotiff_dir) != str and not isinstance(geotiff_dir, rasterio.io.DatasetReaderBase):
+        raise TypeError('geotiff_dir is not of type string or rasterio dataset, please input a string or dataset.')
     elif type(geometry_dir) != str:
         raise TypeError('geometry_dir is not of type string, please input a string.')
     elif type(output_dir) != str:
@@ -458,7 +1803,7 @@ def clipDEM(geotiff_dir: str, geometry_dir: str, output_dir: str, crop: bool = T
     
     # Check for invalid characters in input, output, and geometry directories
     pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
-    if pattern.search(geotiff_dir):
+    if type(geotiff_dir) == str and pattern.search(geotiff_dir):
         raise ValueError('Input directory contains invalid characters.')
     elif pattern.search(output_dir):
         raise ValueError('Output directory contains invalid characters.')
@@ -466,10 +1811,11 @@ def clipDEM(geotiff_dir: str, geometry_dir: str, output_dir: str, crop: bool = T
         raise ValueError('Geometry directory contains invalid characters.')
     
     # Check for invalid input directory or filetype errors
-    if not os.path.exists(geotiff_dir):
-        raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
-    if not geotiff_dir.endswith(('.tif','.tiff')):
-        raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
+    if type(geotiff_dir) == str:
+        if not os.path.exists(geotiff_dir):
+            raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
+        if not geotiff_dir.endswith(('.tif','.tiff')):
+            raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
     
     # Check for invalid geometry directory or filetype errors
     if not os.path.exists(geometry_dir):
@@ -486,59 +1832,1591 @@ def clipDEM(geotiff_dir: str, geometry_dir: str, output_dir: str, crop: bool = T
     
         ### --- Open .geotiff and geometry data --- ###
     
-    # Open file containing geometry data
-    geometry = fiona.open(geometry_dir)
-    shapes = [feature["geometry"] for feature in geometry]
-    
-    # Open input .geotiff file
-    geotiff = rasterio.open(geotiff_dir)
-    
-        ### --- Prepare mask parameters --- ###
+    # Open input .geotiff file, or use the open dataset directly so only the windows covering the geometries are read
+    with _openDEM(geotiff_dir) as geotiff:
         
-    # Specify output mask parameters
-    output_image, output_transform = rasterio.mask.mask(geotiff, shapes, crop=crop)
-    
-    # Set values below 0 to 0 to avoid overflow errors when using geotifftoImage() on the output
-    output_image = np.clip(output_image, 0, None)
-    
-    # Get metadata from input and apply it to output
-    output_meta = geotiff.meta
+        # Open file containing geometry data, skipping features outside the raster
+        shapes = _loadShapes(geometry_dir, geotiff.bounds)
+        
+            ### --- Prepare mask parameters --- ###
+        
+        # Specify output mask parameters
+        output_image, output_transform, output_window = _clipDataset(geotiff, shapes)
+        
+        # Get metadata from input and apply it to output
+        output_meta = geotiff.meta
     
         ### --- Clip .geotiff according to mask and save output file --- ###
         
-    # Update metadata of output image with masked data
+    _writeClipped(output_meta, output_image, output_transform, output_window, crop, output_dir)
+
+# Write a clipped image returned by _clipDataset()
+def _writeClipped(output_meta: dict, output_image: np.ndarray, output_transform, output_window, crop: bool, output_dir: str):
+    """
+    Writes a clipped image to a .geotiff, either cropped to its own extent or placed at its window in the extent of the input
+    """
+    
+    # Update metadata of output image with masked data, keeping the input extent if not cropping
+    output_meta = output_meta.copy()
     output_meta.update({"driver": "GTiff",
-                        "height": output_image.shape[1],
-                        "width": output_image.shape[2],
-                        "transform": output_transform,
                         "nodata": 0})
+    if crop:
+        output_meta.update({"height": output_image.shape[1],
+                            "width": output_image.shape[2],
+                            "transform": output_transform})
     
-    # Create output file
+    # Create output file, writing only the clipped window when keeping the input extent as the rest is nodata
     with rasterio.open(output_dir, "w", **output_meta) as output:
-        output.write(output_image)
+        output.write(output_image, window=None if crop else output_window)
+
+# Reprojects and clips an input .geotiff file in a single pass
+def reprojectClipDEM(geotiff_dir: str, epsg_num: str, geometry_dir: str, output_dir: str, crop: bool = True, resampling: str = 'nearest', num_threads: int = None):
+    """
+    Reprojects an input .geotiff file to a specified EPSG crs code and clips it according to a geometry file in a single pass, only warping the extent of the geometries, and outputs a new reprojected and clipped .geotiff
+    
+    Parameters:
+        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
+        epsg_num (str): The specific EPSG code with which to reproject the input .geotiff to; int is also accepted
+        geometry_dir (str): The path to the geometry file with which to clip .geotiff by, in any crs
+        output_dir (str): The path to the output reprojected and clipped image file including file extension
+        crop (bool): Choose if to crop the image to clipped extent (True), or leave the reprojected extent creating an "island" effect (False)
+        resampling (str): Resampling method used to warp the DEM, such as 'nearest', 'bilinear', 'cubic', or 'average'
+        num_threads (int): Number of threads used by the warper (all cores by default)
+    """
+    
+        ### --- Catch a variety of user-input errors --- ###
+    
+    # Check for invalid input parameter datatypes
+    if type(geotiff_dir) != str:
+        raise TypeError('geotiff_dir is not of type string, please input a string.')
+    elif type(epsg_num) != str and type(epsg_num) != int:
+        raise TypeError('epsg_num is not of type string or integer, please input a string or integer.')
+    elif type(geometry_dir) != str:
+        raise TypeError('geometry_dir is not of type string, please input a string.')
+    elif type(output_dir) != str:
+        raise TypeError('output_dir is not of type string, please input a string.')
+    elif type(crop) != bool:
+        raise TypeError('crop is not of type bool, please input an bool.')
+    
+    # Check for invalid characters in output and geometry directories, the input directory and warp parameters are checked by reprojectDEM()
+    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+    if pattern.search(output_dir):
+        raise ValueError('Output directory contains invalid characters.')
+    elif pattern.search(geometry_dir):
+        raise ValueError('Geometry directory contains invalid characters.')
+    
+    # Check for invalid geometry directory or filetype errors
+    if not os.path.exists(geometry_dir):
+        raise FileNotFoundError(f'Geometry file path "{geometry_dir}" does not exist.')
+    if not geometry_dir.endswith(('.shp','.json','.geojson')):
+        raise ValueError(f'Geometry file "{geometry_dir}"" is not a valid geometry file format. Supported formats include ".shp", ",json", ".geojson".')
+    
+    # Check for invalid output directory or filetype errors
+    output_dir_path = os.path.dirname(output_dir)
+    if not os.path.exists(output_dir_path):
+        raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
+    if not output_dir.endswith(('.tif','.tiff')):
+        raise ValueError(f'Invalid output filetype "{output_dir}", make sure output_dir argument ends with ".tif"')
+    
+        ### --- Warp only the extent of the geometries --- ###
+    
+    # Open a virtual reprojected dataset on the same grid reprojectDEM() would write, nothing is warped until it is read
+    with reprojectDEM(geotiff_dir, epsg_num, resampling=resampling, num_threads=num_threads, lazy=True) as geotiff:
+        
+        # Open file containing geometry data, skipping features outside the raster and reprojecting the rest to the target crs
+        shapes = _loadShapes(geometry_dir, geotiff.bounds, crs=geotiff.crs)
+        
+        # Read and mask only the window covering the geometries
+        output_image, output_transform, output_window = _clipDataset(geotiff, shapes)
+        
+        # Get metadata from the reprojected dataset and apply it to output
+        output_meta = geotiff.meta
+    
+        ### --- Save reprojected and clipped output file --- ###
+    
+    _writeClipped(output_meta, output_image, output_transform, output_window, crop, output_dir)
+
+# Dataset opened once by each clipDEMBatch() worker process
+_clip_worker_dataset = None
+
+# Open the source DEM in a clipDEMBatch() worker process
+def _initClipWorker(geotiff_dir: str):
+    """
+    Opens the source DEM once per worker process so consecutive features reuse its block cache
+    """
+    
+    global _clip_worker_dataset
+    _clip_worker_dataset = rasterio.open(geotiff_dir)
+
+# Clip the source DEM by a single feature in a clipDEMBatch() worker process
+def _clipFeature(task: tuple) -> tuple:
+    """
+    Clips the worker's DEM by one geometry and writes it, returning the task index with the output path or the error raised
+    """
+    
+    index, shape, crop, output_dir = task
+    
+    try:
+        output_image, output_transform, output_window = _clipDataset(_clip_worker_dataset, [shape])
+        _writeClipped(_clip_worker_dataset.meta, output_image, output_transform, output_window, crop, output_dir)
+    except Exception as error:
+        return index, None, error
+    
+    return index, output_dir, None
+
+# Clips an input .geotiff file once per feature of a geometry file
+def clipDEMBatch(geotiff_dir: str, geometry_dir: str, output_dir: str, name_field: str = None, crop: bool = True, max_workers: int = None) -> list:
+    """
+    Clips an input .geotiff file by each feature of a geometry file separately across a pool of processes, saving one clipped .geotiff per feature and returning a result for every feature instead of raising on the first failure
+    
+    Parameters:
+        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
+        geometry_dir (str): The path to the geometry file whose features to clip the .geotiff by
+        output_dir (str): The path to the directory in which to save one .tif file per feature
+        name_field (str): Attribute field used to name each output file, features are named by their position in the file if None
+        crop (bool): Choose if to crop each image to its clipped extent (True), or leave original extent creating an "island" effect (False)
+        max_workers (int): Number of processes to clip features with (all cores by default)
+    """
+    
+        ### --- Catch a variety of user-input errors --- ###
+    
+    # Check for invalid input parameter datatypes
+    if type(geotiff_dir) != str:
+        raise TypeError('geotiff_dir is not of type string, please input a string.')
+    elif type(geometry_dir) != str:
+        raise TypeError('geometry_dir is not of type string, please input a string.')
+    elif type(output_dir) != str:
+        raise TypeError('output_dir is not of type string, please input a string.')
+    elif name_field is not None and type(name_field) != str:
+        raise TypeError('name_field is not of type string, please input a string.')
+    elif type(crop) != bool:
+        raise TypeError('crop is not of type bool, please input an bool.')
+    elif max_workers is not None and type(max_workers) != int:
+        raise TypeError('max_workers is not of type integer, please input an integer.')
+    
+    # Check for invalid characters in input, output, and geometry directories
+    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+    if pattern.search(geotiff_dir):
+        raise ValueError('Input directory contains invalid characters.')
+    elif pattern.search(output_dir):
+        raise ValueError('Output directory contains invalid characters.')
+    elif pattern.search(geometry_dir):
+        raise ValueError('Geometry directory contains invalid characters.')
+    
+    # Check for invalid input directory or filetype errors
+    if not os.path.exists(geotiff_dir):
+        raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
+    if not geotiff_dir.endswith(('.tif','.tiff')):
+        raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
+    
+    # Check for invalid geometry directory or filetype errors
+    if not os.path.exists(geometry_dir):
+        raise FileNotFoundError(f'Geometry file path "{geometry_dir}" does not exist.')
+    if not geometry_dir.endswith(('.shp','.json','.geojson')):
+        raise ValueError(f'Geometry file "{geometry_dir}"" is not a valid geometry file format. Supported formats include ".shp", ",json", ".geojson".')
+    
+    # Check for invalid output directory or number of workers
+    if not os.path.isdir(output_dir):
+        raise FileNotFoundError(f'Output directory "{output_dir}" does not exist, please create it.')
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f'max_workers "{max_workers}" must be greater than or equal to 1.')
+    
+        ### --- Prepare one clipping task per feature --- ###
+    
+    # Read the extent and block height of the input .geotiff
+    with rasterio.open(geotiff_dir) as geotiff:
+        left, bottom, right, top = geotiff.bounds
+        strip_height = geotiff.block_shapes[0][0] * abs(geotiff.transform.e)
+    
+    results = []
+    tasks = []
+    output_names = set()
+    
+    with fiona.open(geometry_dir) as geometry:
+        if name_field is not None and name_field not in geometry.schema['properties']:
+            raise ValueError(f'name_field "{name_field}" is not a field of geometry file "{geometry_dir}", available fields are: {", ".join(geometry.schema["properties"])}')
+        
+        for index, feature in enumerate(geometry):
+            # Name output files after the name field, or after their position in the file
+            value = feature['properties'][name_field] if name_field is not None else None
+            name = re.sub(r'[^a-zA-Z0-9_\-]+', '_', str(value)).strip('_') if value is not None else ''
+            if not name or name in output_names:
+                name = f'{name}_{index}' if name else f'feature_{index}'
+            output_names.add(name)
+            
+            feature_dir = os.path.join(output_dir, f'{name}.tif')
+            results.append({'name': name, 'output_dir': None, 'error': None})
+            
+            # Record features without a geometry without clipping them
+            if feature['geometry'] is None:
+                results[index]['error'] = ValueError(f'Feature "{name}" has no geometry.')
+                continue
+            
+            # Record features outside the .geotiff without clipping them
+            feature_left, feature_bottom, feature_right, feature_top = fiona.bounds(feature['geometry'])
+            if feature_left > right or feature_right < left or feature_bottom > top or feature_top < bottom:
+                results[index]['error'] = ValueError('Input shapes do not overlap raster.')
+                continue
+            
+            tasks.append(((top - feature_top) // strip_height, feature_left, index, feature['geometry'], crop, feature_dir))
+    
+    # Order tasks by the block row and left edge of each feature so neighbouring features are clipped by the same worker in turn
+    tasks.sort(key=lambda task: task[:2])
+    tasks = [task[2:] for task in tasks]
+    
+        ### --- Clip features across a process pool --- ###
+    
+    # Each worker opens the input .geotiff once and clips contiguous runs of the ordered tasks
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = max(1, len(tasks) // (max_workers * 4))
+    
+    if tasks:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_initClipWorker, initargs=(geotiff_dir,)) as executor:
+            for index, feature_dir, error in executor.map(_clipFeature, tasks, chunksize=chunk_size):
+                results[index]['output_dir'] = feature_dir
+                results[index]['error'] = error
+    
+    return results
+
+# Scale an elevation array to an 8-bit image
+def _scaleToImage(data: np.ndarray) -> np.ndarray:
+    """
+    Scales an array of elevation values to the 0-255 range of an 8-bit image
+    """
+    
+    scale_factor = 255 / (data.max() - data.min())
+    scaled_data = (data - data.min()) * scale_factor
+    
+    return scaled_data.astype('uint8')
+
+# Convert .GeoTIFF to image file
+def geotiffToImage(geotiff_dir: str, output_dir: str, max_size: int = None):
+    """
+    Converts a GeoTIFF file (such as one gotten from OpenTopography) to a viewable image file.
+
+    Parameters:
+        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
+        output_dir (str): The path to the output image file including file extension
+        max_size (int): If given, the image is read at a reduced size whose longest side is at most max_size pixels, from the overviews of the .geotiff if it has any
+    """
+    
+        ### --- Catch a variety of user-input errors --- ###
+        
+    # Check for invalid input parameter datatypes
+    if type(geotiff_dir) != str:
+        raise TypeError('geotiff_dir is not of type string, please input a string.')
+    elif type(output_dir) != str:
+        raise TypeError('output_dir is not of type string, please input a string.')
+    elif max_size is not None and type(max_size) != int:
+        raise TypeError('max_size is not of type integer, please input an integer.')
+   
+    # Check for invalid characters in input and output directories
+    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+    if pattern.search(geotiff_dir):
+        raise ValueError('Input directory contains invalid characters.')
+    elif pattern.search(output_dir):
+        raise ValueError('Output directory contains invalid characters.')
+    
+    # Check for invalid input directory or filetype errors
+    if not os.path.exists(geotiff_dir):
+        raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
+    if not geotiff_dir.endswith(('.tif','.tiff')):
+        raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
+    
+    # Check for invalid output directory or filetype errors
+    output_dir_path = os.path.dirname(output_dir)
+    if not os.path.exists(output_dir_path):
+        raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
+    if not output_dir.endswith(('.png','.bmp','.tif','.tiff')):
+        raise ValueError(f'Output file "{output_dir}" is not a valid image file.')  
+    
+    # Check for invalid maximum size
+    if max_size is not None and max_size < 1:
+        raise ValueError(f'max_size "{max_size}" must be greater than or equal to 1.')
+
+        ### --- Open .geotiff image using rasterio --- ###
+        
+    # Open .geotiff file using rasterio
+    DEM = rasterio.open(geotiff_dir)
+    
+    # Read the data from DEM into numpy array, at a reduced size read from overviews if max_size is given
+    height, width = _decimatedShape(DEM.height, DEM.width, max_size) if max_size is not None else DEM.shape
+    data = DEM.read(out_shape=(DEM.count, height, width), resampling=Resampling.nearest)
+
+    # Get the metadata from DEM to be used in creating new output file
+    meta = DEM.meta.copy()
+    meta.update(width = width, height = height, transform = DEM.transform * Affine.scale(DEM.width / width, DEM.height / height))
+
+    # Specify the output format for image and edit metadata
+    if output_dir.endswith('.png'):
+        file_type = 'PNG'
+    else:
+        file_type = 'JPEG'
+    
+        ### --- Convert .geotiff to image and save --- ###
+    
+    meta.update(dtype = 'uint8', driver = file_type)
+
+    # Scale the data to 0-255 range to comply with 8-bit output format
+    scaled_data = _scaleToImage(data)
+    
+    # Make GDAL not create an annoying .aux file with output
+    os.environ['GDAL_PAM_ENABLED'] = 'NO'
+    
+    # Create output file
+    output = rasterio.open(output_dir, 'w', **meta)
+    
+    # Write DEM data to the output file
+    output.write(scaled_data)
+
+    # Close input and output files
+    DEM.close()
+    output.close()
+
+# Convert .GeoTIFF to a float heightmap for Blender
+def geotiffToHeightmap(geotiff_dir: str, output_dir: str, max_size: int = None):
+    """
+    Converts a GeoTIFF file to a float32 .npy heightmap with a JSON metadata file of the same name, which renderDEM() loads straight into Blender at full precision instead of decoding an 8-bit image
+
+    Parameters:
+        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
+        output_dir (str): The path to the output .npy heightmap file including file extension, the metadata is saved next to it with a .json extension
+        max_size (int): If given, the heightmap is read at a reduced size whose longest side is at most max_size pixels, from the overviews of the .geotiff if it has any
+    """
+    
+        ### --- Catch a variety of user-input errors --- ###
+        
+    # Check for invalid input parameter datatypes
+    if type(geotiff_dir) != str:
+        raise TypeError('geotiff_dir is not of type string, please input a string.')
+    elif type(output_dir) != str:
+        raise TypeError('output_dir is not of type string, please input a string.')
+    elif max_size is not None and type(max_size) != int:
+        raise TypeError('max_size is not of type integer, please input an integer.')
+   
+    # Check for invalid characters in input and output directories
+    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+    if pattern.search(geotiff_dir):
+        raise ValueError('Input directory contains invalid characters.')
+    elif pattern.search(output_dir):
+        raise ValueError('Output directory contains invalid characters.')
+    
+    # Check for invalid input directory or filetype errors
+    if not os.path.exists(geotiff_dir):
+        raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
+    if not geotiff_dir.endswith(('.tif','.tiff')):
+        raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
+    
+    # Check for invalid output directory or filetype errors
+    output_dir_path = os.path.dirname(output_dir)
+    if not os.path.exists(output_dir_path):
+        raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
+    if not output_dir.endswith('.npy'):
+        raise ValueError(f'Invalid output filetype "{output_dir}", make sure output_dir argument ends with ".npy"')
+    
+    # Check for invalid maximum size
+    if max_size is not None and max_size < 1:
+        raise ValueError(f'max_size "{max_size}" must be greater than or equal to 1.')
+    
+        ### --- Write the elevations to the heightmap --- ###
+    
+    with rasterio.open(geotiff_dir) as DEM:
+        nodata = DEM.nodata
+        
+        # The elevation range is taken over valid pixels only, 'nodata' pixels are kept in the heightmap as they are
+        if max_size is not None:
+            # Read at a reduced size, from overviews if the .geotiff has any
+            height, width = _decimatedShape(DEM.height, DEM.width, max_size)
+            data = DEM.read(1, out_shape=(height, width), resampling=Resampling.nearest)
+            valid = _validValues(data, nodata)
+            if valid.size == 0:
+                raise ValueError(f'Input file "{geotiff_dir}" has no valid (not \'nodata\') pixels.')
+            
+            np.save(output_dir, data.astype('float32'))
+            minimum, maximum = float(valid.min()), float(valid.max())
+        
+        else:
+            # Copy the DEM a block at a time into the memory-mapped heightmap so it is never held in memory as a whole
+            height, width = DEM.height, DEM.width
+            heights = np.lib.format.open_memmap(output_dir, mode='w+', dtype='float32', shape=(height, width))
+            
+            # Range of the valid pixels of a block, None if the block is all 'nodata'
+            def copyBlock(window, data):
+                heights[window.toslices()] = data
+                valid = _validValues(data, nodata)
+                return (valid.min(), valid.max()) if valid.size > 0 else None
+            
+            block_ranges = [block_range for block_range in _mapBlocks(DEM, copyBlock, indexes=1) if block_range is not None]
+            heights.flush()
+            del heights
+            
+            if not block_ranges:
+                os.remove(output_dir)
+                raise ValueError(f'Input file "{geotiff_dir}" has no valid (not \'nodata\') pixels.')
+            minimum = float(min(block_range[0] for block_range in block_ranges))
+            maximum = float(max(block_range[1] for block_range in block_ranges))
+        
+        # Same transform scaling as geotiffToImage() when read at a reduced size
+        transform = DEM.transform * Affine.scale(DEM.width / width, DEM.height / height)
+        
+        metadata = {'width': width,
+                    'height': height,
+                    'dtype': 'float32',
+                    'min': minimum,
+                    'max': maximum,
+                    'nodata': nodata,
+                    'crs': DEM.crs.to_wkt() if DEM.crs is not None else None,
+                    'transform': list(transform)[:6]}
+    
+        ### --- Save metadata next to the heightmap --- ###
+    
+    # renderDEM() scales the heightmap by its min and max like geotiffToImage() scales the DEM to 0-255
+    with open(os.path.splitext(output_dir)[0] + '.json', 'w') as metadata_file:
+        json.dump(metadata, metadata_file, indent=4)
+
+# Simplify DEM image to a lower resolution
+def simplifyDEM(dem_dir: str, output_dir: str, reduction_factor: float = 2, resampling: str = 'cubic', max_size: int = None):
+    """
+    Downsamples DEM image to lower resolution, .geotiff to .geotiff downsampling keeps elevation values, data type, 'nodata' pixels, and georeferencing, reading the DEM block by block rather than at once (every block is still decoded unless the .geotiff has overviews, see buildOverviews())
+
+    Parameters:
+        dem_dir (string): The path to the input DEM image file including file extension
+        output_dir (string): The path to the output image file including file extension
+        reduction_factor (float): Number by which to divide resolution by, must be greater than 1; int is also accepted
+        resampling (string): Resampling method used to downsample a .geotiff to a .geotiff, such as 'cubic', 'bilinear', or 'average'
+        max_size (int): If given, the output is further reduced so its longest side is at most max_size pixels
+    """
+
+        ### --- Catch a variety of user-input errors --- ###
+    
+    # Check for invalid input parameter datatypes
+    if type(dem_dir) != str:
+        raise TypeError('geotiff_dir is not of type string, please input a string.')
+    elif type(output_dir) != str:
+        raise TypeError('output_dir is not of type string, please input a string.')
+    elif type(reduction_factor) != int and type(reduction_factor) != float:
+        raise TypeError('reduction_factor is not of type float or integer, please input a float or integer.')
+    elif type(resampling) != str:
+        raise TypeError('resampling is not of type string, please input a string.')
+    elif max_size is not None and type(max_size) != int:
+        raise TypeError('max_size is not of type integer, please input an integer.')
+    
+    # Check for invalid characters in input and output directories
+    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+    if pattern.search(dem_dir):
+        raise ValueError('Input directory contains invalid characters.')
+    elif pattern.search(output_dir):
+        raise ValueError('Output directory contains invalid characters.')
+    
+    # Check for invalid input directory or filetype errors
+    if not os.path.exists(dem_dir):
+        raise FileNotFoundError(f'Input file path "{dem_dir}" does not exist.')
+    if not dem_dir.endswith(('.png','.bmp','.tif','.tiff')):
+        raise ValueError(f'Input file "{dem_dir}"" is not a valid image file.')
+    
+    # Check for invalid output directory or filetype errors
+    output_dir_path = os.path.dirname(output_dir)
+    if not os.path.exists(output_dir_path):
+        raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
+    if not output_dir.endswith(('.png','.bmp','.tif','.tiff')):
+        raise ValueError(f'Output file "{output_dir}" is not a valid image file.')  
+    
+    # Check for invalid reduction_factor that would result in the same or larger image
+    if reduction_factor <= 1:
+        raise ValueError(f'reduction_factor "{reduction_factor}" must be greater than 1 to reduce resolution.')
+    if resampling not in _RESAMPLING_METHODS:
+        raise ValueError(f'Invalid resampling method "{resampling}", available methods are: {", ".join(_RESAMPLING_METHODS)}')
+    if max_size is not None and max_size < 1:
+        raise ValueError(f'max_size "{max_size}" must be greater than or equal to 1.')
+    
+        ### --- Reduce .geotiff resolution and save --- ###
+    
+    if dem_dir.endswith(('.tif','.tiff')) and output_dir.endswith(('.tif','.tiff')):
+        with rasterio.open(dem_dir) as geotiff:
+            # Calculate the new size of the DEM by dividing it by the reduction_factor
+            new_width = max(1, int(geotiff.width / reduction_factor))
+            new_height = max(1, int(geotiff.height / reduction_factor))
+            if max_size is not None:
+                new_height, new_width = _decimatedShape(new_height, new_width, max_size)
+            
+            # Scale pixel size of transform to the new resolution
+            transform = geotiff.transform * Affine.scale(geotiff.width / new_width, geotiff.height / new_height)
+            output_profile = geotiff.profile.copy()
+            output_profile.update({'driver': 'GTiff',
+                                   'width': new_width,
+                                   'height': new_height,
+                                   'transform': transform})
+            
+            nodata, crs = geotiff.nodata, geotiff.crs
+            
+            # Overviews at least as large as the output, the smallest of which can be read instead of the full resolution DEM
+            levels = [level for level, factor in enumerate(geotiff.overviews(1)) if geotiff.width // factor >= new_width and geotiff.height // factor >= new_height]
+            
+            if nodata is None:
+                # Read the DEM directly at the new size, GDAL resamples block by block and uses overviews of the .geotiff if it has any
+                output = geotiff.read(out_shape=(geotiff.count, new_height, new_width), resampling=_RESAMPLING_METHODS[resampling])
+            
+            elif crs is None:
+                # Without a crs to warp in, 'nodata' pixels are kept apart from elevations by taking the nearest pixel
+                output = geotiff.read(out_shape=(geotiff.count, new_height, new_width), resampling=Resampling.nearest)
+        
+        if nodata is not None and crs is not None:
+            # Warp the DEM onto the reduced grid, the warper leaves 'nodata' pixels out of the resampling and keeps pixels without valid data as 'nodata'
+            source = rasterio.open(dem_dir, overview_level=levels[-1]) if levels else rasterio.open(dem_dir)
+            with source, WarpedVRT(source, crs=crs, transform=transform, width=new_width, height=new_height, src_nodata=nodata, nodata=nodata, resampling=_RESAMPLING_METHODS[resampling]) as vrt:
+                output = vrt.read()
+        
+        # Save the downsampled DEM to a new .geotiff, keeping its data type
+        with rasterio.open(output_dir, 'w', **output_profile) as simplified:
+            simplified.write(output)
+        
+        return
+    
+        ### --- Reduce image resolution and save --- ###
+    
+    # Open image
+    img = Image.open(dem_dir)
+    
+    # Calculate the new size of the image by dividing image by the reduction_fator
+    new_width = max(1, int(img.width / reduction_factor))
+    new_height = max(1, int(img.height / reduction_factor))
+    if max_size is not None:
+        new_height, new_width = _decimatedShape(new_height, new_width, max_size)
+    new_size = (new_width, new_height)
+    
+    # Downsample image while retaining as much quality as possible 
+    simplified_img = img.resize(new_size, resample=Image.BICUBIC)
+
+    # Save the downscaled image to a new file
+    simplified_img.save(output_dir)
+
+# Check the path to the Blender executable
+def _checkBlender(blender_dir: str):
+    """
+    Raises an error if the path to the Blender executable is invalid
+    
+    Parameters:
+        blender_dir (str): Directory of blender.exe found in Blender's installation folder
+    """
+    
+    # Check for invalid parameter datatype
+    if type(blender_dir) != str:
+        raise TypeError('blender_dir is not of type string, please input a string.')
+    
+    # Check for invalid characters in Blender directory
+    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+    if pattern.search(blender_dir):
+        raise ValueError('Blender directory contains invalid characters.')
+    
+    # Check for invalid Blender directory
+    if not os.path.exists(blender_dir):
+        raise FileNotFoundError(f'Path to Blender executable "{blender_dir}" does not exist.')
+
+# Check render parameters
+def _checkRenderInputs(dem_dir: str, output_dir: str, exaggeration: float, shadow_softness: int, sun_angle: int, resolution_scale: int, samples: int):
+    """
+    Raises an error if any of the parameters of a render are invalid
+    
+    Parameters:
+        dem_dir (string): The path to the input DEM image including file extension
+        output_dir (string): The path to the output rendered image file including file extension
+        exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
+        shadow_softness (int): Softness of shadows with values ranging from 0-180
+        sun_angle (int): Vertical angle of sun's rays that lights the map
+        resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
+        samples (int): Amount of samples to be used in the final render determining its quality
+    """
+    
+    # Check for invalid input parameter datatypes
+    if type(dem_dir) != str:
+        raise TypeError('dem_dir is not of type string, please input a string.')
+    elif type(output_dir) != str:
+        raise TypeError('output_dir is not of type string, please input a string.')
+    elif type(exaggeration) != float:
+        raise TypeError('exaggeration is not of type float, please input a float.')
+    elif type(shadow_softness) != int:
+        raise TypeError('shadow_softness is not of type integer, please input an integer.')
+    elif type(sun_angle) != int:
+        raise TypeError('sun_angle is not of type integer, please input an integer.')
+    elif type(resolution_scale) != int:
+        raise TypeError('resolution_scale is not of type integer, please input an integer.')
+    elif type(samples) != int:
+        raise TypeError('samples is not of type integer, please input an integer.')
+
+    # Check for invalid characters in input and output directories
+    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+    if pattern.search(dem_dir) or pattern.search(output_dir):
+        raise ValueError('Input or output directory contains invalid characters.')
+
+    # Check for invalid input directory or filetype errors
+    if not os.path.exists(dem_dir):
+        raise FileNotFoundError(f'Input file path "{dem_dir}" does not exist.')
+    if not dem_dir.endswith(('.png', '.jpg', '.jpeg', '.bmp','.tif','.tiff','.npy')):
+        raise ValueError(f'Input file "{dem_dir}"" is not a valid image or .npy heightmap file.')
+    if dem_dir.endswith('.npy') and not os.path.exists(os.path.splitext(dem_dir)[0] + '.json'):
+        raise FileNotFoundError(f'Heightmap metadata file "{os.path.splitext(dem_dir)[0]}.json" does not exist, create the heightmap with geotiffToHeightmap().')
+    
+    # Check for invalid output directory or filetype errors
+    output_dir_path = os.path.dirname(output_dir)
+    if not os.path.exists(output_dir_path):
+        raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
+    if not output_dir.endswith(('.png', '.jpg', '.jpeg', '.bmp','.tif','.tiff')):
+        raise ValueError(f'Output file "{output_dir}" is not a valid image file.')
+
+# Build the command line running renderDEM() in Blender
+def _blenderCommand(blender_dir: str, dem_dir: str, output_dir: str, exaggeration: float, shadow_softness: int, sun_angle: int, resolution_scale: int, samples: int, threads: int = None, mesh_dir: str = None) -> list:
+    """
+    Returns the arguments starting Blender in the background to run the renderDEM() function of the renderDEM.py module, exiting with code 1 if it raises an error
+    
+    Parameters:
+        blender_dir (str): Directory of blender.exe found in Blender's installation folder
+        dem_dir (string): The path to the input DEM image including file extension
+        output_dir (string): The path to the output rendered image file including file extension
+        exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
+        shadow_softness (int): Softness of shadows with values ranging from 0-180
+        sun_angle (int): Vertical angle of sun's rays that lights the map
+        resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
+        samples (int): Amount of samples to be used in the final render determining its quality
+        threads (int): Number of threads Blender renders with, all cores if None
+        mesh_dir (string): The path to a .npz mesh of the DEM made by terrainMesh() to render instead of displacing a subdivided plane
+    """
+    
+    expression = f'from renderDEM import renderDEM; renderDEM(dem_dir = {dem_dir!r}, output_dir = {output_dir!r}, exaggeration = {exaggeration!r}, shadow_softness = {shadow_softness!r}, sun_angle = {sun_angle!r}, resolution_scale = {resolution_scale!r}, samples = {samples!r}, mesh_dir = {mesh_dir!r})'
+    
+    # Blender applies arguments in order, so the thread count and exit code must come before the expression runs
+    command = [blender_dir, '--background']
+    if threads is not None:
+        command += ['--threads', str(threads)]
+    command += ['--python-exit-code', '1', '--python-expr', expression]
+    
+    return command
+
+# Cycles' status lines, e.g. "Fra:1 Mem:93.20M (Peak 93.21M) | Time:00:01.23 | Mem:2.50M, Peak:2.50M | Scene, ViewLayer | Sample 1/5"
+_STATUS_LINE = re.compile(r'^Fra:\d+ Mem:([\d.]+)([KMG]) \(Peak ([\d.]+)([KMG])\) \| Time:([\d:.]+) \| (.*)$')
+_DEVICE_MEMORY = re.compile(r'^Mem:([\d.]+)([KMG]), Peak:([\d.]+)([KMG])$')
+_SAMPLE = re.compile(r'Sample (\d+)/(\d+)')
+_TOTAL_TIME = re.compile(r'^\s*Time: ([\d:.]+)(?: \(Saving: ([\d:.]+)\))?')
+_MEMORY_UNITS = {'K': 1/1024, 'M': 1, 'G': 1024}
+
+# Convert Blender's [HH:]MM:SS.ff times to seconds
+def _blenderSeconds(text: str) -> float:
+    seconds = 0.0
+    for part in text.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+class RenderStats:
+    """
+    Timings and memory use of a Cycles render, parsed line by line from the output Blender prints while rendering in the background
+
+    Each status line Blender prints is attributed to a phase, and the time until the next status line is added to that phase's duration in phases:
+        'sync': Blender syncing the scene, loading images and render kernels, and updating shaders and lights
+        'tessellation': subdividing and displacing the DEM plane
+        'bvh': building the bounding volume hierarchies rays are traced through
+        'sampling': path tracing the samples of the render
+        'denoising': denoising the finished samples, when enabled
+
+    Attributes:
+        phases (dict): Seconds spent in each phase
+        peak_memory (float): Peak memory Blender reported using, in megabytes
+        device_peak_memory (float): Peak memory of the render device Blender reported, in megabytes
+        samples (int): Number of samples rendered
+        total_samples (int): Number of samples the render was set to
+        samples_per_second (float): Samples rendered per second of sampling
+        total_time (float): Render time Blender reported including saving the image, in seconds
+        saving_time (float): Seconds Blender reported spending saving the image
+        seconds (float): Seconds the whole Blender process ran including starting Blender and building the scene, set by renderDEM()
+        phase (str): Phase of the last status line, None before the first one and once the render has finished
+        elapsed (float): Render time of the last status line, in seconds
+    """
+
+    def __init__(self):
+        self.phases = {'sync': 0.0, 'tessellation': 0.0, 'bvh': 0.0, 'sampling': 0.0, 'denoising': 0.0}
+        self.peak_memory = 0.0
+        self.device_peak_memory = 0.0
+        self.samples = 0
+        self.total_samples = None
+        self.total_time = None
+        self.saving_time = None
+        self.seconds = None
+        self.phase = None
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        phases = ', '.join(f'{phase}={seconds:.2f}s' for phase, seconds in self.phases.items())
+        return f'RenderStats({phases}, peak_memory={self.peak_memory:.1f}MB, samples_per_second={self.samples_per_second:.2f}, total_time={self.total_time})'
+
+    @property
+    def samples_per_second(self) -> float:
+        if self.phases['sampling'] <= 0:
+            return 0.0
+        return self.samples / self.phases['sampling']
+
+    @classmethod
+    def fromLog(cls, log: str):
+        """
+        Returns the RenderStats of the complete output of a Blender render, such as a saved log or the 'stdout' of a RenderScheduler render
+
+        Parameters:
+            log (str): Output Blender printed while rendering
+        """
+
+        stats = cls()
+        for line in log.splitlines():
+            stats.parseLine(line)
+        return stats
+
+    def parseLine(self, line: str) -> bool:
+        """
+        Updates the statistics with a line of Blender's output and returns True if it was a render status line
+
+        Parameters:
+            line (str): Line of output Blender printed while rendering
+        """
+
+        # Blender's final time follows the saved image, ending the render
+        total = _TOTAL_TIME.match(line)
+        if total:
+            self.total_time = _blenderSeconds(total.group(1))
+            if total.group(2) is not None:
+                self.saving_time = _blenderSeconds(total.group(2))
+            self.phase = None
+            return False
+
+        status = _STATUS_LINE.match(line.strip())
+        if not status:
+            return False
+
+        # The time since the previous status line belongs to the phase that line started
+        elapsed = _blenderSeconds(status.group(5))
+        if self.phase is not None:
+            self.phases[self.phase] += max(elapsed - self.elapsed, 0.0)
+        self.elapsed = elapsed
+        self.peak_memory = max(self.peak_memory, float(status.group(3)) * _MEMORY_UNITS[status.group(4)])
+
+        # Skip the remaining time estimate, then the device memory and the scene and view layer names that follow it
+        fields = status.group(6).split(' | ')
+        while fields and fields[0].startswith('Remaining:'):
+            fields.pop(0)
+        device = _DEVICE_MEMORY.match(fields[0]) if fields else None
+        if device:
+            self.device_peak_memory = max(self.device_peak_memory, float(device.group(3)) * _MEMORY_UNITS[device.group(4)])
+            fields = fields[2:]
+        message = ' | '.join(fields)
+
+        # Count samples, which denoising lines may also show
+        sample = _SAMPLE.search(message)
+        if sample:
+            self.samples = max(self.samples, int(sample.group(1)))
+            self.total_samples = int(sample.group(2))
+        
+        # Attribute the line to a phase of the render, the scene and view layer names stay in the message when Blender prints no device memory
+        if message.endswith('Finished'):
+            self.phase = None
+        elif 'Denois' in message:
+            self.phase = 'denoising'
+        elif sample:
+            self.phase = 'sampling'
+        elif 'BVH' in message:
+            self.phase = 'bvh'
+        elif 'Tessellat' in message or 'Displac' in message or 'Subdivi' in message:
+            self.phase = 'tessellation'
+        else:
+            self.phase = 'sync'
+
+        return True
+
+def renderDEM(blender_dir: str, dem_dir: str, output_dir: str, exaggeration: float = 1.0, shadow_softness: int = 90, sun_angle: int = 45, resolution_scale: int = 100, samples: int = 5, mesh_dir: str = None, progress = None) -> RenderStats:
+    """
+    Uses Blender to generate a 3D rendered hillshade map using an input DEM image file
+
+    Parameters:
+        blender_dir (str): Directory of blender.exe found in Blender's installation folder
+        dem_dir (string): The path to the input DEM image including file extension
+        output_dir (string): The path to the output rendered image file including file extension
+        exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
+        shadow_softness (int): Softness of shadows with values ranging from 0-180
+        sun_angle (int): Vertical angle of sun's rays that lights the map
+        resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
+        samples (int): Amount of samples to be used in the final render determining its quality
+        mesh_dir (string): The path to a .npz mesh of the DEM made by terrainMesh() to render instead of displacing a subdivided plane, see terrainMesh()
+        progress: Optional function called as progress(output_dir, phase, samples, total_samples, seconds) on every status line Blender prints, see RenderStats, Blender's output is printed to the console instead when None
+
+    Returns:
+        RenderStats: Phase timings, memory use, and sampling speed of the render parsed from Blender's output
+    """
+
+        ### --- Check for a variety of user-input errors --- ###
+
+    _checkBlender(blender_dir)
+    _checkRenderInputs(dem_dir, output_dir, exaggeration, shadow_softness, sun_angle, resolution_scale, samples)
+    
+    # Check for invalid mesh directory or filetype errors
+    if mesh_dir is not None:
+        pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+        if type(mesh_dir) != str:
+            raise TypeError('mesh_dir is not of type string, please input a string.')
+        if pattern.search(mesh_dir):
+            raise ValueError('Mesh directory contains invalid characters.')
+        if not os.path.exists(mesh_dir):
+            raise FileNotFoundError(f'Mesh file path "{mesh_dir}" does not exist.')
+        if not mesh_dir.endswith('.npz'):
+            raise ValueError(f'Mesh file "{mesh_dir}" is not a valid .npz file.')
+    
+    # Check for an invalid progress function
+    if progress is not None and not callable(progress):
+        raise TypeError('progress is not a function, please input a function.')
+
+        ### --- Use subprocess to start Blender and run renderDEM() function --- ###
+
+    command = _blenderCommand(blender_dir, dem_dir, output_dir, exaggeration, shadow_softness, sun_angle, resolution_scale, samples, mesh_dir=mesh_dir)
+    start = time.perf_counter()
+    
+    # Blender's output and errors are read as one stream while it renders, so neither pipe can fill up and stall Blender
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace')
+    stats = RenderStats()
+    output = deque(maxlen=50)
+    
+    with process:
+        for line in process.stdout:
+            output.append(line)
+            is_status = stats.parseLine(line)
+            
+            # Blender's output is shown as it renders unless a progress function reports it instead
+            if progress is None:
+                print(line, end='', flush=True)
+            elif is_status:
+                progress(output_dir, stats.phase, stats.samples, stats.total_samples, stats.elapsed)
+    
+    # The last lines Blender printed are kept to report a failed render
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, output=''.join(output), stderr=''.join(output))
+    
+    stats.seconds = time.perf_counter() - start
+    
+    return stats
+
+# Errors a render worker can report that are raised again as the same type
+_WORKER_ERRORS = {'TypeError': TypeError, 'ValueError': ValueError, 'FileNotFoundError': FileNotFoundError}
+
+class BlenderWorker:
+    """
+    Keeps a single Blender process running in the background with the render scene prepared, so consecutive renders only update the DEM image, exaggeration, and light instead of starting Blender and rebuilding the scene every time
+    
+    Blender connects back to the worker over a local socket and runs the renderWorker() function of the renderDEM.py module, jobs are rendered one at a time in the order they are sent
+    
+    Parameters:
+        blender_dir (str): Directory of blender.exe found in Blender's installation folder
+        startup_timeout (float): Number of seconds to wait for Blender to start and connect
+    """
+    
+    def __init__(self, blender_dir: str, startup_timeout: float = 120.0):
+        
+            ### --- Catch a variety of user-input errors --- ###
+        
+        _checkBlender(blender_dir)
+        if type(startup_timeout) != int and type(startup_timeout) != float:
+            raise TypeError('startup_timeout is not of type float or integer, please input a float or integer.')
+        
+        self.blender_dir = blender_dir
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.lock = threading.Lock()
+        
+        # Last lines printed by Blender, kept to explain failures
+        self.output = deque(maxlen=50)
+        
+        self._connection = None
+        self._jobs = None
+        self._responses = None
+        
+        self.start()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _outputTail(self) -> str:
+        return '\n'.join(self.output)
+    
+    def _drainOutput(self):
+        # Keep reading Blender's output so it never blocks on a full pipe
+        for line in self.process.stdout:
+            self.output.append(line.rstrip())
+    
+    def start(self):
+        """
+        Starts Blender and waits for it to connect and prepare the scene, does nothing if it is already running
+        """
+        
+        if self.process is not None and self.process.poll() is None:
+            return
+        
+        # Listen on a free local port and pass it to Blender along with a token identifying this worker
+        token = secrets.token_hex(16)
+        server = socket.create_server(('127.0.0.1', 0))
+        port = server.getsockname()[1]
+        
+        self.output.clear()
+        self.process = subprocess.Popen([self.blender_dir, '--background', '--python-expr', f'from renderDEM import renderWorker; renderWorker({port}, {token!r})'],
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace')
+        threading.Thread(target=self._drainOutput, daemon=True).start()
+        
+        # Wait for Blender to connect, failing early if it exits first
+        deadline = time.monotonic() + self.startup_timeout
+        server.settimeout(1.0)
+        try:
+            while True:
+                try:
+                    connection, _ = server.accept()
+                except socket.timeout:
+                    if self.process.poll() is not None:
+                        raise RuntimeError(f'Blender exited with code {self.process.returncode} before connecting to the render worker:\n{self._outputTail()}')
+                    if time.monotonic() > deadline:
+                        self.process.kill()
+                        raise TimeoutError(f'Blender did not connect to the render worker within {self.startup_timeout} seconds:\n{self._outputTail()}')
+                    continue
+                
+                # Ignore connections from anything other than the Blender process that was started
+                connection.settimeout(self.startup_timeout)
+                responses = connection.makefile('r', encoding='utf-8', newline='\n')
+                try:
+                    identity = json.loads(responses.readline() or '{}')
+                except (OSError, ValueError):
+                    identity = {}
+                
+                if type(identity) == dict and identity.get('token') == token:
+                    break
+                responses.close()
+                connection.close()
+        finally:
+            server.close()
+        
+        connection.settimeout(None)
+        self._connection = connection
+        self._jobs = connection.makefile('w', encoding='utf-8', newline='\n')
+        self._responses = responses
+    
+    def _send(self, job: dict) -> dict:
+        # Send a job and wait for its response, one job at a time
+        with self.lock:
+            if self._connection is None:
+                raise RuntimeError('The render worker has been closed, call start() to restart it.')
+            
+            try:
+                self._jobs.write(json.dumps(job) + '\n')
+                self._jobs.flush()
+                line = self._responses.readline()
+            except OSError:
+                line = ''
+            
+            if not line:
+                self._disconnect()
+                if self.process.poll() is None:
+                    self.process.kill()
+                self.process.wait()
+                raise RuntimeError(f'Blender exited with code {self.process.returncode} during a render job:\n{self._outputTail()}')
+        
+        response = json.loads(line)
+        if response['status'] == 'error':
+            raise _WORKER_ERRORS.get(response['error_type'], RuntimeError)(response['message'])
+        
+        return response
+    
+    def _disconnect(self):
+        for stream in (self._jobs, self._responses, self._connection):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        self._connection = None
+    
+    def render(self, dem_dir: str, output_dir: str, exaggeration: float = 1.0, shadow_softness: int = 90, sun_angle: int = 45, resolution_scale: int = 100, samples: int = 5) -> float:
+        """
+        Renders a hillshade map of a DEM image in the running Blender session, see renderDEM(), and returns the number of seconds Blender spent on the render
+        
+        The DEM image is only reloaded if it differs from the previous render or has changed on disk
+        
+        Parameters:
+            dem_dir (string): The path to the input DEM image including file extension
+            output_dir (string): The path to the output rendered image file including file extension
+            exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
+            shadow_softness (int): Softness of shadows with values ranging from 0-180
+            sun_angle (int): Vertical angle of sun's rays that lights the map
+            resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
+            samples (int): Amount of samples to be used in the final render determining its quality
+        """
+        
+        _checkRenderInputs(dem_dir, output_dir, exaggeration, shadow_softness, sun_angle, resolution_scale, samples)
+        
+        # Blender runs from its own working directory, so paths are sent as absolute paths
+        response = self._send({'command': 'render',
+                               'dem_dir': os.path.abspath(dem_dir),
+                               'output_dir': os.path.abspath(output_dir),
+                               'exaggeration': exaggeration,
+                               'shadow_softness': shadow_softness,
+                               'sun_angle': sun_angle,
+                               'resolution_scale': resolution_scale,
+                               'samples': samples})
+        
+        return response['seconds']
+    
+    def close(self):
+        """
+        Asks Blender to shut down and waits for it to exit, killing it if it does not
+        """
+        
+        if self._connection is not None:
+            try:
+                self._send({'command': 'shutdown'})
+            except RuntimeError:
+                pass
+            self._disconnect()
+        
+        if self.process is not None and self.process.poll() is None:
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+# Render a grid of parameter combinations of a DEM in a single Blender session
+def renderSweep(blender_dir: str, dem_dir: str, output_dir: str, exaggeration = 1.0, shadow_softness = 90, sun_angle = 45, resolution_scale: int = 100, samples: int = 5, worker: BlenderWorker = None) -> list:
+    """
+    Renders a hillshade map of a DEM image for every combination of the given exaggerations, shadow softnesses, and sun angles in one Blender session, loading the DEM image and building the scene only once, and returns a list with the parameters, output path, and render time of every frame
+    
+    Parameters:
+        blender_dir (str): Directory of blender.exe found in Blender's installation folder
+        dem_dir (string): The path to the input DEM image including file extension
+        output_dir (string): Template of the path to the output rendered image files, filled with the {exaggeration}, {shadow_softness}, {sun_angle}, and {index} of each frame
+        exaggeration (float or list): Level or list of levels of topographic exaggeration
+        shadow_softness (int or list): Softness or list of softnesses of shadows with values ranging from 0-180
+        sun_angle (int or list): Vertical angle or list of angles of sun's rays that lights the map
+        resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
+        samples (int): Amount of samples to be used in the final render determining its quality
+        worker (BlenderWorker): Running worker to render with instead of starting a new Blender session, it is left running afterwards
+    """
+    
+        ### --- Catch a variety of user-input errors --- ###
+    
+    # Check for invalid input parameter datatypes
+    if type(output_dir) != str:
+        raise TypeError('output_dir is not of type string, please input a string.')
+    elif worker is not None and not isinstance(worker, BlenderWorker):
+        raise TypeError('worker is not of type BlenderWorker, please input a BlenderWorker.')
+    
+    if worker is None:
+        _checkBlender(blender_dir)
+    
+    # Single values are swept as lists of one
+    exaggerations = exaggeration if type(exaggeration) == list else [exaggeration]
+    shadow_softnesses = shadow_softness if type(shadow_softness) == list else [shadow_softness]
+    sun_angles = sun_angle if type(sun_angle) == list else [sun_angle]
+    
+    if not exaggerations or not shadow_softnesses or not sun_angles:
+        raise ValueError('exaggeration, shadow_softness, and sun_angle lists must not be empty.')
+    
+        ### --- Build and check every frame before starting Blender --- ###
+    
+    # Exaggeration changes the displaced geometry, so it varies slowest to keep frames sharing geometry together
+    frames = []
+    for index, (frame_exaggeration, frame_shadow_softness, frame_sun_angle) in enumerate(itertools.product(exaggerations, shadow_softnesses, sun_angles)):
+        parameters = {'exaggeration': frame_exaggeration, 'shadow_softness': frame_shadow_softness, 'sun_angle': frame_sun_angle}
+        
+        try:
+            frame_dir = output_dir.format(index=index, **parameters)
+        except (KeyError, IndexError, ValueError) as error:
+            raise ValueError(f'Invalid output_dir template "{output_dir}", only {{exaggeration}}, {{shadow_softness}}, {{sun_angle}}, and {{index}} can be used: {error}')
+        
+        _checkRenderInputs(dem_dir, frame_dir, frame_exaggeration, frame_shadow_softness, frame_sun_angle, resolution_scale, samples)
+        frames.append({**parameters, 'output_dir': frame_dir})
+    
+    # Check that every frame is written to its own file
+    if len({os.path.abspath(frame['output_dir']) for frame in frames}) < len(frames):
+        raise ValueError(f'output_dir template "{output_dir}" gives several frames the same file name, include the swept parameters or {{index}} in it.')
+    
+        ### --- Render every frame in one Blender session --- ###
+    
+    sweep_worker = worker if worker is not None else BlenderWorker(blender_dir)
+    
+    try:
+        for frame in frames:
+            frame['seconds'] = sweep_worker.render(dem_dir, frame['output_dir'], frame['exaggeration'], frame['shadow_softness'], frame['sun_angle'], resolution_scale, samples)
+    finally:
+        if worker is None:
+            sweep_worker.close()
+    
+    return frames
+
+class RenderScheduler:
+    """
+    Runs several renderDEM() renders at once in separate Blender processes, each limited to an equal share of the machine's cores so they do not compete for them, and returns a future for every submitted render
+    
+    A render's future resolves to a dictionary with its 'output_dir', Blender's 'returncode', 'stdout', and 'stderr', the RenderStats parsed from its output as 'stats', and the 'seconds' it took, or raises subprocess.CalledProcessError if Blender exits with an error and subprocess.TimeoutExpired if the render is killed for running past its timeout, both carrying Blender's stderr
+    
+    Parameters:
+        blender_dir (str): Directory of blender.exe found in Blender's installation folder
+        max_renders (int): Number of Blender processes running at once
+        threads (int): Number of threads each Blender process renders with, defaults to the number of cores divided by max_renders
+        timeout (float): Number of seconds after which a render is killed, None to never kill renders
+    """
+    
+    def __init__(self, blender_dir: str, max_renders: int = 2, threads: int = None, timeout: float = None):
+        
+            ### --- Catch a variety of user-input errors --- ###
+        
+        _checkBlender(blender_dir)
+        
+        # Check for invalid input parameter datatypes
+        if type(max_renders) != int:
+            raise TypeError('max_renders is not of type integer, please input an integer.')
+        elif threads is not None and type(threads) != int:
+            raise TypeError('threads is not of type integer, please input an integer.')
+        elif timeout is not None and type(timeout) != int and type(timeout) != float:
+            raise TypeError('timeout is not of type float or integer, please input a float or integer.')
+        
+        # Check for invalid process, thread, and timeout values
+        if max_renders < 1:
+            raise ValueError(f'max_renders "{max_renders}" must be greater than or equal to 1.')
+        if threads is not None and threads < 1:
+            raise ValueError(f'threads "{threads}" must be greater than or equal to 1.')
+        if timeout is not None and timeout <= 0:
+            raise ValueError(f'timeout "{timeout}" must be greater than 0.')
+        
+        self.blender_dir = blender_dir
+        self.max_renders = max_renders
+        self.threads = threads if threads is not None else max(1, (os.cpu_count() or 1) // max_renders)
+        self.timeout = timeout
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_renders, thread_name_prefix='render')
+        
+        # Blender processes currently running, so shutdown() can kill them
+        self._processes = set()
+        self._lock = threading.Lock()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
+    
+    def _run(self, command: list, output_dir: str, timeout: float) -> dict:
+        # Run a single Blender process, collecting its output
+        start = time.perf_counter()
+        
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors='replace')
+        with self._lock:
+            self._processes.add(process)
+        
+        try:
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                stdout, stderr = process.communicate()
+                raise subprocess.TimeoutExpired(command, timeout, output=stdout, stderr=stderr)
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+        
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, output=stdout, stderr=stderr)
+        
+        return {'output_dir': output_dir,
+                'returncode': process.returncode,
+                'stdout': stdout,
+                'stderr': stderr,
+                'stats': RenderStats.fromLog(stdout),
+                'seconds': time.perf_counter() - start}
+    
+    def submit(self, dem_dir: str, output_dir: str, exaggeration: float = 1.0, shadow_softness: int = 90, sun_angle: int = 45, resolution_scale: int = 100, samples: int = 5, timeout: float = None) -> Future:
+        """
+        Queues a render, see renderDEM(), and returns a future resolving to its result once a Blender process is free and has finished it
+        
+        Parameters:
+            dem_dir (string): The path to the input DEM image including file extension
+            output_dir (string): The path to the output rendered image file including file extension
+            exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
+            shadow_softness (int): Softness of shadows with values ranging from 0-180
+            sun_angle (int): Vertical angle of sun's rays that lights the map
+            resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
+            samples (int): Amount of samples to be used in the final render determining its quality
+            timeout (float): Number of seconds after which this render is killed, defaults to the timeout of the scheduler
+        """
+        
+        # Invalid renders are rejected right away rather than through their future
+        _checkRenderInputs(dem_dir, output_dir, exaggeration, shadow_softness, sun_angle, resolution_scale, samples)
+        if timeout is not None and type(timeout) != int and type(timeout) != float:
+            raise TypeError('timeout is not of type float or integer, please input a float or integer.')
+        
+        # Blender runs from its own working directory, so paths are passed as absolute paths
+        command = _blenderCommand(self.blender_dir, os.path.abspath(dem_dir), os.path.abspath(output_dir), exaggeration, shadow_softness, sun_angle, resolution_scale, samples, threads=self.threads)
+        
+        return self._executor.submit(self._run, command, output_dir, timeout if timeout is not None else self.timeout)
+    
+    def shutdown(self, wait: bool = True, cancel: bool = False):
+        """
+        Stops accepting renders and waits for the submitted ones to finish
+        
+        Parameters:
+            wait (bool): If True, blocks until all running renders have finished
+            cancel (bool): If True, cancels queued renders and kills the running Blender processes
+        """
+        
+        self._executor.shutdown(wait=False, cancel_futures=cancel)
+        
+        if cancel:
+            with self._lock:
+                for process in self._processes:
+                    process.kill()
+        
+        if wait:
+            self._executor.shutdown(wait=True)
+
+# Feathering weights of a rendered tile along one axis
+def _featherWeights(start: int, stop: int, core_start: int, core_stop: int, size: int, overlap: int) -> np.ndarray:
+    """
+    Returns the weights of the pixels start to stop of a tile along one axis, ramping linearly across the overlaps shared with neighbouring tiles so the weights of overlapping tiles sum to 1
+    
+    Parameters:
+        start (int): First pixel of the tile including its overlap
+        stop (int): Pixel after the last pixel of the tile including its overlap
+        core_start (int): First pixel of the tile excluding its overlap
+        core_stop (int): Pixel after the last pixel of the tile excluding its overlap
+        size (int): Size of the DEM along the axis
+        overlap (int): Number of pixels tiles extend past their core into their neighbours
+    """
+    
+    weights = np.ones(stop - start, dtype='float32')
+    if overlap == 0:
+        return weights
+    
+    positions = np.arange(start, stop, dtype='float32') + 0.5
+    
+    # Ramp up across the overlap shared with the previous tile and down across the one shared with the next
+    if core_start > 0:
+        weights = np.minimum(weights, (positions - (core_start - overlap)) / (2 * overlap))
+    if core_stop < size:
+        weights = np.minimum(weights, ((core_stop + overlap) - positions) / (2 * overlap))
+    
+    return np.clip(weights, 0, 1)
+
+# Render a large DEM in overlapping tiles and stitch them together
+def renderDEMTiled(blender_dir: str, geotiff_dir: str, output_dir: str, tile_size: int = 4096, overlap: int = 256, exaggeration: float = 1.0, shadow_softness: int = 90, sun_angle: int = 45, samples: int = 5, max_renders: int = 1, threads: int = None, timeout: float = None):
+    """
+    Renders a hillshade of a .geotiff DEM too large for a single Blender render by rendering overlapping tiles at full resolution, feathering the overlaps together, and saving the stitched hillshade as a .geotiff georeferenced according to the DEM
+    
+    Parameters:
+        blender_dir (str): Directory of blender.exe found in Blender's installation folder
+        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
+        output_dir (str): The path to the output hillshade GeoTIFF file including file extension
+        tile_size (int): Width and height in pixels of the tiles excluding their overlap
+        overlap (int): Number of pixels each tile extends into its neighbours, so shading and shadows near tile edges match, must be less than half of tile_size
+        exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
+        shadow_softness (int): Softness of shadows with values ranging from 0-180
+        sun_angle (int): Vertical angle of sun's rays that lights the map
+        samples (int): Amount of samples to be used in the render of each tile determining its quality
+        max_renders (int): Number of tiles rendered at once in separate Blender processes, see RenderScheduler
+        threads (int): Number of threads each Blender process renders with, defaults to the number of cores divided by max_renders
+        timeout (float): Number of seconds after which the render of a tile is killed, None to never kill renders
+    """
+    
+        ### --- Catch a variety of user-input errors --- ###
+    
+    # Check for invalid input parameter datatypes
+    if type(geotiff_dir) != str:
+        raise TypeError('geotiff_dir is not of type string, please input a string.')
+    elif type(output_dir) != str:
+        raise TypeError('output_dir is not of type string, please input a string.')
+    elif type(tile_size) != int:
+        raise TypeError('tile_size is not of type integer, please input an integer.')
+    elif type(overlap) != int:
+        raise TypeError('overlap is not of type integer, please input an integer.')
+    
+    # Check for invalid characters in input and output directories
+    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+    if pattern.search(geotiff_dir):
+        raise ValueError('Input directory contains invalid characters.')
+    elif pattern.search(output_dir):
+        raise ValueError('Output directory contains invalid characters.')
+    
+    # Check for invalid input directory or filetype errors
+    if not os.path.exists(geotiff_dir):
+        raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
+    if not geotiff_dir.endswith(('.tif','.tiff')):
+        raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
+    
+    # Check for invalid output directory or filetype errors
+    output_dir_path = os.path.dirname(output_dir)
+    if not os.path.exists(output_dir_path):
+        raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
+    if not output_dir.endswith(('.tif','.tiff')):
+        raise ValueError(f'Invalid output filetype "{output_dir}", make sure output_dir argument ends with ".tif"')
+    
+    # Check for invalid tile size and overlap, overlaps of a tile must not reach past its neighbours
+    if tile_size < 64:
+        raise ValueError(f'tile_size "{tile_size}" must be greater than or equal to 64.')
+    if overlap < 0 or 2 * overlap >= tile_size:
+        raise ValueError(f'overlap "{overlap}" must be between 0 and half of tile_size.')
+    
+    # Checks the Blender, render, and scheduler parameters
+    scheduler = RenderScheduler(blender_dir, max_renders=max_renders, threads=threads, timeout=timeout)
+    
+    try:
+        with tempfile.TemporaryDirectory() as tile_dir, rasterio.open(geotiff_dir) as geotiff:
+        
+                ### --- Cut the DEM into overlapping tile images --- ###
+        
+            height, width = geotiff.height, geotiff.width
+        
+            nodata = geotiff.nodata
+        
+            # Range of the valid pixels of a block, None if the block is all 'nodata'
+            def blockRange(window, data):
+                valid = _validValues(data, nodata)
+                return (valid.min(), valid.max()) if valid.size > 0 else None
+        
+            # Tiles are scaled by the range of the whole DEM so that their elevations match, as geotiffToImage() would scale the whole DEM
+            block_ranges = [block_range for block_range in _mapBlocks(geotiff, blockRange, indexes=1) if block_range is not None]
+            if not block_ranges:
+                raise ValueError(f'Input file "{geotiff_dir}" has no valid (not \'nodata\') pixels.')
+            minimum = float(min(block_range[0] for block_range in block_ranges))
+            maximum = float(max(block_range[1] for block_range in block_ranges))
+            scale_factor = 65535 / (maximum - minimum) if maximum > minimum else 0
+        
+            # Tiles are saved as 16-bit images to keep the detail of full resolution DEMs
+            tiles = []
+            with rasterio.Env(GDAL_PAM_ENABLED='NO'):
+                for row_off in range(0, height, tile_size):
+                    for col_off in range(0, width, tile_size):
+                        top, bottom = max(0, row_off - overlap), min(height, row_off + tile_size + overlap)
+                        left, right = max(0, col_off - overlap), min(width, col_off + tile_size + overlap)
+                        window = Window(left, top, right - left, bottom - top)
+                    
+                        data = geotiff.read(1, window=window).astype('float64')
+                    
+                        # 'nodata' pixels are rendered at the lowest elevation of the DEM
+                        invalid = ~np.isfinite(data)
+                        if nodata is not None and not np.isnan(nodata):
+                            invalid |= data == nodata
+                        data[invalid] = minimum
+                    
+                        tile_image = np.clip(((data - minimum) * scale_factor).round(), 0, 65535).astype('uint16')
+                    
+                        dem_dir = os.path.join(tile_dir, f'dem_{row_off}_{col_off}.png')
+                        with rasterio.open(dem_dir, 'w', driver='PNG', dtype='uint16', count=1, width=window.width, height=window.height) as tile:
+                            tile.write(tile_image, 1)
+                    
+                        tiles.append({'row_off': row_off, 'col_off': col_off, 'window': window, 'dem_dir': dem_dir})
+        
+                ### --- Render the tiles --- ###
+        
+            # Tiles are rendered at 100% resolution so their pixels line up with the DEM
+            for tile in tiles:
+                tile['render_dir'] = os.path.join(tile_dir, f'render_{tile["row_off"]}_{tile["col_off"]}.png')
+                tile['future'] = scheduler.submit(tile['dem_dir'], tile['render_dir'], exaggeration, shadow_softness, sun_angle, 100, samples)
+        
+                ### --- Stitch the rendered tiles a row of tiles at a time --- ###
+        
+            output_profile = {'driver': 'GTiff',
+                              'dtype': 'uint8',
+                              'count': 1,
+                              'width': width,
+                              'height': height,
+                              'crs': geotiff.crs,
+                              'transform': geotiff.transform,
+                              'tiled': True,
+                              'blockxsize': 512,
+                              'blockysize': 512,
+                              'compress': 'lzw',
+                              'BIGTIFF': 'IF_SAFER'}
+        
+            # Accumulate weighted tiles over a strip of rows as tall as a tile with its overlaps, so memory does not grow with the height of the DEM
+            values = np.zeros((min(height, tile_size + 2 * overlap), width), dtype='float32')
+            weights = np.zeros_like(values)
+            strip_top = 0
+        
+            with rasterio.open(output_dir, 'w', **output_profile) as output:
+            
+                # Write finished rows of the strip to the output and shift the rows still being accumulated to its top
+                def flushRows(stop):
+                    rows = stop - strip_top
+                    stitched = np.divide(values[:rows], weights[:rows], out=np.zeros((rows, width), dtype='float32'), where=weights[:rows] > 0)
+                    output.write(np.clip(stitched.round(), 0, 255).astype('uint8'), 1, window=Window(0, strip_top, width, rows))
+                
+                    values[:-rows] = values[rows:]
+                    weights[:-rows] = weights[rows:]
+                    values[-rows:] = 0
+                    weights[-rows:] = 0
+            
+                for tile in tiles:
+                    window = tile['window']
+                
+                    # Rows above the first tile of a new row of tiles have received all their tiles
+                    if window.row_off > strip_top:
+                        flushRows(window.row_off)
+                        strip_top = window.row_off
+                
+                    tile['future'].result()
+                    with Image.open(tile['render_dir']) as render:
+                        rendered = np.asarray(render.convert('L'), dtype='float32')
+                
+                    if rendered.shape != (window.height, window.width):
+                        raise RuntimeError(f'Rendered tile "{tile["render_dir"]}" is {rendered.shape[1]}x{rendered.shape[0]} pixels instead of {window.width}x{window.height}.')
+                
+                    # Feather the tile across the overlaps it shares with its neighbours
+                    row_weights = _featherWeights(window.row_off, window.row_off + window.height, tile['row_off'], min(height, tile['row_off'] + tile_size), height, overlap)
+                    col_weights = _featherWeights(window.col_off, window.col_off + window.width, tile['col_off'], min(width, tile['col_off'] + tile_size), width, overlap)
+                    tile_weights = row_weights[:, np.newaxis] * col_weights[np.newaxis, :]
+                
+                    strip_rows = slice(window.row_off - strip_top, window.row_off - strip_top + window.height)
+                    strip_cols = slice(window.col_off, window.col_off + window.width)
+                    values[strip_rows, strip_cols] += rendered * tile_weights
+                    weights[strip_rows, strip_cols] += tile_weights
+                
+                    # Free disk space of tiles already stitched
+                    os.remove(tile['render_dir'])
+                    os.remove(tile['dem_dir'])
+            
+                flushRows(height)
+    
+    except BaseException:
+        scheduler.shutdown(cancel=True)
+        raise
+    
+    scheduler.shutdown()
+
+# Errors of the hierarchy of right triangles covering a DEM grid
+def _meshErrors(elevation: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    Returns, for every point of a (2^k + 1) x (2^k + 1) elevation grid, a bound on the vertical error of the right triangulated irregular network (RTIN) triangles that are split at that point, computed a level of the hierarchy at a time from the smallest triangles up
+    
+    A triangle's children differ from it by at most the error at the midpoint it is split at, so the error at that midpoint plus the largest bound of its children bounds the error of every pixel of the triangle
+    
+    Triangles crossing the edge of the DEM (the grid past width and height is padding) get an infinite error so they are always split down to the edge
+    
+    Parameters:
+        elevation (np.ndarray): Square grid of elevations of 2^k + 1 rows and columns
+        width (int): Number of columns of the grid holding the DEM
+        height (int): Number of rows of the grid holding the DEM
+    """
+    
+    size = elevation.shape[0] - 1
+    errors = np.zeros(elevation.shape, dtype='float32')
+    
+    # Last column and row of the DEM
+    max_x, max_y = width - 1, height - 1
+    
+    # Whether triangles split at the given points, spanning half_size pixels around them, cross the edge of the DEM
+    def crossesEdge(rows, cols, half_size):
+        min_x, max_x_span = np.maximum(cols - half_size, 0), np.minimum(cols + half_size, size)
+        min_y, max_y_span = np.maximum(rows - half_size, 0), np.minimum(rows + half_size, size)
+        overlaps = (min_y[:, np.newaxis] < max_y) & (min_x[np.newaxis, :] < max_x)
+        inside = (max_y_span[:, np.newaxis] <= max_y) & (max_x_span[np.newaxis, :] <= max_x)
+        return overlaps & ~inside
+    
+    step = 2
+    while step <= size:
+        half = step // 2
+        
+        # Triangles with a horizontal or vertical hypotenuse of length step are split at its midpoint, their children are split at the centers of the squares of size step/2 beside it
+        for horizontal in (True, False):
+            if horizontal:
+                rows, cols = np.arange(0, size + 1, step), np.arange(half, size, step)
+                ends = elevation[np.ix_(rows, cols - half)] + elevation[np.ix_(rows, cols + half)]
+            else:
+                rows, cols = np.arange(half, size, step), np.arange(0, size + 1, step)
+                ends = elevation[np.ix_(rows - half, cols)] + elevation[np.ix_(rows + half, cols)]
+            
+            level_errors = np.abs(ends / 2 - elevation[np.ix_(rows, cols)])
+            
+            child_errors_max = np.zeros_like(level_errors)
+            if step >= 4:
+                quarter = step // 4
+                for row_offset in (-quarter, quarter):
+                    for col_offset in (-quarter, quarter):
+                        child_rows, child_cols = rows + row_offset, cols + col_offset
+                        valid = ((child_rows >= 0) & (child_rows <= size))[:, np.newaxis] & ((child_cols >= 0) & (child_cols <= size))[np.newaxis, :]
+                        child_errors = errors[np.ix_(np.clip(child_rows, 0, size), np.clip(child_cols, 0, size))]
+                        child_errors_max = np.maximum(child_errors_max, np.where(valid, child_errors, 0))
+            
+            errors[np.ix_(rows, cols)] = np.where(crossesEdge(rows, cols, half), np.inf, level_errors + child_errors_max)
+        
+        # Halves of squares of size step are split at the square's center, along diagonals alternating in a checkerboard, their children are split at the midpoints of the square's sides
+        squares = size // step
+        main_diagonal = (np.add.outer(np.arange(squares), np.arange(squares)) % 2) == 0
+        interpolated = np.where(main_diagonal,
+                                (elevation[0:size:step, 0:size:step] + elevation[step::step, step::step]) / 2,
+                                (elevation[0:size:step, step::step] + elevation[step::step, 0:size:step]) / 2)
+        
+        level_errors = np.abs(interpolated - elevation[half::step, half::step])
+        vertical_sides = errors[half::step, 0::step]
+        horizontal_sides = errors[0::step, half::step]
+        level_errors = level_errors + np.maximum.reduce([vertical_sides[:, :-1], vertical_sides[:, 1:], horizontal_sides[:-1], horizontal_sides[1:]])
+        
+        centers = np.arange(half, size, step)
+        errors[half::step, half::step] = np.where(crossesEdge(centers, centers, half), np.inf, level_errors)
+        
+        step *= 2
+    
+    return errors
+
+# Extract the triangles of an RTIN mesh
+def _meshTriangles(errors: np.ndarray, max_error: float) -> np.ndarray:
+    """
+    Returns the triangles, as rows of the column and row of their 3 corners, of the coarsest RTIN mesh of a grid whose error is at most max_error, splitting all triangles of the hierarchy a level at a time
+    
+    Parameters:
+        errors (np.ndarray): Errors of the grid computed by _meshErrors()
+        max_error (float): Maximum vertical error of the mesh
+    """
+    
+    size = errors.shape[0] - 1
+    
+    # Columns and rows of the hypotenuse ends a and b and the right angle corner c of the two halves of the grid
+    triangles = np.array([[0, 0, size, size, size, 0],
+                          [size, size, 0, 0, 0, size]])
+    
+    finished = []
+    while len(triangles):
+        ax, ay, bx, by, cx, cy = triangles.T
+        mx, my = (ax + bx) // 2, (ay + by) // 2
+        
+        # Triangles with legs longer than a pixel are split at the midpoint of their hypotenuse while their error is too large
+        split = (np.abs(ax - cx) + np.abs(ay - cy) > 1) & (errors[my, mx] > max_error)
+        finished.append(triangles[~split])
+        
+        ax, ay, bx, by, cx, cy, mx, my = (coordinate[split] for coordinate in (ax, ay, bx, by, cx, cy, mx, my))
+        triangles = np.concatenate([np.stack([cx, cy, ax, ay, mx, my], axis=1),
+                                    np.stack([bx, by, cx, cy, mx, my], axis=1)])
     
-    # Close input and output files
-    geotiff.close()
-    output.close()
+    return np.concatenate(finished)
 
-# Convert .GeoTIFF to image file
-def geotiffToImage(geotiff_dir: str, output_dir: str):
+# Build an adaptive triangle mesh of a DEM
+def terrainMesh(geotiff_dir: str, output_dir: str, max_error: float = 1.0) -> dict:
     """
-    Converts a GeoTIFF file (such as one gotten from OpenTopography) to a viewable image file.
-
+    Builds a triangle mesh of a .geotiff DEM that is dense only where the terrain is rough, so that no pixel of the DEM is more than max_error above or below the mesh, and saves it as a .npz, .ply, or .obj file, returning the number of vertices and triangles of the mesh along with the number of triangles of a full resolution mesh
+    
+    The mesh is a right triangulated irregular network (RTIN) whose vertices are pixels of the DEM, given in the coordinates of the DEM's CRS with elevations as heights, .npz files also hold the pixel of every vertex used by renderDEM() to render the mesh instead of displacing a subdivided plane
+    
     Parameters:
         geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
-        output_dir (str): The path to the output image file including file extension
+        output_dir (str): The path to the output mesh file including file extension, one of .npz, .ply, or .obj
+        max_error (float): Maximum vertical error of the mesh in the units of the DEM's elevations
     """
     
         ### --- Catch a variety of user-input errors --- ###
-        
+    
     # Check for invalid input parameter datatypes
     if type(geotiff_dir) != str:
         raise TypeError('geotiff_dir is not of type string, please input a string.')
     elif type(output_dir) != str:
         raise TypeError('output_dir is not of type string, please input a string.')
-   
+    elif type(max_error) != int and type(max_error) != float:
+        raise TypeError('max_error is not of type float or integer, please input a float or integer.')
+    
     # Check for invalid characters in input and output directories
     pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
     if pattern.search(geotiff_dir):
@@ -556,168 +3434,290 @@ def geotiffToImage(geotiff_dir: str, output_dir: str):
     output_dir_path = os.path.dirname(output_dir)
     if not os.path.exists(output_dir_path):
         raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
-    if not output_dir.endswith(('.png','.bmp','.tif','.tiff')):
-        raise ValueError(f'Output file "{output_dir}" is not a valid image file.')  
-
-        ### --- Open .geotiff image using rasterio --- ###
+    if not output_dir.endswith(('.npz', '.ply', '.obj')):
+        raise ValueError(f'Invalid output filetype "{output_dir}", make sure output_dir argument ends with ".npz", ".ply", or ".obj"')
+    
+    # Check for invalid maximum error
+    if max_error < 0:
+        raise ValueError(f'max_error "{max_error}" must be greater than or equal to 0.')
+    
+        ### --- Compute the errors of the triangle hierarchy --- ###
+    
+    with rasterio.open(geotiff_dir) as geotiff:
+        data = geotiff.read(1).astype('float64')
+        transform = geotiff.transform
+        nodata = geotiff.nodata
+    
+    height, width = data.shape
+    if height < 2 or width < 2:
+        raise ValueError(f'Input file "{geotiff_dir}" must be at least 2 pixels wide and tall to build a mesh.')
+    
+    # 'nodata' pixels, and NaN or infinite values, are placed at the lowest elevation of the DEM so they neither enter its elevation range nor stretch the mesh
+    invalid = ~np.isfinite(data)
+    if nodata is not None and not np.isnan(nodata):
+        invalid |= data == nodata
+    if invalid.all():
+        raise ValueError(f'Input file "{geotiff_dir}" has no valid (not \'nodata\') pixels.')
+    data[invalid] = data[~invalid].min()
+    
+    # The hierarchy needs a square grid of 2^k + 1 points, the DEM is padded by repeating its last row and column
+    size = 2 ** int(np.ceil(np.log2(max(width, height) - 1)))
+    elevation = np.pad(data.astype('float32'), ((0, size + 1 - height), (0, size + 1 - width)), mode='edge')
+    
+    errors = _meshErrors(elevation, width, height)
+    
+        ### --- Extract the mesh --- ###
+    
+    triangles = _meshTriangles(errors, max_error)
+    
+    # Triangles over the padding are dropped, the triangles crossing the edge were split down to it
+    triangles = triangles[(triangles[:, 0::2].max(axis=1) < width) & (triangles[:, 1::2].max(axis=1) < height)]
+    
+    # Wind every triangle counter-clockwise seen from above, rows run southwards
+    cols, rows = triangles[:, 0::2], triangles[:, 1::2]
+    clockwise = ((cols[:, 1] - cols[:, 0]) * (rows[:, 2] - rows[:, 0]) - (cols[:, 2] - cols[:, 0]) * (rows[:, 1] - rows[:, 0])) > 0
+    cols[clockwise] = cols[clockwise][:, ::-1]
+    rows[clockwise] = rows[clockwise][:, ::-1]
+    
+    # Number vertices once per pixel they are placed on
+    pixel_ids, faces = np.unique(rows * width + cols, return_inverse=True)
+    faces = faces.reshape(-1, 3).astype('int32')
+    vertex_rows, vertex_cols = np.divmod(pixel_ids, width)
+    
+    # Place vertices at the centers of their pixels in the coordinates of the DEM's CRS
+    x = transform.c + transform.a * (vertex_cols + 0.5) + transform.b * (vertex_rows + 0.5)
+    y = transform.f + transform.d * (vertex_cols + 0.5) + transform.e * (vertex_rows + 0.5)
+    vertices = np.column_stack([x, y, data[vertex_rows, vertex_cols]])
+    
+        ### --- Save mesh --- ###
+    
+    if output_dir.endswith('.npz'):
+        # Pixels of the vertices and the elevation range of the DEM let Blender lay the mesh out like the DEM image
+        np.savez(output_dir,
+                 vertices=vertices,
+                 faces=faces,
+                 pixels=np.column_stack([vertex_cols, vertex_rows]).astype('int32'),
+                 shape=np.array([height, width]),
+                 elevation_range=np.array([data.min(), data.max()]))
+    
+    elif output_dir.endswith('.ply'):
+        header = (f'ply\nformat binary_little_endian 1.0\nelement vertex {len(vertices)}\nproperty double x\nproperty double y\nproperty double z\n'
+                  f'element face {len(faces)}\nproperty list uchar int vertex_indices\nend_header\n')
         
-    # Open .geotiff file using rasterio
-    DEM = rasterio.open(geotiff_dir)
+        face_records = np.empty(len(faces), dtype=[('count', 'u1'), ('indices', '<i4', (3,))])
+        face_records['count'] = 3
+        face_records['indices'] = faces
+        
+        with open(output_dir, 'wb') as output:
+            output.write(header.encode('ascii'))
+            output.write(vertices.astype('<f8').tobytes())
+            output.write(face_records.tobytes())
+    
+    else:
+        with open(output_dir, 'w') as output:
+            np.savetxt(output, vertices, fmt='v %.10g %.10g %.10g')
+            np.savetxt(output, faces + 1, fmt='f %d %d %d')
     
-    # Read the data from DEM into numpy array
-    data = DEM.read()
+    return {'vertices': len(vertices), 'triangles': len(faces), 'full_triangles': 2 * (width - 1) * (height - 1)}
 
-    # Get the metadata from DEM to be used in creating new output file
-    meta = DEM.meta.copy()
+# Multidirectional hillshade azimuths of Mark (1992), as used by GDAL
+_MULTIDIRECTIONAL_AZIMUTHS = (225, 270, 315, 360)
 
-    # Specify the output format for image and edit metadata
-    if output_dir.endswith('.png'):
-        file_type = 'PNG'
-    else:
-        file_type = 'JPEG'
+# Approximate length in meters of a degree along the equator and meridians
+_METERS_PER_DEGREE = 111320.0
+
+# Shade a tile of elevations with a one pixel halo
+def _shadeTile(elevation: np.ndarray, pixel_width: np.ndarray, pixel_height: float, sun_azimuth: float, sun_angle: float, exaggeration: float, multidirectional: bool) -> np.ndarray:
+    """
+    Returns the 8-bit hillshade (1-255, 0 for 'nodata') of the inner pixels of a float elevation tile padded by a one pixel halo, where NaN marks 'nodata'
     
-        ### --- Convert .geotiff to image and save --- ###
+    Parameters:
+        elevation (np.ndarray): Elevation tile including its halo, 'nodata' pixels set to NaN
+        pixel_width (np.ndarray): Width of the pixels of each inner row in the same units as the elevations
+        pixel_height (float): Height of the pixels in the same units as the elevations
+        sun_azimuth (float): Direction the sun shines from, in degrees clockwise from north
+        sun_angle (float): Angle of the sun from vertical in degrees, as renderDEM() uses it
+        exaggeration (float): Vertical exaggeration of the elevations
+        multidirectional (bool): If True, combines the shading of sun azimuths 225, 270, 315, and 360 weighted by the aspect of each pixel
+    """
     
-    meta.update(dtype = 'uint8', driver = file_type)
-
-    # Scale the data to 0-255 range to comply with 8-bit output format
-    scale_factor = 255 / (data.max() - data.min())
-    scaled_data = (data - data.min()) * scale_factor
+    center = elevation[1:-1, 1:-1]
     
-    # Make GDAL not create an annoying .aux file with output
-    os.environ['GDAL_PAM_ENABLED'] = 'NO'
+    # Take the 8 neighbours of every inner pixel, replacing 'nodata' neighbours with the pixel itself so edges of data are still shaded
+    def neighbour(row, col):
+        values = elevation[row:row + center.shape[0], col:col + center.shape[1]]
+        return np.where(np.isnan(values), center, values)
     
-    # Create output file
-    output = rasterio.open(output_dir, 'w', **meta)
+    a, b, c = neighbour(0, 0), neighbour(0, 1), neighbour(0, 2)
+    d, f = neighbour(1, 0), neighbour(1, 2)
+    g, h, i = neighbour(2, 0), neighbour(2, 1), neighbour(2, 2)
     
-    # Write DEM data to the output file
-    output.write(scaled_data.astype('uint8'))
-
-    # Close input and output files
-    DEM.close()
-    output.close()
+    # Slope towards east and north using Horn's method
+    dz_dx = ((c + 2 * f + i) - (a + 2 * d + g)) / (8 * pixel_width[:, np.newaxis]) * exaggeration
+    dz_dy = ((a + 2 * b + c) - (g + 2 * h + i)) / (8 * pixel_height) * exaggeration
+    norm = np.sqrt(1 + dz_dx ** 2 + dz_dy ** 2)
+    
+    altitude = np.radians(90 - sun_angle)
+    
+    # Cosine of the angle between the surface normal and the direction of the sun
+    def illumination(azimuth):
+        azimuth = np.radians(azimuth)
+        return (np.sin(altitude) - (dz_dx * np.sin(azimuth) + dz_dy * np.cos(azimuth)) * np.cos(altitude)) / norm
+    
+    if multidirectional:
+        # Weight each azimuth by the squared sine of its angle to the downslope direction, the weights of the 4 azimuths sum to 2
+        aspect = np.arctan2(-dz_dx, -dz_dy)
+        shade = sum((np.sin(aspect - np.radians(azimuth)) ** 2) * illumination(azimuth) for azimuth in _MULTIDIRECTIONAL_AZIMUTHS) / 2
+    else:
+        shade = illumination(sun_azimuth)
+    
+    # Scale to 1-255 keeping 0 for 'nodata' pixels
+    shade = 1 + 254 * np.clip(shade, 0, 1)
+    shade[np.isnan(center)] = 0
+    
+    return shade.astype('uint8')
 
-# Simplify DEM image to a lower resolution
-def simplifyDEM(dem_dir: str, output_dir: str, reduction_factor: int = 2):
+# Generate a hillshade of a .geotiff DEM without Blender
+def hillshadeDEM(geotiff_dir: str, output_dir: str, sun_azimuth: float = 315, sun_angle: float = 45, exaggeration: float = 1.0, multidirectional: bool = False, num_threads: int = 1, tile_size: int = 1024):
     """
-    Downsamples DEM image to lower resolution
-
+    Computes a hillshade of a .geotiff DEM with NumPy from its real elevations and pixel size, and outputs a georeferenced 8-bit .geotiff, as a fast alternative to renderDEM() that does not need Blender
+    
     Parameters:
-        dem_dir (string): The path to the input DEM image file including file extension
-        output_dir (string): The path to the output image file including file extension
-        reduction_factor (int): Number by which to divide resolution by
+        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
+        output_dir (str): The path to the output hillshade GeoTIFF file including file extension
+        sun_azimuth (float): Direction the sun shines from in degrees clockwise from north, 315 (north-west) matches renderDEM()
+        sun_angle (float): Angle of the sun's rays from vertical in degrees, as in renderDEM()
+        exaggeration (float): Vertical exaggeration applied to the elevations, 1.0 shades the true relief
+        multidirectional (bool): If True, combines shading from the west, north-west, north, and south-west to bring out relief facing away from a single sun
+        num_threads (int): Number of threads to spread tiles over
+        tile_size (int): Width and height in pixels of the tiles the DEM is processed in
     """
-
+    
         ### --- Catch a variety of user-input errors --- ###
     
     # Check for invalid input parameter datatypes
-    if type(dem_dir) != str:
+    if type(geotiff_dir) != str:
         raise TypeError('geotiff_dir is not of type string, please input a string.')
     elif type(output_dir) != str:
         raise TypeError('output_dir is not of type string, please input a string.')
-    elif type(reduction_factor) != int:
-        raise TypeError('reduction_factor is not of type integer, please input an integer.')
+    elif type(sun_azimuth) != int and type(sun_azimuth) != float:
+        raise TypeError('sun_azimuth is not of type float or integer, please input a float or integer.')
+    elif type(sun_angle) != int and type(sun_angle) != float:
+        raise TypeError('sun_angle is not of type float or integer, please input a float or integer.')
+    elif type(exaggeration) != int and type(exaggeration) != float:
+        raise TypeError('exaggeration is not of type float or integer, please input a float or integer.')
+    elif type(multidirectional) != bool:
+        raise TypeError('multidirectional is not of type boolean, please input a boolean.')
+    elif type(num_threads) != int:
+        raise TypeError('num_threads is not of type integer, please input an integer.')
+    elif type(tile_size) != int:
+        raise TypeError('tile_size is not of type integer, please input an integer.')
     
     # Check for invalid characters in input and output directories
     pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
-    if pattern.search(dem_dir):
+    if pattern.search(geotiff_dir):
         raise ValueError('Input directory contains invalid characters.')
     elif pattern.search(output_dir):
         raise ValueError('Output directory contains invalid characters.')
     
     # Check for invalid input directory or filetype errors
-    if not os.path.exists(dem_dir):
-        raise FileNotFoundError(f'Input file path "{dem_dir}" does not exist.')
-    if not dem_dir.endswith(('.png','.bmp','.tif','.tiff')):
-        raise ValueError(f'Input file "{dem_dir}"" is not a valid image file.')
+    if not os.path.exists(geotiff_dir):
+        raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
+    if not geotiff_dir.endswith(('.tif','.tiff')):
+        raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
     
     # Check for invalid output directory or filetype errors
     output_dir_path = os.path.dirname(output_dir)
     if not os.path.exists(output_dir_path):
         raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
-    if not output_dir.endswith(('.png','.bmp','.tif','.tiff')):
-        raise ValueError(f'Output file "{output_dir}" is not a valid image file.')  
+    if not output_dir.endswith(('.tif','.tiff')):
+        raise ValueError(f'Invalid output filetype "{output_dir}", make sure output_dir argument ends with ".tif"')
     
-    # Check for invalid reduction_factor that would result in the same or larger image
-    if reduction_factor < 2:
-        raise ValueError(f'reduction_factor "{reduction_factor}" must be greater than or equal to 2 to reduce resolution.')
+    # Check for invalid sun, thread, and tile parameters
+    if sun_angle < 0 or sun_angle >= 90:
+        raise ValueError(f'sun_angle "{sun_angle}" must be between 0 (overhead) and 90 (horizon).')
+    if num_threads < 1:
+        raise ValueError(f'num_threads "{num_threads}" must be greater than or equal to 1.')
+    if tile_size < 16:
+        raise ValueError(f'tile_size "{tile_size}" must be greater than or equal to 16.')
     
-        ### --- Reduce image resolution and save --- ###
+        ### --- Prepare input and output .geotiff files --- ###
     
-    # Open image
-    img = Image.open(dem_dir)
+    geotiff = rasterio.open(geotiff_dir)
+    nodata = geotiff.nodata
     
-    # Calculate the new size of the image by dividing image by the reduction_fator
-    new_width = img.width // reduction_factor
-    new_height = img.height // reduction_factor
-    new_size = (new_width, new_height)
+    # Pixel size in the units of the elevations, degrees of geographic DEMs are converted to meters with the width of each row shrinking towards the poles
+    pixel_width, pixel_height = abs(geotiff.transform.a), abs(geotiff.transform.e)
+    if geotiff.crs is not None and geotiff.crs.is_geographic:
+        pixel_height *= _METERS_PER_DEGREE
+        row_latitudes = geotiff.transform.f + geotiff.transform.e * (np.arange(geotiff.height) + 0.5)
+        row_widths = pixel_width * _METERS_PER_DEGREE * np.cos(np.radians(row_latitudes))
+    else:
+        row_widths = np.full(geotiff.height, pixel_width)
     
-    # Downsample image while retaining as much quality as possible 
-    simplified_img = img.resize(new_size, resample=Image.BICUBIC)
-
-    # Save the downscaled image to a new file
-    simplified_img.save(output_dir)
-
-def renderDEM(blender_dir: str, dem_dir: str, output_dir: str, exaggeration: float = 1.0, shadow_softness: int = 90, sun_angle: int = 45, resolution_scale: int = 100, samples: int = 5):
-    """
-    Uses Blender to generate a 3D rendered hillshade map using an input DEM image file
-
-    Parameters:
-        blender_dir (str): Directory of blender.exe found in Blender's installation folder
-        dem_dir (string): The path to the input DEM image including file extension
-        output_dir (string): The path to the output rendered image file including file extension
-        exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
-        shadow_softness (int): Softness of shadows with values ranging from 0-180
-        sun_angle (int): Vertical angle of sun's rays that lights the map
-        resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
-        samples (int): Amount of samples to be used in the final render determining its quality
-    """
-
-        ### --- Check for a variety of user-input errors --- ###
-
-    # Check for invalid input parameter datatypes
-    if type(blender_dir) != str:
-        raise TypeError('blender_dir is not of type string, please input a string.')
-    elif type(dem_dir) != str:
-        raise TypeError('dem_dir is not of type string, please input a string.')
-    elif type(output_dir) != str:
-        raise TypeError('output_dir is not of type string, please input a string.')
-    elif type(exaggeration) != float:
-        raise TypeError('exaggeration is not of type float, please input a float.')
-    elif type(shadow_softness) != int:
-        raise TypeError('shadow_softness is not of type integer, please input an integer.')
-    elif type(sun_angle) != int:
-        raise TypeError('sun_angle is not of type integer, please input an integer.')
-    elif type(resolution_scale) != int:
-        raise TypeError('resolution_scale is not of type integer, please input an integer.')
-    elif type(samples) != int:
-        raise TypeError('samples is not of type integer, please input an integer.')
-
-    # Check for invalid characters in input and output directories
-    pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
-    if pattern.search(dem_dir) or pattern.search(output_dir) or pattern.search(blender_dir):
-        raise ValueError('Input or output or blender directory contains invalid characters.')
+    # Output an 8-bit single band .geotiff on the grid of the input with 0 as 'nodata'
+    output_profile = {'driver': 'GTiff',
+                      'dtype': 'uint8',
+                      'count': 1,
+                      'width': geotiff.width,
+                      'height': geotiff.height,
+                      'crs': geotiff.crs,
+                      'transform': geotiff.transform,
+                      'nodata': 0,
+                      'tiled': True,
+                      'blockxsize': 512,
+                      'blockysize': 512,
+                      'compress': 'lzw'}
     
-    # Check for invalid Blender directory
-    if not os.path.exists(blender_dir):
-        raise FileNotFoundError(f'Path to Blender executable "{blender_dir}" does not exist.')
-
-    # Check for invalid input directory or filetype errors
-    if not os.path.exists(dem_dir):
-        raise FileNotFoundError(f'Input file path "{dem_dir}" does not exist.')
-    if not dem_dir.endswith(('.png', '.jpg', '.jpeg', '.bmp','.tif','.tiff')):
-        raise ValueError(f'Input file "{dem_dir}"" is not a valid image file.')
+    try:
+        output = rasterio.open(output_dir, 'w', **output_profile)
+    except Exception:
+        geotiff.close()
+        raise
     
-    # Check for invalid output directory or filetype errors
-    output_dir_path = os.path.dirname(output_dir)
-    if not os.path.exists(output_dir_path):
-        raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
-    if not output_dir.endswith(('.png', '.jpg', '.jpeg', '.bmp','.tif','.tiff')):
-        raise ValueError(f'Output file "{output_dir}" is not a valid image file.')
-
-        ### --- Use subprocess to start Blender and run renderDEM() function --- ###
-
-    subprocess.run(f"{blender_dir} --background --python-expr \"from renderDEM import *; renderDEM(dem_dir = '{dem_dir}', output_dir = '{output_dir}', exaggeration = {exaggeration}, shadow_softness = {shadow_softness}, sun_angle = {sun_angle}, resolution_scale = {resolution_scale}, samples = {samples})\"")
+        ### --- Shade tiles with a one pixel halo across threads --- ###
+    
+    # Rasterio dataset handles are not thread-safe, so reads and writes are serialized while shading runs concurrently
+    read_lock = threading.Lock()
+    write_lock = threading.Lock()
+    
+    def shadeTile(window):
+        # Read the tile with a one pixel halo, repeating the edge pixels of the DEM outside of it
+        halo = Window(window.col_off - 1, window.row_off - 1, window.width + 2, window.height + 2)
+        with read_lock:
+            elevation = geotiff.read(1, window=halo, boundless=True, masked=True).astype('float64').filled(np.nan)
+        
+        # Boundless reads fill outside the DEM with 'nodata', replace it with the edge pixels
+        if window.row_off == 0:
+            elevation[0] = elevation[1]
+        if window.col_off == 0:
+            elevation[:, 0] = elevation[:, 1]
+        if window.row_off + window.height == geotiff.height:
+            elevation[-1] = elevation[-2]
+        if window.col_off + window.width == geotiff.width:
+            elevation[:, -1] = elevation[:, -2]
+        
+        shade = _shadeTile(elevation, row_widths[window.row_off:window.row_off + window.height], pixel_height, sun_azimuth, sun_angle, exaggeration, multidirectional)
+        
+        with write_lock:
+            output.write(shade, 1, window=window)
+    
+    windows = [Window(col, row, min(tile_size, geotiff.width - col), min(tile_size, geotiff.height - row))
+               for row in range(0, geotiff.height, tile_size)
+               for col in range(0, geotiff.width, tile_size)]
+    
+    try:
+        if num_threads > 1:
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                list(executor.map(shadeTile, windows))
+        else:
+            for window in windows:
+                shadeTile(window)
+    
+    # Close input and output files, even if shading a tile failed
+    finally:
+        geotiff.close()
+        output.close()
 
 # Converts a rendered hillshade image to a .geotiff image with geospatial metadata
 def georeferenceImage(hillshade_dir: str, geotiff_dir: str, output_dir: str):
@@ -814,4 +3814,339 @@ def georeferenceImage(hillshade_dir: str, geotiff_dir: str, output_dir: str):
     # Close openned rasterio files
     hillshade.close()
     geotiff.close()
-    output.close()
\ No newline at end of file
+    output.close()
+
+# Chain the DEM workflow in memory
+class Pipeline:
+    """
+    Chains the steps of the BlenderMapDEM workflow (fixNoData, reprojectDEM, clipDEM, geotiffToImage, simplifyDEM, renderDEM, georeferenceImage) on a DEM held in memory, so the input .geotiff is read once and only the outputs asked for are written to disk
+    
+    Every step returns the pipeline itself so steps can be chained, use save() to write the DEM at any point of the chain
+    
+    Parameters:
+        geotiff_dir (str): The path to the input DEM GeoTIFF file including file extension
+    """
+    
+    def __init__(self, geotiff_dir: str):
+        
+            ### --- Catch a variety of user-input errors --- ###
+        
+        # Check for invalid input parameter datatypes
+        if type(geotiff_dir) != str:
+            raise TypeError('geotiff_dir is not of type string, please input a string.')
+        
+        # Check for invalid characters in input directory
+        pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+        if pattern.search(geotiff_dir):
+            raise ValueError('Input directory contains invalid characters.')
+        
+        # Check for invalid input directory or filetype errors
+        if not os.path.exists(geotiff_dir):
+            raise FileNotFoundError(f'Input file path "{geotiff_dir}" does not exist.')
+        if not geotiff_dir.endswith(('.tif','.tiff')):
+            raise ValueError(f'Input file "{geotiff_dir}"" is not a valid .geotiff file.')
+        
+            ### --- Read DEM into memory --- ###
+        
+        with rasterio.open(geotiff_dir) as geotiff:
+            self.data = geotiff.read()
+            self.profile = geotiff.profile.copy()
+        
+        self.profile['driver'] = 'GTiff'
+        
+        # Path and RenderStats of the latest hillshade rendered by renderDEM()
+        self.render_dir = None
+        self.render_stats = None
+    
+    # Expose the DEM held in memory as an open rasterio dataset
+    @contextmanager
+    def _memoryDataset(self):
+        """
+        Yields the DEM held in memory as a rasterio dataset backed by a MemoryFile
+        """
+        
+        with MemoryFile() as memory_file:
+            with memory_file.open(**self.profile) as dataset:
+                dataset.write(self.data)
+            with memory_file.open() as dataset:
+                yield dataset
+    
+    # Update the DEM held in memory
+    def _update(self, data: np.ndarray, **profile):
+        """
+        Replaces the DEM array and updates its profile with its new size and any other given profile values
+        """
+        
+        self.data = data
+        self.profile.update(count=data.shape[0], height=data.shape[1], width=data.shape[2], **profile)
+    
+    def fixNoData(self, nodata_value: int = 0):
+        """
+        Fixes the 'nodata' pixels of the DEM to a specific value, see fixNoData()
+        
+        Parameters:
+            nodata_value (int): Value you wish to set as 'nodata' (0 is default and recommended)
+        """
+        
+        if type(nodata_value) != int:
+            raise TypeError('nodata_value is not of type integer, please input an integer.')
+        
+        _replaceNoData(self.data, self.profile['nodata'], nodata_value)
+        self.profile['nodata'] = nodata_value
+        
+        return self
+    
+    def reprojectDEM(self, epsg_num: str, resampling: str = 'nearest', num_threads: int = None):
+        """
+        Reprojects the DEM to a specified EPSG crs code, see reprojectDEM()
+        
+        Parameters:
+            epsg_num (str): The specific EPSG code with which to reproject the DEM to; int is also accepted
+            resampling (str): Resampling method used to warp the DEM, such as 'nearest', 'bilinear', 'cubic', or 'average'
+            num_threads (int): Number of threads used by the warper (all cores by default)
+        """
+        
+        if type(epsg_num) != str and type(epsg_num) != int:
+            raise TypeError('epsg_num is not of type string or integer, please input a string or integer.')
+        elif type(resampling) != str:
+            raise TypeError('resampling is not of type string, please input a string.')
+        elif num_threads is not None and type(num_threads) != int:
+            raise TypeError('num_threads is not of type integer, please input an integer.')
+        
+        if resampling not in _RESAMPLING_METHODS:
+            raise ValueError(f'Invalid resampling method "{resampling}", available methods are: {", ".join(_RESAMPLING_METHODS)}')
+        
+        # Define the target CRS
+        output_crs = f"EPSG:{epsg_num}"
+        
+        # Try to calculate the transform and dimensions for the target CRS and raise error if EPSG is invalid
+        bounds = array_bounds(self.profile['height'], self.profile['width'], self.profile['transform'])
+        try:
+            transform, width, height = calculate_default_transform(self.profile['crs'], output_crs, self.profile['width'], self.profile['height'], *bounds)
+        except:
+            raise ValueError(f'Input EPSG code "{epsg_num}" is not a valid EPSG crs code.')
+        
+        # Reproject the DEM array into a new array of the target CRS
+        output = np.zeros((self.profile['count'], height, width), dtype=self.data.dtype)
+        reproject(source=self.data,
+                  destination=output,
+                  src_transform=self.profile['transform'],
+                  src_crs=self.profile['crs'],
+                  src_nodata=self.profile['nodata'],
+                  dst_transform=transform,
+                  dst_crs=output_crs,
+                  dst_nodata=0,
+                  resampling=_RESAMPLING_METHODS[resampling],
+                  num_threads=num_threads or os.cpu_count() or 1)
+        
+        self._update(output, crs=output_crs, transform=transform, nodata=0)
+        
+        return self
+    
+    def clipDEM(self, geometry_dir: str, crop: bool = True):
+        """
+        Clips the DEM according to a geometry file, see clipDEM()
+        
+        Parameters:
+            geometry_dir (str): The path to the geometry file with which to clip the DEM by
+            crop (bool): Choose if to crop the image to clipped extent (True), or leave original extent creating an "island" effect (False)
+        """
+        
+        if type(geometry_dir) != str:
+            raise TypeError('geometry_dir is not of type string, please input a string.')
+        elif type(crop) != bool:
+            raise TypeError('crop is not of type bool, please input an bool.')
+        
+        # Check for invalid characters in geometry directory
+        pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+        if pattern.search(geometry_dir):
+            raise ValueError('Geometry directory contains invalid characters.')
+        
+        # Check for invalid geometry directory or filetype errors
+        if not os.path.exists(geometry_dir):
+            raise FileNotFoundError(f'Geometry file path "{geometry_dir}" does not exist.')
+        if not geometry_dir.endswith(('.shp','.json','.geojson')):
+            raise ValueError(f'Geometry file "{geometry_dir}"" is not a valid geometry file format. Supported formats include ".shp", ",json", ".geojson".')
+        
+        with self._memoryDataset() as dataset:
+            # Open file containing geometry data, skipping features outside the raster
+            shapes = _loadShapes(geometry_dir, dataset.bounds)
+            output_image, output_transform, output_window = _clipDataset(dataset, shapes)
+        
+        # Place the clipped window back into the full extent if not cropping
+        if not crop:
+            rows, cols = output_window.toslices()
+            clipped_image = output_image
+            output_image = np.zeros_like(self.data)
+            output_image[:, rows, cols] = clipped_image
+            output_transform = self.profile['transform']
+        
+        self._update(output_image, transform=output_transform, nodata=0)
+        
+        return self
+    
+    def geotiffToImage(self):
+        """
+        Scales the DEM to the 0-255 range of an 8-bit image viewable by non-GIS programs, see geotiffToImage(), georeferencing is kept in memory
+        """
+        
+        self._update(_scaleToImage(self.data), dtype='uint8', nodata=None)
+        
+        return self
+    
+    def simplifyDEM(self, reduction_factor: float = 2, resampling: str = 'cubic'):
+        """
+        Downsamples the DEM to a lower resolution and updates its georeferencing accordingly, see simplifyDEM()
+        
+        Parameters:
+            reduction_factor (float): Number by which to divide resolution by, must be greater than 1; int is also accepted
+            resampling (str): Resampling method used to downsample the DEM, such as 'cubic', 'bilinear', or 'average'
+        """
+        
+        if type(reduction_factor) != int and type(reduction_factor) != float:
+            raise TypeError('reduction_factor is not of type float or integer, please input a float or integer.')
+        elif type(resampling) != str:
+            raise TypeError('resampling is not of type string, please input a string.')
+        if reduction_factor <= 1:
+            raise ValueError(f'reduction_factor "{reduction_factor}" must be greater than 1 to reduce resolution.')
+        if resampling not in _RESAMPLING_METHODS:
+            raise ValueError(f'Invalid resampling method "{resampling}", available methods are: {", ".join(_RESAMPLING_METHODS)}')
+        
+        # Calculate the new size of the DEM by dividing it by the reduction_factor
+        new_width = max(1, int(self.profile['width'] / reduction_factor))
+        new_height = max(1, int(self.profile['height'] / reduction_factor))
+        
+        # Downsample DEM while retaining as much quality as possible
+        with self._memoryDataset() as dataset:
+            output = dataset.read(out_shape=(self.profile['count'], new_height, new_width), resampling=_RESAMPLING_METHODS[resampling])
+        
+        # Scale pixel size of transform to the new resolution
+        transform = self.profile['transform'] * Affine.scale(self.profile['width'] / new_width, self.profile['height'] / new_height)
+        
+        self._update(output, transform=transform)
+        
+        return self
+    
+    def save(self, output_dir: str):
+        """
+        Writes the DEM in its current state to a .tif (keeping georeferencing), .png, or .bmp file
+        
+        Parameters:
+            output_dir (str): The path to the output file including file extension
+        """
+        
+        if type(output_dir) != str:
+            raise TypeError('output_dir is not of type string, please input a string.')
+        
+        # Check for invalid characters in output directory
+        pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+        if pattern.search(output_dir):
+            raise ValueError('Output directory contains invalid characters.')
+        
+        # Check for invalid output directory or filetype errors
+        output_dir_path = os.path.dirname(output_dir)
+        if not os.path.exists(output_dir_path):
+            raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
+        if not output_dir.endswith(('.png','.bmp','.tif','.tiff')):
+            raise ValueError(f'Output file "{output_dir}" is not a valid image file.')
+        
+        # Specify the output format according to file extension
+        if output_dir.endswith('.png'):
+            file_type = 'PNG'
+        elif output_dir.endswith('.bmp'):
+            file_type = 'BMP'
+        else:
+            file_type = 'GTiff'
+        
+        # Image formats only support 8-bit data
+        data = self.data if file_type == 'GTiff' or self.data.dtype == 'uint8' else _scaleToImage(self.data)
+        
+        # Make GDAL not create an annoying .aux file with image outputs
+        if file_type != 'GTiff':
+            os.environ['GDAL_PAM_ENABLED'] = 'NO'
+        
+        profile = self.profile.copy()
+        profile.update(driver=file_type, dtype=data.dtype)
+        if file_type != 'GTiff':
+            for key in ('tiled', 'blockxsize', 'blockysize', 'compress', 'interleave', 'photometric'):
+                profile.pop(key, None)
+        
+        with rasterio.open(output_dir, 'w', **profile) as output:
+            output.write(data)
+        
+        return self
+    
+    def renderDEM(self, blender_dir: str, output_dir: str, exaggeration: float = 1.0, shadow_softness: int = 90, sun_angle: int = 45, resolution_scale: int = 100, samples: int = 5):
+        """
+        Uses Blender to render a hillshade of the DEM, see renderDEM(), the DEM is handed to Blender through a temporary image file
+        
+        Parameters:
+            blender_dir (str): Directory of blender.exe found in Blender's installation folder
+            output_dir (string): The path to the output rendered image file including file extension
+            exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
+            shadow_softness (int): Softness of shadows with values ranging from 0-180
+            sun_angle (int): Vertical angle of sun's rays that lights the map
+            resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
+            samples (int): Amount of samples to be used in the final render determining its quality
+        """
+        
+        with tempfile.TemporaryDirectory() as image_dir:
+            image_dir = os.path.join(image_dir, 'DEM.png')
+            self.save(image_dir)
+            self.render_stats = renderDEM(blender_dir, image_dir, output_dir, exaggeration, shadow_softness, sun_angle, resolution_scale, samples)
+        
+        self.render_dir = output_dir
+        
+        return self
+    
+    def georeferenceImage(self, output_dir: str, hillshade_dir: str = None):
+        """
+        Saves a rendered hillshade as a .geotiff georeferenced according to the DEM, see georeferenceImage()
+        
+        Parameters:
+            output_dir (str): Directory of the saved .geotiff image containing the hillshade with applied geospatial metadata
+            hillshade_dir (str): Directory of the hillshade image, defaults to the latest hillshade rendered by renderDEM()
+        """
+        
+        hillshade_dir = self.render_dir if hillshade_dir is None else hillshade_dir
+        
+        if type(output_dir) != str:
+            raise TypeError('output_dir is not of type string, please input a string.')
+        elif type(hillshade_dir) != str:
+            raise TypeError('hillshade_dir is not of type string, please input a string or use renderDEM() first.')
+        
+        # Check for invalid characters in hillshade and output directories
+        pattern = re.compile(r'[^a-zA-Z0-9_\-\\/.\s:]')
+        if pattern.search(hillshade_dir):
+            raise ValueError('Hillshade directory contains invalid characters.')
+        elif pattern.search(output_dir):
+            raise ValueError('Output directory contains invalid characters.')
+        
+        # Check for invalid output directory or filetype errors
+        output_dir_path = os.path.dirname(output_dir)
+        if not os.path.exists(output_dir_path):
+            raise FileNotFoundError(f'Output file path "{output_dir}" does not exist, please create it.')
+        if not output_dir.endswith(('.tif','.tiff')):
+            raise ValueError(f'Invalid output filetype "{output_dir}", make sure output_dir argument ends with ".tif"')
+        
+        # Open hillshade image and resize it to the resolution of the DEM for correct georeferencing
+        with Image.open(hillshade_dir) as img:
+            if img.width != self.profile['width'] or img.height != self.profile['height']:
+                img = img.resize((self.profile['width'], self.profile['height']), resample=Image.BICUBIC)
+            hillshade_data = np.asarray(img)
+        
+        # Arrange image array as (bands, rows, columns)
+        hillshade_data = hillshade_data[np.newaxis] if hillshade_data.ndim == 2 else hillshade_data.transpose(2, 0, 1)
+        
+        profile = {'driver': 'GTiff',
+                   'dtype': hillshade_data.dtype,
+                   'count': hillshade_data.shape[0],
+                   'height': hillshade_data.shape[1],
+                   'width': hillshade_data.shape[2],
+                   'transform': self.profile['transform'],
+                   'crs': self.profile['crs']}
+        
+        with rasterio.open(output_dir, 'w', **profile) as output:
+            output.write(hillshade_data)
+        
+        return self
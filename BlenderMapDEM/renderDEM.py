@@ -6,11 +6,21 @@ except:
 
 import re
 import os
+import json
+import socket
+import time
+import numpy as np
 
-# Generate 3D elevation map using Blender's bpy package
-def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_softness: int = 90, sun_angle: int = 45, resolution_scale: int = 50, samples: int = 5):
+# DEM image currently held by the scene, so consecutive renders of the same DEM do not reload it
+_loaded_dem = {'dem_dir': None, 'mtime': None, 'image': None}
+
+# Number of heightmap pixels scaled into Blender's pixel buffer at a time
+_HEIGHTMAP_CHUNK_PIXELS = 2**20
+
+# Check render parameters
+def _checkRenderInputs(dem_dir: str, output_dir: str, exaggeration: float, shadow_softness: int, sun_angle: int, resolution_scale: int, samples: int):
     """
-    Uses Blender in order to render a hillshade map using DEM image as input
+    Raises an error if any of the parameters of a render are invalid
 
     Parameters:
         dem_dir (string): The path to the input DEM image including file extension
@@ -22,8 +32,6 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
         samples (int): Amount of samples to be used in the final render determining its quality
     """
     
-        ### --- Catch a variety of user-input errors --- ###
-    
     # Check for invalid input parameter datatypes
     if type(dem_dir) != str:
         raise TypeError('dem_dir is not of type string, please input a string.')
@@ -48,8 +56,10 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
     # Check for invalid input directory or filetype errors
     if not os.path.exists(dem_dir):
         raise FileNotFoundError(f'Input file path "{dem_dir}" does not exist.')
-    if not dem_dir.endswith(('.png', '.jpg', '.jpeg', '.bmp','.tif','.tiff')):
-        raise ValueError(f'Input file "{dem_dir}"" is not a valid image file.')
+    if not dem_dir.endswith(('.png', '.jpg', '.jpeg', '.bmp','.tif','.tiff','.npy')):
+        raise ValueError(f'Input file "{dem_dir}"" is not a valid image or .npy heightmap file.')
+    if dem_dir.endswith('.npy') and not os.path.exists(os.path.splitext(dem_dir)[0] + '.json'):
+        raise FileNotFoundError(f'Heightmap metadata file "{os.path.splitext(dem_dir)[0]}.json" does not exist, create the heightmap with geotiffToHeightmap().')
     
     # Check for invalid output directory or filetype errors
     output_dir_path = os.path.dirname(output_dir)
@@ -57,12 +67,12 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
         raise FileNotFoundError(f'Output file directory "{output_dir}" does not exist, please create it.')
     if not output_dir.endswith(('.png', '.jpg', '.jpeg', '.bmp','.tif','.tiff')):
         raise ValueError(f'Output file "{output_dir}" is not a valid image file.')  
-    
-    # Import DEM image
-    DEM = bpy.data.images.load(dem_dir)
-    
-    # Set variables to hold resolution of DEM image
-    width, height = DEM.size
+
+# Build the parts of the scene that are the same for every render
+def setupScene():
+    """
+    Prepares the render settings, plane, camera, light, and material nodes of the scene, which updateScene() then adapts to each DEM and set of render parameters
+    """
     
         ### --- Render Settings --- ###
     
@@ -70,14 +80,6 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
     bpy.context.scene.render.engine = 'CYCLES'
     bpy.context.scene.cycles.feature_set = 'EXPERIMENTAL'
     
-    # Set render output resolution to the same as DEM image
-    bpy.data.scenes['Scene'].render.resolution_x = width
-    bpy.data.scenes['Scene'].render.resolution_y = height
-    
-    # Specify render quality
-    bpy.data.scenes['Scene'].render.resolution_percentage = resolution_scale
-    bpy.data.scenes['Scene'].cycles.samples = samples
-    
         ### --- Plane Settings --- ###
 
     # Get the cube and plane objects if they exists
@@ -98,10 +100,6 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
     bpy.ops.mesh.primitive_plane_add()
     plane = bpy.data.objects['Plane']
 
-    # Scale plane to aspect ratio of image
-    plane.scale[0] = width/1000
-    plane.scale[1] = height/1000
-
     # Check if the subsurf modifier is already applied to the plane
     subsurf_modifier = plane.modifiers.get('Subdivision')
     if subsurf_modifier == None:
@@ -109,6 +107,9 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
         subsurf_modifier = plane.modifiers.new(name='Subdivision', type='SUBSURF')
         subsurf_modifier.subdivision_type = 'SIMPLE'
         bpy.context.object.cycles.use_adaptive_subdivision = True
+    
+    # The new plane has not been scaled to any DEM yet
+    _loaded_dem['dem_dir'] = None
 
         ### --- Camera Settings --- ###
     
@@ -127,36 +128,16 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
     # Set camera to orthographic
     bpy.data.cameras['Camera'].type = 'ORTHO'
     
-    # Set orthographic scale to be twice the largest dimension of our plane (so plane fills view)
-    if width/1000 > height/1000:
-        orthographic_scale = 2*(width/1000)
-    elif height/1000 > width/1000:
-        orthographic_scale = 2*(height/1000)
-    elif height/1000 == width/1000:
-        orthographic_scale = 2*(height/1000)
-    
-    bpy.data.cameras['Camera'].ortho_scale = orthographic_scale
-    
         ### --- Light Settings --- ###
     
     light = bpy.data.objects['Light']
     
-    # Make sure shadow_strength falls in acceptable range
-    if shadow_softness > 180:
-        shadow_softness = 180
-    elif shadow_softness < 0:
-        shadow_softness = 0
-    
     # Select light and change its type to "Sun"
     bpy.data.lights['Light'].type = 'SUN'
     
-    # Change strength and hardness of light
+    # Change strength of light and direction it shines from
     bpy.data.lights['Light'].energy = 5
-    bpy.data.lights['Light'].angle = shadow_softness/57.295
-    
-    # Change direction of the light
     light.rotation_euler[0] = 0
-    light.rotation_euler[1] = sun_angle/57.295
     light.rotation_euler[2] = 2.35619
     
         ### --- Shader Settings --- ###
@@ -172,24 +153,20 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
     mat.node_tree.nodes['Principled BSDF'].inputs['Roughness'].default_value = 1
     mat.node_tree.nodes['Principled BSDF'].inputs['Specular IOR Level'].default_value = 0
     
-    # Add image texture node if it doesnt exist and specify its extension, interpolation, and colorspace modes
+    # Add image texture node if it doesnt exist and specify its extension and interpolation modes
     if 'Image Texture' not in mat.node_tree.nodes:
         imageTexture = mat.node_tree.nodes.new('ShaderNodeTexImage')
     else:
         imageTexture = mat.node_tree.nodes['Image Texture']
 
-    imageTexture.image = DEM
     imageTexture.extension = 'EXTEND'
     imageTexture.interpolation = 'Smart'
-    imageTexture.image.colorspace_settings.name = 'Linear Rec.709'
     
-    # Add displacement node if it doesnt exist and specify the elevation exaggeration of heightmap
+    # Add displacement node if it doesnt exist
     if 'Displacement' not in mat.node_tree.nodes:
         displacement = mat.node_tree.nodes.new('ShaderNodeDisplacement')
     else:
         displacement = mat.node_tree.nodes['Displacement']
-        
-    displacement.inputs['Scale'].default_value = exaggeration
     
     # Add color ramp node if it doesnt exist
     if 'ColorRamp' not in mat.node_tree.nodes:
@@ -200,8 +177,134 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
     # Link everything together
     mat.node_tree.links.new(imageTexture.outputs['Color'], displacement.inputs['Height'])
     mat.node_tree.links.new(displacement.outputs['Displacement'], mat.node_tree.nodes['Material Output'].inputs['Displacement'])
-       
-        ### --- Render Image --- ###
+
+# Load a float heightmap into a Blender image
+def _loadHeightmap(dem_dir: str):
+    """
+    Returns a float Blender image holding a .npy heightmap made by the geotiffToHeightmap() function of BlenderMapDEM, scaled to the 0-1 range of its JSON metadata file, written straight into the image's pixels without encoding an image file
+
+    Parameters:
+        dem_dir (string): The path to the input .npy heightmap including file extension
+    """
+    
+    with open(os.path.splitext(dem_dir)[0] + '.json') as metadata_file:
+        metadata = json.load(metadata_file)
+    
+    heights = np.load(dem_dir, mmap_mode='r')
+    height, width = heights.shape
+    minimum, maximum, nodata = metadata['min'], metadata['max'], metadata.get('nodata')
+    scale_factor = 1 / (maximum - minimum) if maximum > minimum else 0
+    
+    # Blender is given the whole RGBA pixel buffer at once, the memory-mapped heightmap is scaled into it a chunk of rows at a time so no other full size copy is made
+    # Blender images hold RGBA pixels starting from the bottom row, the heightmap starts from the top row
+    pixels = np.ones((height, width, 4), dtype='float32')
+    chunk_height = max(1, _HEIGHTMAP_CHUNK_PIXELS // max(width, 1))
+    for row_off in range(0, height, chunk_height):
+        chunk = np.array(heights[row_off:row_off + chunk_height], dtype='float32')
+        
+        # 'nodata' pixels, and NaN or infinite values, are rendered at the lowest elevation of the DEM
+        invalid = ~np.isfinite(chunk)
+        if nodata is not None and not np.isnan(nodata):
+            invalid |= chunk == np.float32(nodata)
+        chunk[invalid] = minimum
+        
+        pixels[height - row_off - chunk.shape[0]:height - row_off, :, :3] = ((chunk[::-1] - minimum) * scale_factor)[:, :, np.newaxis]
+    
+    DEM = bpy.data.images.new(os.path.basename(dem_dir), width, height, alpha=False, float_buffer=True)
+    DEM.pixels.foreach_set(pixels.ravel())
+    
+    return DEM
+
+# Load a DEM image into the scene
+def _loadDEM(dem_dir: str):
+    """
+    Loads the DEM image or .npy heightmap into the image texture node and sizes the plane, camera, and render resolution to it, unless the same unmodified image is already loaded
+
+    Parameters:
+        dem_dir (string): The path to the input DEM image or .npy heightmap including file extension
+    """
+    
+    # Skip loading if the image is already in the scene and has not changed on disk
+    mtime = os.path.getmtime(dem_dir)
+    if _loaded_dem['dem_dir'] == dem_dir and _loaded_dem['mtime'] == mtime:
+        return
+    
+    # Import DEM image, freeing the previous one
+    if _loaded_dem['image'] is not None:
+        bpy.data.images.remove(_loaded_dem['image'])
+    
+    if dem_dir.endswith('.npy'):
+        DEM = _loadHeightmap(dem_dir)
+    else:
+        DEM = bpy.data.images.load(dem_dir)
+    DEM.colorspace_settings.name = 'Linear Rec.709'
+    bpy.data.materials['Material'].node_tree.nodes['Image Texture'].image = DEM
+    
+    _loaded_dem.update({'dem_dir': dem_dir, 'mtime': mtime, 'image': DEM})
+    
+    # Set variables to hold resolution of DEM image
+    width, height = DEM.size
+    
+    # Set render output resolution to the same as DEM image
+    bpy.data.scenes['Scene'].render.resolution_x = width
+    bpy.data.scenes['Scene'].render.resolution_y = height
+    
+    # Scale plane to aspect ratio of image
+    plane = bpy.data.objects['Plane']
+    plane.scale[0] = width/1000
+    plane.scale[1] = height/1000
+    
+    # Set orthographic scale to be twice the largest dimension of our plane (so plane fills view)
+    if width/1000 > height/1000:
+        orthographic_scale = 2*(width/1000)
+    elif height/1000 > width/1000:
+        orthographic_scale = 2*(height/1000)
+    elif height/1000 == width/1000:
+        orthographic_scale = 2*(height/1000)
+    
+    bpy.data.cameras['Camera'].ortho_scale = orthographic_scale
+
+# Adapt the prepared scene to a render
+def updateScene(dem_dir: str, exaggeration: float = 0.5, shadow_softness: int = 90, sun_angle: int = 45, resolution_scale: int = 50, samples: int = 5):
+    """
+    Updates the DEM image, exaggeration, light, and render quality of a scene prepared by setupScene()
+
+    Parameters:
+        dem_dir (string): The path to the input DEM image including file extension
+        exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
+        shadow_softness (int): Softness of shadows with values ranging from 0-180
+        sun_angle (int): Vertical angle of sun's rays that lights the map
+        resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
+        samples (int): Amount of samples to be used in the final render determining its quality
+    """
+    
+    _loadDEM(dem_dir)
+    
+    # Specify render quality
+    bpy.data.scenes['Scene'].render.resolution_percentage = resolution_scale
+    bpy.data.scenes['Scene'].cycles.samples = samples
+    
+    # Make sure shadow_strength falls in acceptable range
+    if shadow_softness > 180:
+        shadow_softness = 180
+    elif shadow_softness < 0:
+        shadow_softness = 0
+    
+    # Change hardness of light and its vertical angle
+    bpy.data.lights['Light'].angle = shadow_softness/57.295
+    bpy.data.objects['Light'].rotation_euler[1] = sun_angle/57.295
+    
+    # Specify the elevation exaggeration of heightmap
+    bpy.data.materials['Material'].node_tree.nodes['Displacement'].inputs['Scale'].default_value = exaggeration
+
+# Render the scene to an image file
+def renderImage(output_dir: str):
+    """
+    Renders the scene and saves it to an image file of the type given by the file extension
+
+    Parameters:
+        output_dir (string): The path to the output rendered image file including file extension
+    """
     
     # Check output file type and set accordingly
     if output_dir.endswith(('.tif','.tiff')):
@@ -218,4 +321,163 @@ def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_s
     bpy.context.scene.render.image_settings.file_format = file_type
     
     # Render the image
-    bpy.ops.render.render(write_still=True)
\ No newline at end of file
+    bpy.ops.render.render(write_still=True)
+
+# Replace the displaced plane with a precomputed terrain mesh
+def useTerrainMesh(mesh_dir: str, exaggeration: float = 0.5):
+    """
+    Replaces the subdivided and displaced plane with a mesh saved as .npz by the terrainMesh() function of BlenderMapDEM, laid out over the loaded DEM image like the displaced plane, so Cycles does not tessellate the plane at render time
+
+    Parameters:
+        mesh_dir (string): The path to the input .npz mesh file including file extension
+        exaggeration (float): Level of topographic exaggeration to be applied to the mesh
+    """
+    
+    with np.load(mesh_dir) as mesh_file:
+        pixels = mesh_file['pixels'].astype('float64')
+        elevations = mesh_file['vertices'][:, 2]
+        faces = mesh_file['faces']
+        height, width = mesh_file['shape']
+        minimum, maximum = mesh_file['elevation_range']
+    
+    # Place vertices on the plane like the pixels of the DEM image, with heights scaled as the displacement node would (midlevel of 0.5)
+    vertices = np.empty((len(pixels), 3), dtype='float32')
+    vertices[:, 0] = (pixels[:, 0] + 0.5) / width * 2 - 1
+    vertices[:, 1] = 1 - (pixels[:, 1] + 0.5) / height * 2
+    vertices[:, 2] = ((elevations - minimum) / (maximum - minimum) if maximum > minimum else 0) - 0.5
+    
+    # Build the mesh directly from the vertex and face arrays
+    mesh = bpy.data.meshes.new('Terrain')
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set('co', vertices.ravel())
+    mesh.loops.add(faces.size)
+    mesh.loops.foreach_set('vertex_index', faces.ravel().astype('int32'))
+    mesh.polygons.add(len(faces))
+    mesh.polygons.foreach_set('loop_start', np.arange(0, faces.size, 3, dtype='int32'))
+    
+    # Older versions of Blender also need the number of corners of every face
+    try:
+        mesh.polygons.foreach_set('loop_total', np.full(len(faces), 3, dtype='int32'))
+    except (AttributeError, TypeError):
+        pass
+    
+    mesh.polygons.foreach_set('use_smooth', np.ones(len(faces), dtype=bool))
+    mesh.update(calc_edges=True)
+    mesh.validate()
+    
+    # Swap the plane's geometry for the mesh, keeping the plane's size and material
+    plane = bpy.data.objects['Plane']
+    mat = bpy.data.materials['Material']
+    previous_mesh = plane.data
+    plane.data = mesh
+    mesh.materials.append(mat)
+    bpy.data.meshes.remove(previous_mesh)
+    
+    # The mesh already holds the terrain, so the plane is no longer subdivided or displaced
+    subsurf_modifier = plane.modifiers.get('Subdivision')
+    if subsurf_modifier != None:
+        plane.modifiers.remove(subsurf_modifier)
+    plane.cycles.use_adaptive_subdivision = False
+    
+    output_node = mat.node_tree.nodes['Material Output']
+    for link in list(output_node.inputs['Displacement'].links):
+        mat.node_tree.links.remove(link)
+    
+    # Exaggerate the heights of the mesh
+    plane.scale[2] = exaggeration
+
+# Generate 3D elevation map using Blender's bpy package
+def renderDEM(dem_dir: str, output_dir: str, exaggeration: float = 0.5, shadow_softness: int = 90, sun_angle: int = 45, resolution_scale: int = 50, samples: int = 5, mesh_dir: str = None):
+    """
+    Uses Blender in order to render a hillshade map using DEM image as input
+
+    Parameters:
+        dem_dir (string): The path to the input DEM image including file extension
+        output_dir (string): The path to the output rendered image file including file extension
+        exaggeration (float): Level of topographic exaggeration to be applied to 3D plane based on input DEM
+        shadow_softness (int): Softness of shadows with values ranging from 0-180
+        sun_angle (int): Vertical angle of sun's rays that lights the map
+        resolution_scale (int): Scale of the rendered image resolution in relation to the input DEM resolution in percentage
+        samples (int): Amount of samples to be used in the final render determining its quality
+        mesh_dir (string): The path to a .npz mesh of the DEM made by terrainMesh() to render instead of displacing a subdivided plane
+    """
+    
+    _checkRenderInputs(dem_dir, output_dir, exaggeration, shadow_softness, sun_angle, resolution_scale, samples)
+    
+    # Check for invalid mesh directory or filetype errors
+    if mesh_dir is not None:
+        if type(mesh_dir) != str:
+            raise TypeError('mesh_dir is not of type string, please input a string.')
+        if not os.path.exists(mesh_dir):
+            raise FileNotFoundError(f'Mesh file path "{mesh_dir}" does not exist.')
+        if not mesh_dir.endswith('.npz'):
+            raise ValueError(f'Mesh file "{mesh_dir}" is not a valid .npz file.')
+    
+    setupScene()
+    updateScene(dem_dir, exaggeration, shadow_softness, sun_angle, resolution_scale, samples)
+    if mesh_dir is not None:
+        useTerrainMesh(mesh_dir, exaggeration)
+    renderImage(output_dir)
+
+# Parameters of a render job and their defaults
+_JOB_PARAMETERS = {'exaggeration': 0.5, 'shadow_softness': 90, 'sun_angle': 45, 'resolution_scale': 50, 'samples': 5}
+
+# Run a single job sent to the render worker
+def _handleJob(job: dict) -> dict:
+    """
+    Runs a job of the render worker protocol and returns its response, errors are returned rather than raised so the worker keeps running
+
+    Parameters:
+        job (dict): Job with a 'command' of 'render', 'ping', or 'shutdown', render jobs also hold 'dem_dir', 'output_dir', and optionally the parameters of renderDEM()
+    """
+    
+    try:
+        command = job.get('command')
+        
+        if command == 'ping' or command == 'shutdown':
+            return {'status': 'ok'}
+        elif command != 'render':
+            raise ValueError(f'Unknown render worker command "{command}".')
+        
+        parameters = {name: job.get(name, default) for name, default in _JOB_PARAMETERS.items()}
+        _checkRenderInputs(job.get('dem_dir'), job.get('output_dir'), **parameters)
+        
+        start = time.perf_counter()
+        updateScene(job['dem_dir'], **parameters)
+        renderImage(job['output_dir'])
+        
+        return {'status': 'ok', 'output_dir': job['output_dir'], 'seconds': time.perf_counter() - start}
+    
+    except Exception as error:
+        return {'status': 'error', 'error_type': type(error).__name__, 'message': str(error)}
+
+# Serve render jobs from a single Blender session
+def renderWorker(port: int, token: str = '', host: str = '127.0.0.1'):
+    """
+    Connects to a BlenderWorker listening on a local port, prepares the scene once, and renders the jobs it sends until it asks to shut down or disconnects
+
+    Jobs and responses are exchanged as one JSON object per line, see _handleJob(), the first line sent is the token identifying this worker
+
+    Parameters:
+        port (int): Port the BlenderWorker is listening on
+        token (string): Token the BlenderWorker passed to this Blender process to identify it
+        host (string): Address the BlenderWorker is listening on
+    """
+    
+    connection = socket.create_connection((host, port))
+    
+    with connection, connection.makefile('r', encoding='utf-8', newline='\n') as jobs, connection.makefile('w', encoding='utf-8', newline='\n') as responses:
+        # Identify this worker before accepting jobs
+        responses.write(json.dumps({'token': token}) + '\n')
+        responses.flush()
+        
+        setupScene()
+        
+        for line in jobs:
+            job = json.loads(line)
+            
+            responses.write(json.dumps(_handleJob(job)) + '\n')
+            responses.flush()
+            
+            if job.get('command') == 'shutdown':
+                break
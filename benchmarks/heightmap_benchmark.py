@@ -0,0 +1,135 @@
+# Benchmarks the .npy heightmap handoff to Blender against the geotiffToImage() -> simplifyDEM() -> PNG chain
+#
+# Usage:
+#     python benchmarks/heightmap_benchmark.py --size 8000 --reduction-factor 2
+#
+# Each path runs in its own process so its peak memory is measured separately. Blender is not needed, both paths
+# time building the pixel buffer Blender would be given the same way renderDEM.py builds it (RGBA floats, bottom row first)
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+from PIL import Image
+from rasterio.transform import from_origin
+
+# Import the package from this checkout when it is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BlenderMapDEM import geotiffToImage, geotiffToHeightmap, simplifyDEM
+
+
+# Writes a smooth synthetic float DEM block by block so the generated raster never sits in memory
+def makeDEM(path: str, size: int):
+    profile = {'driver': 'GTiff',
+               'dtype': 'float32',
+               'count': 1,
+               'width': size,
+               'height': size,
+               'crs': 'EPSG:32620',
+               'transform': from_origin(500000, 1500000, 30, 30),
+               'tiled': True,
+               'blockxsize': 512,
+               'blockysize': 512,
+               'compress': 'lzw',
+               'BIGTIFF': 'IF_SAFER'}
+
+    with rasterio.open(path, 'w', **profile) as dem:
+        for _, window in dem.block_windows(1):
+            rows, cols = np.mgrid[window.row_off:window.row_off + window.height, window.col_off:window.col_off + window.width]
+            data = 1000 * np.sin(rows / 900) * np.cos(cols / 1300) + 0.01 * cols + 1000
+            dem.write(data.astype('float32'), 1, window=window)
+
+
+# Scales heights into Blender's float RGBA pixel buffer a chunk of rows at a time as renderDEM.py does, and returns the heights Blender receives, top row first
+def blenderPixels(heights: np.ndarray, minimum: float, scale_factor: float, chunk_pixels: int = 2**20) -> np.ndarray:
+    height, width = heights.shape
+    pixels = np.ones((height, width, 4), dtype='float32')
+    chunk_height = max(1, chunk_pixels // width)
+    for row_off in range(0, height, chunk_height):
+        chunk = np.array(heights[row_off:row_off + chunk_height], dtype='float32')
+        pixels[height - row_off - chunk.shape[0]:height - row_off, :, :3] = ((chunk[::-1] - minimum) * scale_factor)[:, :, np.newaxis]
+
+    return pixels[::-1, :, 0]
+
+
+# The current chain: 8-bit PNG, re-encoded by simplifyDEM(), then decoded into Blender's float RGBA pixels
+def pngChain(source: str, workdir: str, reduction_factor: float) -> np.ndarray:
+    image_dir = os.path.join(workdir, 'dem.png')
+    geotiffToImage(source, image_dir)
+
+    if reduction_factor > 1:
+        simplified_dir = os.path.join(workdir, 'dem_simplified.png')
+        simplifyDEM(image_dir, simplified_dir, reduction_factor=reduction_factor)
+        image_dir = simplified_dir
+
+    # Blender decodes 8-bit images to 0-1 floats
+    with Image.open(image_dir) as image:
+        heights = np.asarray(image.convert('L'), dtype='float32')
+
+    return blenderPixels(heights, 0, 1 / 255)
+
+
+# The heightmap handoff: float32 .npy memory-mapped and scaled straight into Blender's float RGBA pixels
+def heightmapHandoff(source: str, workdir: str, reduction_factor: float) -> np.ndarray:
+    heightmap_dir = os.path.join(workdir, 'dem.npy')
+
+    with rasterio.open(source) as dem:
+        max_size = int(max(dem.width, dem.height) / reduction_factor) if reduction_factor > 1 else None
+    geotiffToHeightmap(source, heightmap_dir, max_size=max_size)
+
+    # The elevation range is read from the metadata saved next to the heightmap, as renderDEM.py does, rather than scanning it again
+    with open(os.path.splitext(heightmap_dir)[0] + '.json') as metadata_file:
+        metadata = json.load(metadata_file)
+    minimum, maximum = metadata['min'], metadata['max']
+
+    heights = np.load(heightmap_dir, mmap_mode='r')
+
+    return blenderPixels(heights, minimum, 1 / (maximum - minimum))
+
+
+# Runs a path in a fresh process, reporting its wall time, peak memory, and the number of distinct height levels Blender receives
+def runPath(path_name: str, source: str, workdir: str, reduction_factor: float, results):
+    start = time.perf_counter()
+    heights = globals()[path_name](source, workdir, reduction_factor)
+    seconds = time.perf_counter() - start
+
+    # Linux reports the peak resident set size in kilobytes, macOS in bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    results.put((path_name, seconds, peak / 2**20, len(np.unique(heights))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the .npy heightmap handoff against the PNG chain feeding renderDEM().')
+    parser.add_argument('--size', type=int, default=8000, help='Width and height of the synthetic DEM in pixels')
+    parser.add_argument('--reduction-factor', type=float, default=2, help='simplifyDEM() reduction factor, 1 to skip simplification')
+    parser.add_argument('--workdir', default=None, help='Directory for the generated files (a temporary directory by default)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        source = os.path.join(workdir, 'dem.tif')
+
+        start = time.perf_counter()
+        makeDEM(source, args.size)
+        print(f'Generated {args.size}x{args.size} DEM in {time.perf_counter() - start:.1f}s')
+
+        context = multiprocessing.get_context('spawn')
+        for path_name in ('pngChain', 'heightmapHandoff'):
+            results = context.Queue()
+            process = context.Process(target=runPath, args=(path_name, source, workdir, args.reduction_factor, results))
+            process.start()
+            name, seconds, peak, levels = results.get()
+            process.join()
+
+            print(f'{name}: {seconds:.2f}s, peak memory {peak:.0f}MB, {levels} distinct height levels')
+
+
+if __name__ == '__main__':
+    main()
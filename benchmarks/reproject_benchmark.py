@@ -0,0 +1,102 @@
+# Benchmarks reprojectDEM() against the previous band by band, single-threaded reprojection
+#
+# Usage (from the repository root):
+#     python benchmarks/reproject_benchmark.py --epsg 32620 --resampling bilinear
+#
+# The default --size of 50000 generates a 2.5 gigapixel synthetic DEM (~5GB of int16 on disk before compression),
+# pass a smaller size such as --size 20000 (0.4 gigapixels) for a quick run
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.warp import calculate_default_transform, reproject, Resampling
+from rasterio.windows import Window
+
+# Import the package from this checkout when it is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BlenderMapDEM import reprojectDEM
+
+
+# Writes a synthetic tiled DEM block by block so the generated raster never sits in memory
+def makeDEM(path: str, size: int):
+    profile = {'driver': 'GTiff',
+               'dtype': 'int16',
+               'count': 1,
+               'width': size,
+               'height': size,
+               'crs': 'EPSG:4326',
+               'transform': from_origin(-60.0, 14.0, 1/3600, 1/3600),
+               'nodata': -32768,
+               'tiled': True,
+               'blockxsize': 512,
+               'blockysize': 512,
+               'compress': 'lzw',
+               'BIGTIFF': 'IF_SAFER'}
+
+    with rasterio.open(path, 'w', **profile) as dem:
+        for _, window in dem.block_windows(1):
+            rows, cols = np.mgrid[window.row_off:window.row_off + window.height, window.col_off:window.col_off + window.width]
+            data = 1000 * np.sin(rows / 500) * np.cos(cols / 700) + 1000
+            dem.write(data.astype('int16'), 1, window=window)
+
+
+# The reprojection path reprojectDEM() used before the windowed warp engine
+def legacyReproject(geotiff_dir: str, epsg_num: str, output_dir: str):
+    with rasterio.open(geotiff_dir) as geotiff:
+        output_crs = f"EPSG:{epsg_num}"
+        transform, width, height = calculate_default_transform(geotiff.crs, output_crs, geotiff.width, geotiff.height, *geotiff.bounds)
+
+        output_profile = geotiff.profile.copy()
+        output_profile.update({'crs': output_crs, 'transform': transform, 'width': width, 'height': height, 'nodata': 0})
+
+        with rasterio.open(output_dir, 'w', **output_profile) as output:
+            for i in range(1, output.count+1):
+                reproject(source=rasterio.band(geotiff, i),
+                          destination=rasterio.band(output, i),
+                          src_transform=geotiff.transform,
+                          src_crs=geotiff.crs,
+                          dst_transform=transform,
+                          dst_crs=output_crs,
+                          resampling=Resampling.nearest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark reprojectDEM() against the legacy band by band reprojection.')
+    parser.add_argument('--size', type=int, default=50000, help='Width and height of the synthetic DEM in pixels')
+    parser.add_argument('--epsg', default='32620', help='Target EPSG code')
+    parser.add_argument('--resampling', default='nearest', help='Resampling method of the windowed warp')
+    parser.add_argument('--num-threads', type=int, default=None, help='Warper threads (all cores by default)')
+    parser.add_argument('--warp-mem-limit', type=int, default=256, help='Warper memory limit in megabytes')
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the windowed warp')
+    parser.add_argument('--workdir', default=None, help='Directory for the generated rasters (a temporary directory by default)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        source = os.path.join(workdir, 'dem.tif')
+
+        start = time.perf_counter()
+        makeDEM(source, args.size)
+        print(f'Generated {args.size}x{args.size} DEM ({args.size**2 / 1e9:.2f} gigapixels) in {time.perf_counter() - start:.1f}s')
+
+        if not args.skip_legacy:
+            start = time.perf_counter()
+            legacyReproject(source, args.epsg, os.path.join(workdir, 'legacy.tif'))
+            print(f'Legacy band by band reproject: {time.perf_counter() - start:.1f}s')
+
+        start = time.perf_counter()
+        reprojectDEM(source, args.epsg, os.path.join(workdir, 'windowed.tif'),
+                     resampling=args.resampling,
+                     num_threads=args.num_threads,
+                     warp_mem_limit=args.warp_mem_limit)
+        print(f'Windowed warp reproject ({args.resampling}): {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
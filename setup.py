@@ -8,10 +8,10 @@ setup(
     install_requires=[
         'Pillow',
         'requests',
-        'rasterio',
+        'urllib3>=2.0',
+        'rasterio>=1.4',
         'matplotlib',
         'fiona',
-        'numpy',
-        'geopy'
+        'numpy'
     ]
 )
\ No newline at end of file
@@ -0,0 +1,24 @@
+# Stand-in for the Blender executable, applying --threads, --python-exit-code, and --python-expr in order with the stub bpy module
+import os
+import sys
+import traceback
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [here, os.path.join(os.path.dirname(os.path.dirname(here)), 'BlenderMapDEM')]
+
+exit_code = 0
+arguments = sys.argv[1:]
+while arguments:
+    argument = arguments.pop(0)
+    if argument == '--threads':
+        print(f'Threads: {arguments.pop(0)}', flush=True)
+    elif argument == '--python-exit-code':
+        exit_code = int(arguments.pop(0))
+    elif argument == '--python-expr':
+        try:
+            exec(arguments.pop(0), {})
+        except Exception:
+            traceback.print_exc()
+            sys.exit(exit_code)
+
+print('Blender quit', flush=True)
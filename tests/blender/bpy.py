@@ -0,0 +1,56 @@
+# Stand-in for Blender's bpy module, recording what the scripts of renderDEM.py do to the scene so they can be tested without Blender
+import json
+import os
+import time
+from unittest.mock import MagicMock
+
+from PIL import Image
+
+data = MagicMock()
+context = MagicMock()
+ops = MagicMock()
+
+# Paths of the images loaded into the scene, in order
+loaded_images = []
+
+
+def _loadImage(path: str):
+    with Image.open(path) as source:
+        size = source.size
+    loaded_images.append(path)
+    image = MagicMock()
+    image.size = size
+    return image
+
+
+def _newImage(name: str, width: int, height: int, alpha: bool = True, float_buffer: bool = False):
+    loaded_images.append(name)
+    image = MagicMock()
+    image.size = (width, height)
+    return image
+
+
+# Prints the recorded Blender log named by FAKE_BLENDER_LOG as a render would, exits with code 3 for outputs named 'crash', then writes the scene settings as JSON to the output path
+def _render(write_still: bool = False):
+    output_dir = context.scene.render.filepath
+    if os.environ.get('FAKE_BLENDER_LOG'):
+        with open(os.environ['FAKE_BLENDER_LOG']) as log:
+            for line in log:
+                print(line, end='', flush=True)
+
+    if 'crash' in os.path.basename(output_dir):
+        os._exit(3)
+    time.sleep(float(os.environ.get('FAKE_BLENDER_SECONDS', '0')))
+
+    nodes = data.materials['Material'].node_tree.nodes
+    with open(output_dir, 'w') as output:
+        json.dump({'loads': len(loaded_images),
+                   'exaggeration': nodes['Displacement'].inputs['Scale'].default_value,
+                   'samples': data.scenes['Scene'].cycles.samples,
+                   'resolution': [data.scenes['Scene'].render.resolution_x, data.scenes['Scene'].render.resolution_y]}, output)
+
+
+data.images.load.side_effect = _loadImage
+data.images.new.side_effect = _newImage
+data.objects.get.return_value = None
+ops.render.render.side_effect = _render
@@ -0,0 +1,67 @@
+import importlib
+import os
+import stat
+import sys
+
+import numpy as np
+import pytest
+import rasterio
+from PIL import Image
+from rasterio.transform import from_origin
+
+# Import the package from this checkout rather than an installed copy, drawing plots without a display
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+
+# Writes a small single band .geotiff DEM and returns its path, extra options (such as tiling) are added to its profile
+@pytest.fixture
+def writeDEM(tmp_path):
+    def write(data: np.ndarray, name: str = 'dem.tif', nodata = None, transform = None, crs: str = 'EPSG:32620', **options) -> str:
+        path = str(tmp_path / name)
+        profile = {'driver': 'GTiff',
+                   'dtype': data.dtype,
+                   'count': 1,
+                   'width': data.shape[1],
+                   'height': data.shape[0],
+                   'crs': crs,
+                   'transform': transform if transform is not None else from_origin(500000, 1500000, 30, 30),
+                   'nodata': nodata,
+                   **options}
+        with rasterio.open(path, 'w', **profile) as dem:
+            dem.write(data, 1)
+        return path
+    return write
+
+
+# Directory of the stand-ins for Blender and its bpy module
+BLENDER_STUBS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blender')
+
+
+# Executable standing in for Blender, running renderDEM.py with the stub bpy module
+@pytest.fixture
+def blender(tmp_path):
+    path = str(tmp_path / 'blender')
+    with open(path, 'w') as executable:
+        executable.write(f'#!{sys.executable}\nimport runpy\nrunpy.run_path({os.path.join(BLENDER_STUBS, "blender.py")!r}, run_name="__main__")\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+# The renderDEM.py module imported in this process with the stub bpy module
+@pytest.fixture
+def renderModule(monkeypatch):
+    monkeypatch.syspath_prepend(BLENDER_STUBS)
+    bpy = importlib.import_module('bpy')
+    module = importlib.import_module('BlenderMapDEM.renderDEM')
+    bpy.loaded_images.clear()
+    module._loaded_dem.update({'dem_dir': None, 'mtime': None, 'image': None})
+    return module
+
+
+# Writes a small greyscale DEM image and returns its path
+@pytest.fixture
+def demImage(tmp_path):
+    path = str(tmp_path / 'dem.png')
+    Image.fromarray(np.arange(48 * 32, dtype='uint16').reshape(32, 48).astype('uint8')).save(path)
+    return path
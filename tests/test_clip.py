@@ -0,0 +1,34 @@
+import json
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+from BlenderMapDEM import clipDEMBatch
+
+
+def square(west: float, south: float, size: float) -> dict:
+    return {'type': 'Polygon', 'coordinates': [[[west, south], [west + size, south], [west + size, south + size], [west, south + size], [west, south]]]}
+
+
+def test_clip_batch_records_errors_per_feature(writeDEM, tmp_path):
+    dem_dir = writeDEM(np.arange(10000, dtype='float32').reshape(100, 100), crs='EPSG:4326', transform=from_origin(0.0, 1.0, 0.01, 0.01))
+
+    features = [{'type': 'Feature', 'properties': {'name': 'inside'}, 'geometry': square(0.2, 0.2, 0.3)},
+                {'type': 'Feature', 'properties': {'name': 'empty'}, 'geometry': None},
+                {'type': 'Feature', 'properties': {'name': 'outside'}, 'geometry': square(5.0, 5.0, 0.3)}]
+    geometry_dir = str(tmp_path / 'features.geojson')
+    with open(geometry_dir, 'w') as geometry:
+        json.dump({'type': 'FeatureCollection', 'features': features}, geometry)
+
+    output_dir = tmp_path / 'clipped'
+    output_dir.mkdir()
+    results = clipDEMBatch(dem_dir, geometry_dir, str(output_dir), name_field='name', max_workers=1)
+
+    assert [result['name'] for result in results] == ['inside', 'empty', 'outside']
+    assert results[0]['error'] is None
+    assert isinstance(results[1]['error'], ValueError) and 'no geometry' in str(results[1]['error'])
+    assert isinstance(results[2]['error'], ValueError)
+
+    with rasterio.open(results[0]['output_dir']) as clipped:
+        assert clipped.shape == (30, 30)
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+import rasterio
+
+from BlenderMapDEM import describeDEM
+from BlenderMapDEM.BlenderMapDEM import _QuantileSketch
+
+
+@pytest.mark.parametrize('values', [[0.5], [-0.5], [5.0], [-5.0], [0.0]])
+def test_sketch_single_value(values):
+    sketch = _QuantileSketch()
+    sketch.add(np.array(values))
+
+    assert sketch.quantile(0.5) == pytest.approx(values[0], rel=0.001, abs=0.01)
+
+
+def test_sketch_matches_percentiles():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.uniform(-0.99, 0.99, 5000),
+                             rng.uniform(-3000, -1, 5000),
+                             rng.uniform(1, 9000, 5000),
+                             np.zeros(500),
+                             [-11000.0, 8848.0]])
+
+    # Values are added in chunks and merged the way describeDEM() merges blocks
+    sketch = _QuantileSketch()
+    for chunk in np.array_split(rng.permutation(values), 7):
+        block = _QuantileSketch()
+        block.add(chunk)
+        sketch.merge(block)
+
+    for q in (0, 0.05, 0.2, 0.4, 0.5, 0.6, 0.8, 0.95, 1):
+        expected = np.percentile(values, 100 * q, method='lower')
+        assert sketch.quantile(q) == pytest.approx(expected, rel=0.002, abs=0.01)
+
+
+def test_describe_percentiles_near_sea_level(writeDEM):
+    data = np.linspace(-0.9, 0.9, 400, dtype='float32').reshape(20, 20)
+    path = writeDEM(data)
+
+    percentiles = describeDEM(path, percentiles=(10, 50, 90))['percentiles']
+
+    for p, value in percentiles.items():
+        assert value == pytest.approx(np.percentile(data, p), rel=0.01, abs=0.01)
+
+
+def test_describe_stores_statistics_once(writeDEM):
+    path = writeDEM(np.arange(100, dtype='float32').reshape(10, 10))
+
+    first = describeDEM(path, percentiles=(50,))
+    with rasterio.open(path) as dem:
+        assert 'STATISTICS_PERCENTILE_50' in dem.tags(1)
+
+    # 50 and 50.0 name the same stored percentile
+    assert describeDEM(path, percentiles=(50.0,))['percentiles'][50.0] == first['percentiles'][50]
+    with rasterio.open(path) as dem:
+        assert 'STATISTICS_PERCENTILE_50.0' not in dem.tags(1)
+
+
+def test_describe_store_false_leaves_file_untouched(writeDEM):
+    path = writeDEM(np.arange(100, dtype='float32').reshape(10, 10))
+    modified = os.path.getmtime(path)
+
+    describeDEM(path, store=False)
+
+    with rasterio.open(path) as dem:
+        assert not any(key.startswith('STATISTICS_') for key in dem.tags(1))
+    assert os.path.getmtime(path) == modified
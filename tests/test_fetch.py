@@ -0,0 +1,245 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.io import MemoryFile
+from rasterio.transform import from_origin
+
+import BlenderMapDEM.BlenderMapDEM as module
+from BlenderMapDEM import fetchDEM, fetchDEMBatch
+
+# Degrees per pixel of the DEMs served by the stand-in API
+RESOLUTION = 0.05
+
+
+# Elevation of the synthetic terrain served for any extent
+def elevation(lon, lat):
+    return 100 * lon + 10 * lat
+
+
+# Encodes the synthetic terrain of an extent as a GeoTIFF
+def renderExtent(north: float, south: float, east: float, west: float) -> bytes:
+    width = max(1, round((east - west) / RESOLUTION))
+    height = max(1, round((north - south) / RESOLUTION))
+    lon = west + (np.arange(width) + 0.5) * (east - west) / width
+    lat = north - (np.arange(height) + 0.5) * (north - south) / height
+    data = elevation(lon[np.newaxis, :], lat[:, np.newaxis]).astype('float32')
+
+    with MemoryFile() as memory:
+        with memory.open(driver='GTiff', dtype='float32', count=1, width=width, height=height, crs='EPSG:4326',
+                         transform=from_origin(west, north, (east - west) / width, (north - south) / height)) as dem:
+            dem.write(data, 1)
+        return memory.read()
+
+
+# Local HTTP stand-in for the OpenTopography global DEM API
+class OpenTopography:
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0
+        self.lock = threading.Lock()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                with api.lock:
+                    api.requests.append(query)
+                    api.in_flight += 1
+                    api.max_in_flight = max(api.max_in_flight, api.in_flight)
+                    response = api.responses.pop(0) if api.responses else None
+
+                try:
+                    if api.delay:
+                        time.sleep(api.delay)
+                    if response is None:
+                        body = renderExtent(*(float(query[key]) for key in ('north', 'south', 'east', 'west')))
+                        status, content_type = 200, 'application/octet-stream'
+                    else:
+                        status, content_type, body = response
+
+                    self.send_response(status)
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with api.lock:
+                        api.in_flight -= 1
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/API/globaldem'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    server = OpenTopography()
+    monkeypatch.setattr(module, '_OPENTOPOGRAPHY_URL', server.url)
+    yield server
+    server.close()
+
+
+def test_fetch_single_extent(api, tmp_path):
+    output_dir = str(tmp_path / 'dem.tif')
+
+    fetchDEM(2.0, 1.0, 2.0, 1.0, 'key', output_dir)
+
+    assert len(api.requests) == 1
+    assert api.requests[0]['API_Key'] == 'key'
+    with rasterio.open(output_dir) as dem:
+        assert dem.shape == (20, 20)
+        assert dem.read(1)[0, 0] == pytest.approx(elevation(1.025, 1.975), abs=0.01)
+
+
+def test_fetch_tiled_mosaic(api, tmp_path):
+    output_dir = str(tmp_path / 'dem.tif')
+    north, south, east, west = 6.0, 0.0, 12.0, 0.0
+
+    fetchDEM(north, south, east, west, 'key', output_dir, tiled=True, max_workers=3)
+
+    # The extent is over the area limit of SRTMGL1, so it is fetched in tiles that each fit the limit
+    tiles = module._tileGrid(north, south, east, west, 0.9 * module._DATASET_AREA_LIMITS['SRTMGL1'])
+    assert len(tiles) > 1
+    assert len(api.requests) == len(tiles)
+    for query in api.requests:
+        area = module._bboxArea(*(float(query[key]) for key in ('north', 'south', 'east', 'west')))
+        assert area <= module._DATASET_AREA_LIMITS['SRTMGL1']
+
+    # The mosaic covers the whole extent and follows the terrain across tile edges to within a pixel
+    with rasterio.open(output_dir) as dem:
+        assert dem.bounds.left == pytest.approx(west) and dem.bounds.right == pytest.approx(east)
+        assert dem.bounds.bottom == pytest.approx(south) and dem.bounds.top == pytest.approx(north)
+
+        data = dem.read(1)
+        rows, cols = np.mgrid[0:dem.height, 0:dem.width]
+        lon, lat = rasterio.transform.xy(dem.transform, rows, cols)
+        expected = elevation(np.asarray(lon), np.asarray(lat)).reshape(data.shape)
+
+    assert np.abs(data - expected).max() <= 100 * RESOLUTION + 10 * RESOLUTION
+
+
+def test_fetch_no_data(api, tmp_path):
+    api.responses.append((200, 'text/plain', b'No Data found for the given extent'))
+
+    with pytest.raises(Exception, match='no data for specified extent'):
+        fetchDEM(2.0, 1.0, 2.0, 1.0, 'key', str(tmp_path / 'dem.tif'))
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_fetch_invalid_key(api, tmp_path):
+    api.responses.append((401, 'text/plain', b'Unauthorized'))
+
+    with pytest.raises(Exception, match='API key provided is invalid'):
+        fetchDEM(2.0, 1.0, 2.0, 1.0, 'key', str(tmp_path / 'dem.tif'))
+
+
+def test_cache_keeps_tiles_of_a_failed_fetch(api, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+
+    # The extent covers two grid cells, the second of which fails
+    api.responses += [None, (400, 'text/plain', b'Bad Request')]
+    with pytest.raises(Exception, match='Bad Request'):
+        fetchDEM(2.0, 1.0, 3.0, 1.0, 'key', str(tmp_path / 'dem.tif'), cache_dir=cache_dir, max_workers=1)
+
+    assert len(module._TileCache(cache_dir, 100).manifest) == 1
+
+    # Only the failed cell is requested again
+    fetchDEM(2.0, 1.0, 3.0, 1.0, 'key', str(tmp_path / 'dem.tif'), cache_dir=cache_dir, max_workers=1)
+
+    assert len(api.requests) == 3
+    assert len(module._TileCache(cache_dir, 100).manifest) == 2
+
+
+def test_cache_manifest_shared_between_caches(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first, second = module._TileCache(cache_dir, 1), module._TileCache(cache_dir, 1)
+
+    # Caches loaded before either saves keep each other's tiles
+    for index, cache in enumerate((first, second)):
+        tile_dir = str(tmp_path / f'tile_{index}.tif')
+        with open(tile_dir, 'wb') as tile:
+            tile.write(bytes(600 * 1024))
+        cache.store(f'tile_{index}', 'SRTMGL1', (1.0, 0.0, 1.0, 0.0), tile_dir)
+
+    first.save()
+    second.save()
+
+    # Both tiles count towards the size limit, so the least recently used one is evicted
+    manifest = module._TileCache(cache_dir, 1).manifest
+    assert list(manifest) == ['tile_1']
+    assert sorted(os.listdir(cache_dir)) == ['manifest.json', 'manifest.json.lock', 'tile_1.tif']
+
+
+@pytest.mark.parametrize('response', [(200, 'application/octet-stream', b''),
+                                      (200, 'application/json', b'{"error": "No Data for the requested extent"}'),
+                                      (204, 'text/plain', b'')])
+def test_fetch_no_data_headers(api, tmp_path, response):
+    api.responses.append(response)
+
+    with pytest.raises(Exception, match='no data for specified extent'):
+        fetchDEM(2.0, 1.0, 2.0, 1.0, 'key', str(tmp_path / 'dem.tif'))
+
+
+def test_fetch_unexpected_text_response(api, tmp_path):
+    api.responses.append((200, 'text/html', b'<html>Service temporarily unavailable</html>'))
+
+    with pytest.raises(Exception, match='Unexpected response'):
+        fetchDEM(2.0, 1.0, 2.0, 1.0, 'key', str(tmp_path / 'dem.tif'))
+
+
+def test_fetch_progress(api, tmp_path):
+    output_dir = str(tmp_path / 'dem.tif')
+    calls = []
+
+    fetchDEM(2.0, 1.0, 2.0, 1.0, 'key', output_dir, progress=lambda *args: calls.append(args))
+
+    size = os.path.getsize(output_dir)
+    assert calls[-1][:3] == (output_dir, size, size)
+    assert all(rate >= 0 for *_, rate in calls)
+
+
+def test_tile_retries_are_not_nested(api, tmp_path, monkeypatch):
+    delays = []
+    monkeypatch.setattr(module.time, 'sleep', delays.append)
+    api.responses += [(503, 'text/plain', b'Service Unavailable')] * 10
+
+    with pytest.raises(Exception):
+        fetchDEM(2.0, 1.0, 2.0, 1.0, 'key', str(tmp_path / 'dem.tif'), tiled=True, retries=2)
+
+    # One request per attempt of the tile, with no retries of the HTTP session in between
+    assert len(api.requests) == 3
+    assert delays == [1, 2]
+
+
+def test_batch_bounds_concurrent_requests(api, tmp_path):
+    api.delay = 0.05
+    regions = [(6.0, 0.0, 12.0, 0.0), {'north': 6.0, 'south': 0.0, 'east': -6.0, 'west': -18.0}, (1.0, 0.0, 1.0, 0.0), ('not', 'a', 'region')]
+
+    results = fetchDEMBatch(regions, 'key', str(tmp_path), max_concurrency=2, tiled=True)
+
+    # Tiled regions share the limit with every other region instead of opening their own pools
+    assert api.max_in_flight <= 2
+    assert len(api.requests) > 4
+    assert [result['error'] is None for result in results] == [True, True, True, False]
+    for result in results[:3]:
+        with rasterio.open(result['output_dir']) as dem:
+            assert dem.count == 1
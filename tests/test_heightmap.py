@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pytest
+
+from BlenderMapDEM import buildOverviews, geotiffToHeightmap
+
+
+# A sloping DEM whose top left corner is 'nodata'
+def cornerDEM(writeDEM, nodata=-9999, dtype='float32', **options):
+    rows, cols = np.mgrid[0:60, 0:90]
+    data = (100 + cols + 2 * rows).astype(dtype)
+    data[:20, :30] = nodata
+    return writeDEM(data, nodata=nodata, **options)
+
+
+def readMetadata(heightmap_dir: str) -> dict:
+    with open(heightmap_dir.replace('.npy', '.json')) as metadata:
+        return json.load(metadata)
+
+
+@pytest.mark.parametrize('nodata', [-9999, np.nan])
+@pytest.mark.parametrize('max_size', [None, 45])
+def test_range_leaves_out_nodata(writeDEM, tmp_path, nodata, max_size):
+    dem_dir = cornerDEM(writeDEM, nodata, tiled=True, blockxsize=16, blockysize=16)
+    if max_size is not None:
+        buildOverviews(dem_dir, factors=[2])
+    heightmap_dir = str(tmp_path / 'heightmap.npy')
+
+    geotiffToHeightmap(dem_dir, heightmap_dir, max_size=max_size)
+
+    heights = np.load(heightmap_dir)
+    step = 1 if max_size is None else 2
+    assert heights.shape == (60 // step, 90 // step)
+
+    # 'nodata' pixels are kept in the heightmap as they are, and the range is that of the other pixels
+    invalid = np.zeros(heights.shape, dtype=bool)
+    invalid[:20 // step, :30 // step] = True
+    assert (np.isnan(heights) if np.isnan(nodata) else heights == nodata)[invalid].all()
+
+    metadata = readMetadata(heightmap_dir)
+    assert metadata['nodata'] == pytest.approx(nodata, nan_ok=True)
+    assert (metadata['min'], metadata['max']) == (heights[~invalid].min(), heights[~invalid].max())
+    assert metadata['min'] >= 130
+
+
+def test_all_nodata_dem_is_rejected(writeDEM, tmp_path):
+    dem_dir = writeDEM(np.full((20, 20), -9999, dtype='int16'), nodata=-9999)
+
+    with pytest.raises(ValueError, match='no valid'):
+        geotiffToHeightmap(dem_dir, str(tmp_path / 'heightmap.npy'))
+
+
+@pytest.mark.parametrize('nodata', [-9999, np.nan])
+@pytest.mark.parametrize('chunk_pixels', [2**20, 7 * 90])
+def test_loaded_heightmap_places_nodata_at_minimum(renderModule, writeDEM, tmp_path, monkeypatch, nodata, chunk_pixels):
+    dem_dir = cornerDEM(writeDEM, nodata)
+    heightmap_dir = str(tmp_path / 'heightmap.npy')
+    geotiffToHeightmap(dem_dir, heightmap_dir)
+
+    # Scaled at once, or 7 rows at a time with a shorter last chunk
+    monkeypatch.setattr(renderModule, '_HEIGHTMAP_CHUNK_PIXELS', chunk_pixels)
+
+    image = renderModule._loadHeightmap(heightmap_dir)
+
+    # Blender is given RGBA pixels from the bottom row up, scaled to 0-1 by the valid range
+    pixels = image.pixels.foreach_set.call_args[0][0].reshape(60, 90, 4)[::-1]
+    assert (pixels[:, :, 3] == 1).all()
+    assert (pixels[:, :, 0] == pixels[:, :, 2]).all()
+
+    rows, cols = np.mgrid[0:60, 0:90]
+    expected = (cols + 2 * rows - 30) / (89 + 2 * 59 - 30)
+    expected[:20, :30] = 0
+    np.testing.assert_allclose(pixels[:, :, 0], expected, atol=1e-6)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import rasterio
+
+import BlenderMapDEM.BlenderMapDEM as module
+from BlenderMapDEM import hillshadeDEM
+
+
+def test_hillshade_lights_north_west_slopes(writeDEM, tmp_path):
+    # A ridge running north-south, sloping down to the west on the left and to the east on the right
+    cols = np.arange(64)
+    data = np.tile(1000 - 20 * np.abs(cols - 32), (64, 1)).astype('float32')
+    output_dir = str(tmp_path / 'shade.tif')
+
+    hillshadeDEM(writeDEM(data), output_dir, tile_size=16, num_threads=2)
+
+    with rasterio.open(output_dir) as shade:
+        values = shade.read(1)
+    assert values[32, 10] > values[32, 50]
+
+
+def test_hillshade_closes_files_when_a_tile_fails(writeDEM, tmp_path, monkeypatch):
+    dem_dir = writeDEM(np.zeros((32, 32), dtype='float32'))
+    datasets = []
+    original_open = module.rasterio.open
+
+    def recordingOpen(*args, **kwargs):
+        datasets.append(original_open(*args, **kwargs))
+        return datasets[-1]
+
+    def failingShade(elevation, *args):
+        raise RuntimeError('shading failed')
+
+    monkeypatch.setattr(module.rasterio, 'open', recordingOpen)
+    monkeypatch.setattr(module, '_shadeTile', failingShade)
+
+    with pytest.raises(RuntimeError, match='shading failed'):
+        hillshadeDEM(dem_dir, str(tmp_path / 'shade.tif'), tile_size=16, num_threads=2)
+
+    assert len(datasets) == 2
+    assert all(dataset.closed for dataset in datasets)
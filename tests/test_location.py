@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import BlenderMapDEM.BlenderMapDEM as module
+from BlenderMapDEM import locationBounds
+
+
+# Local HTTP stand-in for the Nominatim search API, answering every query but 'nowhere' with the same bounding box
+class Nominatim:
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)['q'][0]
+                with api.lock:
+                    api.requests.append((query, time.monotonic()))
+
+                results = [] if query == 'nowhere' else [{'boundingbox': ['13.0', '13.4', '-59.7', '-59.4']}]
+                body = json.dumps(results).encode()
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/search'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def nominatim(monkeypatch, tmp_path):
+    server = Nominatim()
+    monkeypatch.setattr(module, '_NOMINATIM_URL', server.url)
+    monkeypatch.setattr(module, '_nominatim_limiter', module._RateLimiter(module._NOMINATIM_INTERVAL))
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    yield server
+    server.close()
+
+
+def test_lookup_is_cached(nominatim, tmp_path):
+    bounds = locationBounds('Barbados')
+
+    assert bounds == {'north': 13.4, 'south': 13.0, 'east': -59.4, 'west': -59.7}
+    assert os.path.exists(tmp_path / 'cache' / 'BlenderMapDEM' / 'geocode.sqlite')
+
+    # Differences in case and spacing share the cached entry
+    assert locationBounds('  barbados ') == bounds
+    assert [query for query, _ in nominatim.requests] == ['barbados']
+
+
+def test_uncached_lookups_request_every_time(nominatim):
+    locationBounds('Barbados', use_cache=False)
+    locationBounds('Barbados', use_cache=False)
+
+    assert len(nominatim.requests) == 2
+
+
+def test_expired_entry_is_looked_up_again(nominatim, monkeypatch):
+    locationBounds('Barbados', cache_ttl=60)
+    locationBounds('Barbados', cache_ttl=60)
+    assert len(nominatim.requests) == 1
+
+    later = time.time() + 120
+    monkeypatch.setattr(module.time, 'time', lambda: later)
+    locationBounds('Barbados', cache_ttl=60)
+
+    assert len(nominatim.requests) == 2
+
+
+def test_requests_are_spaced_a_second_apart(nominatim):
+    threads = [threading.Thread(target=locationBounds, args=(name,)) for name in ('Barbados', 'Montreal', 'Lisbon')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    times = sorted(arrival for _, arrival in nominatim.requests)
+    assert len(times) == 3
+    assert all(later - earlier >= 0.95 for earlier, later in zip(times, times[1:]))
+
+
+def test_unknown_location_is_not_cached(nominatim):
+    for _ in range(2):
+        with pytest.raises(AttributeError):
+            locationBounds('Nowhere')
+
+    assert len(nominatim.requests) == 2
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from BlenderMapDEM import terrainMesh
+
+
+# Smooth hills with some noise, so the mesh is dense in places and sparse in others
+def hills(height, width, seed=0):
+    rows, cols = np.mgrid[0:height, 0:width]
+    noise = np.random.default_rng(seed).normal(0, 0.3, (height, width))
+    return (40 * np.sin(rows / 9) * np.cos(cols / 13) + 0.5 * cols + noise + 100).astype('float32')
+
+
+def loadMesh(path):
+    with np.load(path) as mesh:
+        return {name: mesh[name] for name in mesh.files}
+
+
+# Largest difference between the DEM and the mesh over every pixel, and the area covered by the triangles in pixels
+def rasterise(data, mesh):
+    corners = mesh['pixels'][mesh['faces']].astype('float64')
+    heights = mesh['vertices'][:, 2][mesh['faces']]
+
+    worst, area = 0.0, 0.0
+    for (a, b, c), (za, zb, zc) in zip(corners, heights):
+        # Twice the signed area, positive for triangles wound counter-clockwise seen from above (rows run southwards)
+        double_area = (b[0] - a[0]) * (a[1] - c[1]) - (c[0] - a[0]) * (a[1] - b[1])
+        assert double_area > 0
+        area += double_area / 2
+
+        cols, rows = np.meshgrid(np.arange(min(a[0], b[0], c[0]), max(a[0], b[0], c[0]) + 1),
+                                 np.arange(min(a[1], b[1], c[1]), max(a[1], b[1], c[1]) + 1))
+        cols, rows = cols.ravel(), rows.ravel()
+
+        # Barycentric weights of the pixels in the triangle's bounding box
+        weight_b = ((cols - a[0]) * (a[1] - c[1]) - (c[0] - a[0]) * (a[1] - rows)) / double_area
+        weight_c = ((b[0] - a[0]) * (a[1] - rows) - (cols - a[0]) * (a[1] - b[1])) / double_area
+        weight_a = 1 - weight_b - weight_c
+        inside = (weight_a >= -1e-9) & (weight_b >= -1e-9) & (weight_c >= -1e-9)
+
+        interpolated = weight_a * za + weight_b * zb + weight_c * zc
+        errors = np.abs(interpolated[inside] - data[rows[inside].astype(int), cols[inside].astype(int)])
+        worst = max(worst, float(errors.max()))
+
+    return worst, area
+
+
+@pytest.mark.parametrize('height, width', [(37, 53), (64, 64), (65, 65), (100, 7)])
+@pytest.mark.parametrize('max_error', [0, 0.5, 2])
+def test_mesh_error_is_bounded_and_covers_the_dem(writeDEM, tmp_path, height, width, max_error):
+    data = hills(height, width)
+    mesh_dir = str(tmp_path / 'mesh.npz')
+
+    info = terrainMesh(writeDEM(data), mesh_dir, max_error=max_error)
+    mesh = loadMesh(mesh_dir)
+
+    worst, area = rasterise(data.astype('float64'), mesh)
+    assert worst <= max_error + 1e-3
+    assert area == (height - 1) * (width - 1)
+
+    assert info['triangles'] == len(mesh['faces'])
+    assert info['vertices'] == len(mesh['vertices'])
+    assert info['full_triangles'] == 2 * (height - 1) * (width - 1)
+    assert tuple(mesh['shape']) == (height, width)
+
+
+def test_larger_errors_need_fewer_triangles(writeDEM, tmp_path):
+    dem_dir = writeDEM(hills(65, 65))
+
+    counts = [terrainMesh(dem_dir, str(tmp_path / f'mesh_{max_error}.npz'), max_error=max_error)['triangles'] for max_error in (0, 0.5, 2, 10)]
+
+    assert counts == sorted(counts, reverse=True)
+    assert counts[-1] < counts[0] / 4
+
+
+@pytest.mark.parametrize('surface', ['flat', 'planar'])
+def test_planar_dem_is_two_triangles(writeDEM, tmp_path, surface):
+    rows, cols = np.mgrid[0:65, 0:65]
+    data = np.full((65, 65), 250, dtype='float32') if surface == 'flat' else (3 * cols - 2 * rows + 250).astype('float32')
+
+    info = terrainMesh(writeDEM(data), str(tmp_path / 'mesh.npz'), max_error=0)
+
+    assert info == {'vertices': 4, 'triangles': 2, 'full_triangles': 2 * 64 * 64}
+
+
+def test_flat_dem_of_any_shape_is_split_only_along_its_edges(writeDEM, tmp_path):
+    data = np.full((37, 53), 250, dtype='float32')
+    mesh_dir = str(tmp_path / 'mesh.npz')
+
+    info = terrainMesh(writeDEM(data), mesh_dir, max_error=0)
+
+    assert rasterise(data.astype('float64'), loadMesh(mesh_dir)) == (0, 36 * 52)
+    assert info['triangles'] < info['full_triangles'] / 10
+
+
+def test_nodata_pixels_are_left_out_of_the_elevation_range(writeDEM, tmp_path):
+    data = hills(40, 40)
+    data[:8, :8] = -9999
+    data[20, 20] = np.nan
+    mesh_dir = str(tmp_path / 'mesh.npz')
+
+    terrainMesh(writeDEM(data, nodata=-9999), mesh_dir, max_error=0.5)
+    mesh = loadMesh(mesh_dir)
+
+    valid = data[(data != -9999) & np.isfinite(data)]
+    np.testing.assert_allclose(mesh['elevation_range'], [valid.min(), valid.max()])
+    assert np.isfinite(mesh['vertices']).all()
+    assert mesh['vertices'][:, 2].min() == pytest.approx(valid.min())
+
+
+def test_dem_without_valid_pixels_is_rejected(writeDEM, tmp_path):
+    with pytest.raises(ValueError, match='no valid'):
+        terrainMesh(writeDEM(np.full((8, 8), -9999, dtype='float32'), nodata=-9999), str(tmp_path / 'mesh.npz'))
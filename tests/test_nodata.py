@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+import rasterio
+
+from BlenderMapDEM import describeDEM, fixNoData
+
+
+# A tiled DEM of several blocks with a band of 'nodata' pixels, NaN nodata marks them with NaN
+def blockDEM(writeDEM, name, nodata):
+    rows, cols = np.mgrid[0:80, 0:96]
+    data = (rows * 96 + cols + 1).astype('float32')
+    data[30:40, :] = np.nan if nodata is not None and np.isnan(nodata) else (nodata if nodata is not None else -5)
+    return writeDEM(data, name=name, nodata=nodata, tiled=True, blockxsize=16, blockysize=16)
+
+
+@pytest.mark.parametrize('nodata', [-9999, np.nan, None])
+@pytest.mark.parametrize('num_threads', [1, 4])
+def test_streaming_matches_in_memory(writeDEM, nodata, num_threads):
+    in_memory = blockDEM(writeDEM, 'in_memory.tif', nodata)
+    streamed = blockDEM(writeDEM, 'streamed.tif', nodata)
+
+    fixNoData(in_memory, 0)
+    fixNoData(streamed, 0, streaming=True, num_threads=num_threads)
+
+    with rasterio.open(in_memory) as expected, rasterio.open(streamed) as result:
+        assert result.nodata == expected.nodata == 0
+        np.testing.assert_array_equal(result.read(), expected.read())
+
+        # Unless there was no 'nodata' to replace, the band of 'nodata' pixels is now 0
+        data = result.read(1)
+        assert np.all(data[30:40] == (-5 if nodata is None else 0))
+        assert not np.isnan(data).any()
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_fix_nodata_clears_stored_statistics(writeDEM, streaming):
+    path = blockDEM(writeDEM, 'dem.tif', -9999)
+    describeDEM(path)
+    with rasterio.open(path) as dem:
+        assert any(key.startswith('STATISTICS_') for key in dem.tags(1))
+
+    fixNoData(path, 0, streaming=streaming, num_threads=2)
+
+    with rasterio.open(path) as dem:
+        assert not any(key.startswith('STATISTICS_') for key in dem.tags(1))
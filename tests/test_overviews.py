@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+import rasterio
+
+from BlenderMapDEM import buildOverviews, describeDEM
+from BlenderMapDEM.BlenderMapDEM import _decimatedDEM
+
+
+def rampDEM(writeDEM, height=600, width=1000):
+    rows, cols = np.mgrid[0:height, 0:width]
+    return writeDEM((cols + rows).astype('float32'), tiled=True, blockxsize=256, blockysize=256)
+
+
+def test_default_overviews_halve_down_to_256_pixels(writeDEM):
+    dem_dir = rampDEM(writeDEM)
+
+    buildOverviews(dem_dir)
+
+    with rasterio.open(dem_dir) as dem:
+        assert dem.overviews(1) == [2, 4]
+        assert dem.tags(ns='rio_overview')['resampling'] == 'average'
+    assert not os.path.exists(dem_dir + '.ovr')
+
+
+def test_external_overviews_of_given_factors(writeDEM):
+    dem_dir = rampDEM(writeDEM)
+
+    buildOverviews(dem_dir, factors=[8, 3], resampling='nearest', external=True)
+
+    assert os.path.exists(dem_dir + '.ovr')
+    with rasterio.open(dem_dir) as dem:
+        assert dem.overviews(1) == [3, 8]
+
+
+def test_decimated_read_fits_max_size(writeDEM):
+    dem_dir = rampDEM(writeDEM)
+    buildOverviews(dem_dir)
+
+    with rasterio.open(dem_dir) as dem:
+        with _decimatedDEM(dem, max_size=250) as decimated:
+            assert decimated.shape == (150, 250)
+            assert decimated.bounds == pytest.approx(dem.bounds)
+
+        # A DEM already fitting max_size is used as it is
+        with _decimatedDEM(dem, max_size=2000) as decimated:
+            assert decimated is dem
+
+
+def test_describe_with_max_size_does_not_store_statistics(writeDEM):
+    dem_dir = rampDEM(writeDEM)
+    buildOverviews(dem_dir)
+
+    approximate = describeDEM(dem_dir, max_size=250)
+    with rasterio.open(dem_dir) as dem:
+        assert not any(key.startswith('STATISTICS_') for key in dem.tags(1))
+
+    # Statistics of the full resolution DEM are stored, and the approximate ones are close to them
+    exact = describeDEM(dem_dir)
+    with rasterio.open(dem_dir) as dem:
+        assert any(key.startswith('STATISTICS_') for key in dem.tags(1))
+    assert approximate['mean_elevation'] == pytest.approx(exact['mean_elevation'], rel=0.01)
@@ -0,0 +1,61 @@
+import json
+import shutil
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from BlenderMapDEM import Pipeline, clipDEM, fixNoData, reprojectDEM
+
+
+# A DEM over longitudes and latitudes 0-1 with a corner of 'nodata' pixels
+def cornerDEM(writeDEM):
+    rows, cols = np.mgrid[0:100, 0:100]
+    data = (1000 + 5 * cols - 3 * rows).astype('float32')
+    data[:20, :20] = -9999
+    return writeDEM(data, nodata=-9999, crs='EPSG:4326', transform=from_origin(0.0, 1.0, 0.01, 0.01))
+
+
+# A square in Web Mercator meters around the middle of the DEM, partly over the 'nodata' corner
+def squareGeometry(tmp_path):
+    west, south, size = 10000.0, 40000.0, 60000.0
+    square = {'type': 'Polygon', 'coordinates': [[[west, south], [west + size, south], [west + size, south + size], [west, south + size], [west, south]]]}
+    geometry_dir = str(tmp_path / 'square.geojson')
+    with open(geometry_dir, 'w') as geometry:
+        json.dump({'type': 'FeatureCollection', 'features': [{'type': 'Feature', 'properties': {}, 'geometry': square}]}, geometry)
+    return geometry_dir
+
+
+@pytest.mark.parametrize('crop', [True, False])
+def test_pipeline_matches_path_functions(writeDEM, tmp_path, crop):
+    dem_dir = cornerDEM(writeDEM)
+    geometry_dir = squareGeometry(tmp_path)
+
+    # Path functions, each writing its output to disk
+    fixed_dir = str(tmp_path / 'fixed.tif')
+    shutil.copy(dem_dir, fixed_dir)
+    fixNoData(fixed_dir, 0)
+    reprojectDEM(fixed_dir, '3857', str(tmp_path / 'reprojected.tif'))
+    clipDEM(str(tmp_path / 'reprojected.tif'), geometry_dir, str(tmp_path / 'path.tif'), crop=crop)
+
+    Pipeline(dem_dir).fixNoData().reprojectDEM('3857').clipDEM(geometry_dir, crop=crop).save(str(tmp_path / 'pipeline.tif'))
+
+    with rasterio.open(tmp_path / 'path.tif') as expected, rasterio.open(tmp_path / 'pipeline.tif') as result:
+        assert result.crs == expected.crs
+        assert result.transform.almost_equals(expected.transform)
+        assert result.shape == expected.shape
+        assert result.nodata == expected.nodata == 0
+        assert result.dtypes == expected.dtypes
+        np.testing.assert_array_equal(result.read(), expected.read())
+
+        # The clip kept both terrain and the 'nodata' corner
+        data = result.read(1)
+        assert (data > 0).any() and (data == 0).any()
+
+
+def test_pipeline_clip_rejects_invalid_geometry_path(writeDEM):
+    pipeline = Pipeline(cornerDEM(writeDEM))
+
+    with pytest.raises(ValueError, match='invalid characters'):
+        pipeline.clipDEM('shapes/área*.geojson')
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+import rasterio
+
+import BlenderMapDEM.BlenderMapDEM as module
+from BlenderMapDEM import plotDEM
+
+
+@pytest.fixture
+def shown(monkeypatch):
+    calls = []
+    monkeypatch.setattr(module.plt, 'show', lambda *args, **kwargs: calls.append(kwargs))
+    yield calls
+    module.plt.close('all')
+
+
+def test_histogram_skips_nan_and_nodata(writeDEM):
+    data = np.arange(400, dtype='float32').reshape(20, 20)
+    data[0, :5] = np.nan
+    data[1, :5] = -9999
+    data[2, :5] = np.inf
+    path = writeDEM(data, nodata=-9999)
+
+    with rasterio.open(path) as dem:
+        counts, edges = module._blockHistogram(dem, bins=10)
+
+    assert counts.sum() == 400 - 15
+    assert edges[0] == 5 and edges[-1] == 399
+
+
+def test_plot_shows_figures_only_with_histogram(writeDEM, shown):
+    data = np.arange(400, dtype='float32').reshape(20, 20)
+    data[0, 0] = np.nan
+    path = writeDEM(data, nodata=-9999)
+
+    plotDEM(path, histogram=False)
+    assert shown == []
+
+    plotDEM(path, histogram=True)
+    assert shown == [{'block': True}]
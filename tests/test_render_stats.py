@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+
+import pytest
+
+from BlenderMapDEM import RenderStats, renderDEM
+
+# Blender output recorded from Cycles renders
+LOGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+
+
+def readLog(name):
+    with open(os.path.join(LOGS, name)) as log:
+        return log.read()
+
+
+def test_stats_of_a_denoised_render():
+    stats = RenderStats.fromLog(readLog('cycles_denoise.log'))
+
+    assert stats.phases == pytest.approx({'sync': 1.18, 'tessellation': 4.0, 'bvh': 3.0, 'sampling': 16.0, 'denoising': 1.25})
+    assert stats.peak_memory == pytest.approx(2.25 * 1024)
+    assert stats.device_peak_memory == pytest.approx(1.98 * 1024)
+    assert (stats.samples, stats.total_samples) == (16, 16)
+    assert stats.samples_per_second == pytest.approx(1.0)
+    assert stats.total_time == pytest.approx(25.91)
+    assert stats.saving_time == pytest.approx(0.38)
+    assert stats.phase is None
+
+
+def test_stats_without_device_memory():
+    stats = RenderStats.fromLog(readLog('cycles_no_device_memory.log'))
+
+    assert stats.phases == pytest.approx({'sync': 0.89, 'tessellation': 2.5, 'bvh': 1.8, 'sampling': 4.0, 'denoising': 0.0})
+    assert stats.peak_memory == pytest.approx(801.75)
+    assert stats.device_peak_memory == 0
+    assert (stats.samples, stats.total_samples) == (5, 5)
+    assert stats.total_time == pytest.approx(9.31)
+    assert stats.saving_time is None
+    assert stats.phase is None
+
+
+def test_parse_line_tells_status_lines_apart():
+    stats = RenderStats()
+
+    assert stats.parseLine('Fra:1 Mem:12.00M (Peak 12.50M) | Time:01:02.50 | Remaining:00:30.00 | Mem:4.00M, Peak:4.00M | Scene, ViewLayer | Sample 3/10')
+    assert not stats.parseLine("Saved: '/tmp/render.png'")
+    assert not stats.parseLine('Blender quit')
+
+    assert stats.phase == 'sampling'
+    assert stats.elapsed == pytest.approx(62.5)
+    assert (stats.samples, stats.total_samples) == (3, 10)
+    assert stats.peak_memory == pytest.approx(12.5)
+
+
+def test_render_reports_progress(blender, demImage, tmp_path, monkeypatch, capfd):
+    monkeypatch.setenv('FAKE_BLENDER_LOG', os.path.join(LOGS, 'cycles_denoise.log'))
+    output_dir = str(tmp_path / 'render.png')
+    calls = []
+
+    stats = renderDEM(blender, demImage, output_dir, samples=16, progress=lambda *args: calls.append(args))
+
+    assert len(calls) == 18
+    assert all(call[0] == output_dir for call in calls)
+    assert [call[1] for call in calls[:2]] == ['sync', 'sync']
+    assert calls[-3][1:] == ('sampling', 16, 16, pytest.approx(24.23))
+    assert calls[-2][1] == 'denoising'
+    assert calls[-1][1:] == (None, 16, 16, pytest.approx(25.48))
+
+    assert stats.total_time == pytest.approx(25.91)
+    assert stats.seconds > 0
+    with open(output_dir) as render:
+        assert json.load(render)['samples'] == 16
+
+    # Blender's output is left to the progress function
+    assert 'Sample 16/16' not in capfd.readouterr().out
+
+
+def test_render_prints_output_without_progress(blender, demImage, tmp_path, monkeypatch, capfd):
+    monkeypatch.setenv('FAKE_BLENDER_LOG', os.path.join(LOGS, 'cycles_denoise.log'))
+
+    renderDEM(blender, demImage, str(tmp_path / 'render.png'))
+
+    output = capfd.readouterr().out
+    assert 'Scene, ViewLayer | Finished' in output
+    assert 'Blender quit' in output
+
+
+def test_failed_render_raises_output_tail(blender, demImage, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BLENDER_LOG', os.path.join(LOGS, 'cycles_denoise.log'))
+
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        renderDEM(blender, demImage, str(tmp_path / 'crash.png'), progress=lambda *args: None)
+
+    assert error.value.returncode == 3
+    assert 'Scene, ViewLayer | Finished' in error.value.stderr
+    assert error.value.output == error.value.stderr
@@ -0,0 +1,133 @@
+import json
+
+import numpy as np
+import pytest
+import rasterio
+from fiona.transform import transform_geom
+from rasterio.transform import from_origin
+from rasterio.warp import Resampling, calculate_default_transform, reproject
+from rasterio.windows import Window
+
+import BlenderMapDEM.BlenderMapDEM as module
+from BlenderMapDEM import clipDEM, reprojectClipDEM, reprojectDEM
+
+
+# A DEM in longitudes and latitudes near the equator, with a width that is not a multiple of the output block size
+def equatorDEM(writeDEM, width=1001, height=700):
+    rows, cols = np.mgrid[0:height, 0:width]
+    data = (1000 + 3 * cols - 2 * rows + 50 * np.sin(cols / 40)).astype('float32')
+    return writeDEM(data, crs='EPSG:4326', transform=from_origin(10.0, 2.0, 0.001, 0.001))
+
+
+# A square geometry file in the given crs, written as GeoJSON
+def squareGeometry(tmp_path, west, south, size, name='square.geojson'):
+    square = {'type': 'Polygon', 'coordinates': [[[west, south], [west + size, south], [west + size, south + size], [west, south + size], [west, south]]]}
+    geometry_dir = str(tmp_path / name)
+    with open(geometry_dir, 'w') as geometry:
+        json.dump({'type': 'FeatureCollection', 'features': [{'type': 'Feature', 'properties': {}, 'geometry': square}]}, geometry)
+    return geometry_dir
+
+
+# The whole DEM reprojected at once, as the written output should be
+def reprojectAtOnce(dem_dir, crs='EPSG:3857'):
+    with rasterio.open(dem_dir) as dem:
+        transform, width, height = calculate_default_transform(dem.crs, crs, dem.width, dem.height, *dem.bounds)
+        expected = np.zeros((height, width), dtype='float32')
+        reproject(dem.read(1), expected, src_transform=dem.transform, src_crs=dem.crs, dst_transform=transform, dst_crs=crs,
+                  dst_nodata=0, resampling=Resampling.nearest)
+    return expected, transform
+
+
+def test_strips_fit_the_warp_memory_limit(writeDEM, tmp_path, monkeypatch):
+    dem_dir = equatorDEM(writeDEM)
+    windows = []
+
+    # Record the windows written strip by strip
+    class RecordingVRT(module.WarpedVRT):
+        def read(self, *args, window=None, **kwargs):
+            windows.append(window)
+            return super().read(*args, window=window, **kwargs)
+
+    monkeypatch.setattr(module, 'WarpedVRT', RecordingVRT)
+    output_dir = str(tmp_path / 'reprojected.tif')
+    reprojectDEM(dem_dir, '3857', output_dir, warp_mem_limit=1)
+
+    expected, transform = reprojectAtOnce(dem_dir)
+    height, width = expected.shape
+
+    # Strips span full rows, stay under 1 MB, and cover the output exactly once
+    assert len(windows) > 1
+    assert all(window.col_off == 0 and window.width == width for window in windows)
+    assert all(window.height * width * 4 <= 1024 * 1024 for window in windows)
+    assert [window.row_off for window in windows] == list(np.cumsum([0] + [window.height for window in windows[:-1]]))
+    assert sum(window.height for window in windows) == height
+
+    with rasterio.open(output_dir) as output:
+        assert output.transform.almost_equals(transform)
+        np.testing.assert_array_equal(output.read(1), expected)
+
+
+def test_lazy_reprojection_matches_written_output(writeDEM, tmp_path):
+    dem_dir = equatorDEM(writeDEM, 300, 200)
+    output_dir = str(tmp_path / 'reprojected.tif')
+    reprojectDEM(dem_dir, '3857', output_dir)
+
+    with rasterio.open(output_dir) as written:
+        expected = written.read(1)
+
+        with reprojectDEM(dem_dir, 3857, lazy=True) as lazy:
+            assert lazy.crs == written.crs
+            assert lazy.transform.almost_equals(written.transform)
+            assert lazy.shape == written.shape
+            assert lazy.nodata == written.nodata == 0
+            np.testing.assert_array_equal(lazy.read(1), expected)
+
+            # Windows are warped on their own to the same values
+            window = Window(37, 51, 120, 90)
+            np.testing.assert_array_equal(lazy.read(1, window=window), expected[window.toslices()])
+
+            source = lazy.src_dataset
+
+    # Closing the virtual dataset closes the input .geotiff it opened
+    assert source.closed
+
+
+def test_lazy_reprojection_can_be_clipped(writeDEM, tmp_path):
+    dem_dir = equatorDEM(writeDEM, 300, 200)
+    reprojectDEM(dem_dir, '3857', str(tmp_path / 'reprojected.tif'))
+    geometry_dir = squareGeometry(tmp_path, 1130000.0, 200000.0, 10000.0)
+
+    clipDEM(str(tmp_path / 'reprojected.tif'), geometry_dir, str(tmp_path / 'written.tif'))
+    with reprojectDEM(dem_dir, '3857', lazy=True) as lazy:
+        clipDEM(lazy, geometry_dir, str(tmp_path / 'lazy.tif'))
+
+    with rasterio.open(tmp_path / 'written.tif') as expected, rasterio.open(tmp_path / 'lazy.tif') as result:
+        assert result.transform.almost_equals(expected.transform)
+        assert (result.read(1) > 0).any()
+        np.testing.assert_array_equal(result.read(), expected.read())
+
+
+@pytest.mark.parametrize('crop', [True, False])
+def test_reproject_clip_matches_reproject_then_clip(writeDEM, tmp_path, crop):
+    dem_dir = equatorDEM(writeDEM, 300, 200)
+
+    # The same square in longitudes and latitudes for reprojectClipDEM(), and in Web Mercator for clipDEM() of the reprojected DEM
+    geographic_dir = squareGeometry(tmp_path, 10.05, 1.85, 0.1, name='geographic.geojson')
+    with open(geographic_dir) as geometry:
+        square = json.load(geometry)['features'][0]['geometry']
+    mercator = dict(transform_geom('EPSG:4326', 'EPSG:3857', square))
+    mercator_dir = str(tmp_path / 'mercator.geojson')
+    with open(mercator_dir, 'w') as geometry:
+        json.dump({'type': 'FeatureCollection', 'features': [{'type': 'Feature', 'properties': {}, 'geometry': mercator}]}, geometry)
+
+    reprojectDEM(dem_dir, '3857', str(tmp_path / 'reprojected.tif'))
+    clipDEM(str(tmp_path / 'reprojected.tif'), mercator_dir, str(tmp_path / 'two_passes.tif'), crop=crop)
+    reprojectClipDEM(dem_dir, '3857', geographic_dir, str(tmp_path / 'one_pass.tif'), crop=crop)
+
+    with rasterio.open(tmp_path / 'two_passes.tif') as expected, rasterio.open(tmp_path / 'one_pass.tif') as result:
+        assert result.crs == expected.crs
+        assert result.transform.almost_equals(expected.transform)
+        assert result.shape == expected.shape
+        assert result.nodata == expected.nodata
+        np.testing.assert_array_equal(result.read(), expected.read())
+        assert (result.read(1) > 0).any()
@@ -0,0 +1,66 @@
+import json
+import subprocess
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from BlenderMapDEM import RenderScheduler
+
+
+def test_scheduler_renders_with_thread_share(blender, demImage, tmp_path):
+    with RenderScheduler(blender, max_renders=2, threads=1) as scheduler:
+        futures = [scheduler.submit(demImage, str(tmp_path / f'render_{index}.png'), samples=index + 1) for index in range(3)]
+        results = [future.result(timeout=60) for future in futures]
+
+    for index, result in enumerate(results):
+        assert result['returncode'] == 0
+        assert result['output_dir'] == str(tmp_path / f'render_{index}.png')
+        assert 'Threads: 1' in result['stdout']
+        with open(result['output_dir']) as render:
+            assert json.load(render)['samples'] == index + 1
+
+
+def test_scheduler_raises_exit_code(blender, demImage, tmp_path):
+    with RenderScheduler(blender, max_renders=1) as scheduler:
+        future = scheduler.submit(demImage, str(tmp_path / 'crash.png'))
+
+        with pytest.raises(subprocess.CalledProcessError) as error:
+            future.result(timeout=60)
+
+    assert error.value.returncode == 3
+
+
+def test_scheduler_kills_render_past_timeout(blender, demImage, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BLENDER_SECONDS', '30')
+    start = time.perf_counter()
+
+    with RenderScheduler(blender, max_renders=1, timeout=1.0) as scheduler:
+        future = scheduler.submit(demImage, str(tmp_path / 'render.png'))
+
+        with pytest.raises(subprocess.TimeoutExpired):
+            future.result(timeout=60)
+
+    assert time.perf_counter() - start < 15
+
+
+def test_scheduler_shutdown_cancels_renders(blender, demImage, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BLENDER_SECONDS', '30')
+    scheduler = RenderScheduler(blender, max_renders=1)
+    futures = [scheduler.submit(demImage, str(tmp_path / f'render_{index}.png')) for index in range(3)]
+
+    # Wait for the first render to start before cancelling
+    deadline = time.monotonic() + 15
+    while not scheduler._processes and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    start = time.perf_counter()
+    scheduler.shutdown(cancel=True)
+    assert time.perf_counter() - start < 15
+
+    # The running render is killed and the queued renders never start
+    with pytest.raises(subprocess.CalledProcessError):
+        futures[0].result()
+    for future in futures[1:]:
+        with pytest.raises(CancelledError):
+            future.result()
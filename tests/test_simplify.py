@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import rasterio
+
+from BlenderMapDEM import buildOverviews, simplifyDEM
+
+
+# A sloping DEM whose left columns are 'nodata'
+def slopeDEM(writeDEM, nodata=-9999, dtype='float32', **options):
+    rows, cols = np.mgrid[0:128, 0:160]
+    data = (1000 + 10 * cols + rows).astype(dtype)
+    data[:, :50] = nodata
+    return writeDEM(data, nodata=nodata, **options)
+
+
+def test_decimated_geotiff_keeps_georeferencing_and_dtype(writeDEM, tmp_path):
+    rows, cols = np.mgrid[0:100, 0:80]
+    dem_dir = writeDEM((cols + rows).astype('int16'))
+    output_dir = str(tmp_path / 'simplified.tif')
+
+    simplifyDEM(dem_dir, output_dir, reduction_factor=4, resampling='average')
+
+    with rasterio.open(dem_dir) as dem, rasterio.open(output_dir) as simplified:
+        assert simplified.shape == (25, 20)
+        assert simplified.dtypes == ('int16',)
+        assert simplified.crs == dem.crs
+        assert simplified.res == (4 * dem.res[0], 4 * dem.res[1])
+        assert simplified.bounds == dem.bounds
+
+
+@pytest.mark.parametrize('resampling', ['cubic', 'bilinear', 'average', 'lanczos'])
+@pytest.mark.parametrize('nodata', [-9999, np.nan])
+@pytest.mark.parametrize('overviews', [False, True])
+def test_nodata_is_not_resampled_into_elevations(writeDEM, tmp_path, resampling, nodata, overviews):
+    dem_dir = slopeDEM(writeDEM, nodata, tiled=True, blockxsize=16, blockysize=16)
+    if overviews:
+        buildOverviews(dem_dir, factors=[2, 4])
+    output_dir = str(tmp_path / 'simplified.tif')
+
+    simplifyDEM(dem_dir, output_dir, reduction_factor=4, resampling=resampling)
+
+    with rasterio.open(output_dir) as simplified:
+        data = simplified.read(1)
+        assert simplified.nodata == pytest.approx(nodata, nan_ok=True)
+
+    invalid = np.isnan(data) if np.isnan(nodata) else data == nodata
+
+    # Output pixels over 'nodata' only stay 'nodata', and every other pixel lies within the elevations of the DEM
+    assert invalid[:, :12].all()
+    assert not invalid[:, 13:].any()
+    assert data[~invalid].min() >= 1000 + 10 * 50 - 20
+    assert data[~invalid].max() <= 1000 + 10 * 159 + 127 + 20
+
+
+def test_nodata_without_crs_falls_back_to_nearest(writeDEM, tmp_path):
+    dem_dir = slopeDEM(writeDEM, crs=None)
+    output_dir = str(tmp_path / 'simplified.tif')
+
+    simplifyDEM(dem_dir, output_dir, reduction_factor=4, resampling='cubic')
+
+    with rasterio.open(dem_dir) as dem, rasterio.open(output_dir) as simplified:
+        values = set(np.unique(dem.read(1)))
+        assert set(np.unique(simplified.read(1))) <= values
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+import BlenderMapDEM.BlenderMapDEM as module
+from BlenderMapDEM import BlenderWorker, renderSweep
+
+
+def readRender(path: str) -> dict:
+    with open(path) as render:
+        return json.load(render)
+
+
+def test_sweep_renders_every_combination(blender, demImage, tmp_path):
+    output_dir = str(tmp_path / 'sweep_{index}_{exaggeration}_{shadow_softness}_{sun_angle}.png')
+
+    frames = renderSweep(blender, demImage, output_dir, exaggeration=[0.5, 2.0], shadow_softness=[30, 90], sun_angle=45, samples=3)
+
+    # Exaggeration varies slowest, and single values are swept as lists of one
+    assert [(frame['exaggeration'], frame['shadow_softness'], frame['sun_angle']) for frame in frames] == [
+        (0.5, 30, 45), (0.5, 90, 45), (2.0, 30, 45), (2.0, 90, 45)]
+    assert [os.path.basename(frame['output_dir']) for frame in frames] == [
+        'sweep_0_0.5_30_45.png', 'sweep_1_0.5_90_45.png', 'sweep_2_2.0_30_45.png', 'sweep_3_2.0_90_45.png']
+
+    # Every frame is rendered in the same session, loading the DEM image once
+    for frame in frames:
+        assert type(frame['seconds']) == float
+        render = readRender(frame['output_dir'])
+        assert render['loads'] == 1
+        assert render['exaggeration'] == frame['exaggeration'] and render['samples'] == 3
+
+
+def test_sweep_checks_frames_before_starting_blender(blender, demImage, tmp_path, monkeypatch):
+    # Starting a worker fails the test, so every error below must be raised before Blender starts
+    class UnstartableWorker:
+        def __init__(self, *args, **kwargs):
+            pytest.fail('Blender was started for an invalid sweep')
+
+    monkeypatch.setattr(module, 'BlenderWorker', UnstartableWorker)
+
+    with pytest.raises(ValueError, match='same file name'):
+        renderSweep(blender, demImage, str(tmp_path / 'sweep_{exaggeration}.png'), exaggeration=[1.0, 2.0], sun_angle=[30, 60])
+
+    with pytest.raises(ValueError, match='Invalid output_dir template'):
+        renderSweep(blender, demImage, str(tmp_path / 'sweep_{azimuth}.png'), exaggeration=[1.0, 2.0])
+
+    with pytest.raises(ValueError, match='must not be empty'):
+        renderSweep(blender, demImage, str(tmp_path / 'sweep_{index}.png'), exaggeration=[])
+
+    # A frame with invalid parameters is rejected even after valid ones
+    with pytest.raises(TypeError, match='sun_angle'):
+        renderSweep(blender, demImage, str(tmp_path / 'sweep_{index}.png'), sun_angle=[45, 'high'])
+
+    assert not list(tmp_path.glob('sweep_*'))
+
+
+def test_sweep_leaves_callers_worker_running(blender, demImage, tmp_path):
+    with BlenderWorker(blender, startup_timeout=30) as worker:
+        worker.render(demImage, str(tmp_path / 'before.png'))
+
+        frames = renderSweep(None, demImage, str(tmp_path / 'sweep_{index}.png'), exaggeration=[1.0, 3.0], worker=worker)
+
+        # The sweep reuses the worker's session and leaves it running for further renders
+        assert all(readRender(frame['output_dir'])['loads'] == 1 for frame in frames)
+        assert worker.process.poll() is None
+        worker.render(demImage, str(tmp_path / 'after.png'))
+        assert readRender(str(tmp_path / 'after.png'))['loads'] == 1
+
+    assert worker.process.returncode == 0
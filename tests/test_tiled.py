@@ -0,0 +1,95 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+import rasterio
+from PIL import Image
+
+import BlenderMapDEM.BlenderMapDEM as module
+from BlenderMapDEM import renderDEMTiled
+
+
+# Scheduler standing in for Blender, "rendering" each pixel of a tile from its own elevation so any tiling renders the same image
+class StubScheduler:
+    instances = []
+
+    def __init__(self, blender_dir, max_renders=1, threads=None, timeout=None):
+        self.tiles = []
+        self.closed = False
+        StubScheduler.instances.append(self)
+
+    def submit(self, dem_dir, output_dir, *args):
+        with rasterio.open(dem_dir) as tile:
+            elevation = tile.read(1)
+        self.tiles.append(elevation)
+        Image.fromarray((elevation >> 8).astype('uint8')).save(output_dir)
+
+        future = Future()
+        future.set_result({'output_dir': output_dir})
+        return future
+
+    def shutdown(self, wait=True, cancel=False):
+        self.closed = True
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    StubScheduler.instances.clear()
+    monkeypatch.setattr(module, 'RenderScheduler', StubScheduler)
+    return StubScheduler
+
+
+# A DEM of smooth hills with a size that is not a multiple of the tile size
+def hills(height=150, width=230):
+    rows, cols = np.mgrid[0:height, 0:width]
+    return (500 * np.sin(rows / 17) * np.cos(cols / 23) + 2 * cols + 1000).astype('float32')
+
+
+@pytest.mark.parametrize('size, tile_size, overlap', [(230, 64, 16), (150, 64, 31), (200, 100, 0), (64, 64, 8)])
+def test_feather_weights_of_overlapping_tiles_sum_to_one(size, tile_size, overlap):
+    total = np.zeros(size, dtype='float64')
+    for core_start in range(0, size, tile_size):
+        start, stop = max(0, core_start - overlap), min(size, core_start + tile_size + overlap)
+        weights = module._featherWeights(start, stop, core_start, min(size, core_start + tile_size), size, overlap)
+
+        assert weights.shape == (stop - start,)
+        assert np.all((weights >= 0) & (weights <= 1))
+        total[start:stop] += weights
+
+    np.testing.assert_allclose(total, 1, atol=1e-6)
+
+
+def test_stitched_tiles_match_a_single_tile_render(writeDEM, tmp_path, scheduler):
+    dem_dir = writeDEM(hills())
+    tiled_dir, single_dir = str(tmp_path / 'tiled.tif'), str(tmp_path / 'single.tif')
+
+    renderDEMTiled('blender', dem_dir, tiled_dir, tile_size=64, overlap=16)
+    renderDEMTiled('blender', dem_dir, single_dir, tile_size=256, overlap=0)
+
+    assert len(scheduler.instances[0].tiles) == 3 * 4
+    assert len(scheduler.instances[1].tiles) == 1
+    assert all(instance.closed for instance in scheduler.instances)
+
+    with rasterio.open(tiled_dir) as tiled, rasterio.open(single_dir) as single, rasterio.open(dem_dir) as dem:
+        assert tiled.transform == dem.transform
+        assert tiled.crs == dem.crs
+        np.testing.assert_array_equal(tiled.read(1), single.read(1))
+
+
+def test_tiles_are_scaled_by_the_range_of_valid_pixels(writeDEM, tmp_path, scheduler):
+    data = hills(100, 100)
+    data[:10, :10] = -9999
+    data[50, 50] = np.nan
+    data[60, 60] = np.inf
+
+    renderDEMTiled('blender', writeDEM(data, nodata=-9999), str(tmp_path / 'shade.tif'), tile_size=128, overlap=0)
+
+    tile = scheduler.instances[0].tiles[0].astype('float64')
+    invalid = ~np.isfinite(data) | (data == -9999)
+    assert np.all(tile[invalid] == 0)
+
+    # Valid pixels span the whole 16-bit range
+    valid = data[~invalid]
+    assert tile[~invalid].min() == 0
+    assert tile[~invalid].max() == 65535
+    np.testing.assert_allclose(tile[~invalid], (valid - valid.min()) * 65535 / (valid.max() - valid.min()), atol=0.5)
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from BlenderMapDEM import BlenderWorker
+
+
+def readRender(path: str) -> dict:
+    with open(path) as render:
+        return json.load(render)
+
+
+def test_handle_job_commands(renderModule):
+    assert renderModule._handleJob({'command': 'ping'}) == {'status': 'ok'}
+    assert renderModule._handleJob({'command': 'shutdown'}) == {'status': 'ok'}
+
+    response = renderModule._handleJob({'command': 'draw'})
+    assert response['status'] == 'error' and response['error_type'] == 'ValueError'
+
+
+def test_handle_job_returns_errors(renderModule, demImage, tmp_path):
+    response = renderModule._handleJob({'command': 'render', 'dem_dir': demImage, 'output_dir': str(tmp_path / 'render.png'), 'exaggeration': 'high'})
+    assert response['status'] == 'error' and response['error_type'] == 'TypeError'
+
+    response = renderModule._handleJob({'command': 'render', 'dem_dir': str(tmp_path / 'missing.png'), 'output_dir': str(tmp_path / 'render.png')})
+    assert response['status'] == 'error' and response['error_type'] == 'FileNotFoundError'
+
+
+def test_handle_job_loads_dem_once(renderModule, demImage, tmp_path):
+    renderModule.setupScene()
+
+    for index, exaggeration in enumerate((0.5, 1.5)):
+        output_dir = str(tmp_path / f'render_{index}.png')
+        response = renderModule._handleJob({'command': 'render', 'dem_dir': demImage, 'output_dir': output_dir, 'exaggeration': exaggeration, 'samples': 3})
+
+        assert response['status'] == 'ok' and response['output_dir'] == output_dir
+        assert readRender(output_dir) == {'loads': 1, 'exaggeration': exaggeration, 'samples': 3, 'resolution': [48, 32]}
+
+    # A DEM changed on disk is loaded again
+    modified = os.path.getmtime(demImage) + 10
+    os.utime(demImage, (modified, modified))
+    renderModule._handleJob({'command': 'render', 'dem_dir': demImage, 'output_dir': str(tmp_path / 'render_2.png')})
+    assert readRender(str(tmp_path / 'render_2.png'))['loads'] == 2
+
+
+def test_worker_renders_jobs_in_one_session(blender, demImage, tmp_path):
+    with BlenderWorker(blender, startup_timeout=30) as worker:
+        for index in range(3):
+            seconds = worker.render(demImage, str(tmp_path / f'render_{index}.png'), exaggeration=float(index))
+            assert type(seconds) == float
+
+        assert readRender(str(tmp_path / 'render_2.png'))['loads'] == 1
+
+        # Errors raised by Blender are raised again with their type and the worker keeps running
+        with pytest.raises(TypeError, match='exaggeration'):
+            worker._send({'command': 'render', 'dem_dir': demImage, 'output_dir': str(tmp_path / 'render.png'), 'exaggeration': 'high'})
+        assert worker._send({'command': 'ping'}) == {'status': 'ok'}
+
+    assert worker.process.returncode == 0
+    with pytest.raises(RuntimeError, match='closed'):
+        worker.render(demImage, str(tmp_path / 'render.png'))
+
+
+def test_worker_reports_crash(blender, demImage, tmp_path):
+    worker = BlenderWorker(blender, startup_timeout=30)
+
+    with pytest.raises(RuntimeError, match='exited with code 3 during a render job'):
+        worker.render(demImage, str(tmp_path / 'crash.png'))
+
+    # The worker can be started again after Blender exits
+    worker.start()
+    worker.render(demImage, str(tmp_path / 'render.png'))
+    worker.close()